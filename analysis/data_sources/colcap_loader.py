@@ -1,7 +1,7 @@
 import pandas as pd
 from typing import Optional
 
-from ..utils.date import to_date
+from ..utils.date import normalize_dates
 
 
 def load_colcap_csv(csv_path: str) -> pd.DataFrame:
@@ -9,10 +9,12 @@ def load_colcap_csv(csv_path: str) -> pd.DataFrame:
 
     Expected columns: 'date' (YYYY-MM-DD or variants), 'close' (float).
     """
-    df = pd.read_csv(csv_path)
+    return prepare_colcap(pd.read_csv(csv_path))
+
+
+def prepare_colcap(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize dates, drop incomplete rows and sort an in-memory COLCAP frame."""
     if "date" not in df.columns or "close" not in df.columns:
         raise ValueError("COLCAP CSV must have 'date' and 'close' columns")
-    df["date"] = df["date"].apply(to_date)
-    df = df.dropna(subset=["date", "close"]).copy()
-    df = df.sort_values("date")
-    return df
+    df = df.assign(date=normalize_dates(df["date"])).dropna(subset=["date", "close"])
+    return df.sort_values("date")
@@ -0,0 +1,213 @@
+import os
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..utils.date import normalize_date_categories, normalize_dates
+
+
+# Partition key of the Parquet dataset written by ingestion (`--format parquet`)
+NEWS_PARTITION_COLUMN = "fecha"
+
+DateRange = Optional[Tuple[Optional[str], Optional[str]]]
+
+# In-memory types of the ingested CSV: Arrow-backed strings for free text,
+# categoricals for the few distinct domains and raw dates, float lengths (a
+# blank cell stays NaN instead of failing an integer column)
+NEWS_DTYPES = {
+    "url": "string",
+    "dominio": "category",
+    "titulo": "string",
+    "fecha": "category",
+    "texto": "string",
+    "longitud": "float64",
+}
+
+
+def is_parquet_dataset(path: str) -> bool:
+    """True if `path` points to a Parquet file or a partitioned dataset directory."""
+    return os.path.isdir(path) or path.endswith(".parquet")
+
+
+def project_columns(columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Return the requested projection, always including the date column."""
+    if columns is None:
+        return None
+    cols = list(columns)
+    if NEWS_PARTITION_COLUMN not in cols:
+        cols.append(NEWS_PARTITION_COLUMN)
+    return cols
+
+
+def date_filters(date_range: DateRange) -> Optional[List[Tuple[str, str, str]]]:
+    """Translate an inclusive (start, end) range into pyarrow/dask filter tuples.
+
+    Dates are 'YYYY-MM-DD' strings, so lexicographic order matches date order
+    and the filters can prune Hive partitions directly.
+    """
+    if not date_range:
+        return None
+    start, end = date_range
+    filters = []
+    if start:
+        filters.append((NEWS_PARTITION_COLUMN, ">=", start))
+    if end:
+        filters.append((NEWS_PARTITION_COLUMN, "<=", end))
+    return filters or None
+
+
+def hive_partitioning():
+    """Hive partitioning with the date key read as string (not inferred as date/int)."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([(NEWS_PARTITION_COLUMN, pa.string())]), flavor="hive")
+
+
+def read_news_parquet(path: str, columns: Optional[List[str]] = None, date_range: DateRange = None) -> pd.DataFrame:
+    """Read the date-partitioned news dataset with column projection and partition pruning."""
+    return pd.read_parquet(
+        path,
+        columns=project_columns(columns),
+        filters=date_filters(date_range),
+        partitioning=hive_partitioning(),
+    )
+
+
+def read_news_csv(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read the ingested news CSV with the pyarrow parser, typed per NEWS_DTYPES, projecting `columns`.
+
+    Only the projected columns are converted, block by block, and the Arrow
+    buffers are handed to pandas without a copy (strings stay Arrow-backed,
+    categoricals come from dictionary-encoded columns).
+    """
+    return _arrow_to_pandas(_open_news_csv(path, columns).read_all())
+
+
+def _open_news_csv(path: str, columns: Optional[List[str]]):
+    import pyarrow as pa
+    import pyarrow.csv as pcsv
+
+    arrow_types = {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "float64": pa.float64(),
+    }
+    return pcsv.open_csv(
+        path,
+        parse_options=pcsv.ParseOptions(newlines_in_values=True),
+        convert_options=pcsv.ConvertOptions(
+            include_columns=project_columns(columns),
+            column_types={c: arrow_types[t] for c, t in NEWS_DTYPES.items()},
+        ),
+    )
+
+
+def _arrow_to_pandas(table) -> pd.DataFrame:
+    import pyarrow as pa
+
+    # self_destruct frees each Arrow column once converted
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get, self_destruct=True)
+
+
+def _rebatch(batches, rows: int):
+    """Regroup a stream of Arrow record batches into tables of `rows` rows (the last one shorter)."""
+    import pyarrow as pa
+
+    pending, count = [], 0
+    for batch in batches:
+        while batch.num_rows:
+            take = min(rows - count, batch.num_rows)
+            pending.append(batch.slice(0, take))
+            count += take
+            batch = batch.slice(take)
+            if count == rows:
+                yield pa.Table.from_batches(pending)
+                pending, count = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+
+def iter_news_frames(
+    path: str,
+    chunksize: int,
+    columns: Optional[List[str]] = None,
+    date_range: DateRange = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream news as lean frames of at most `chunksize` rows (see load_news_frame).
+
+    The CSV is parsed block by block and Parquet datasets are scanned batch
+    by batch (with partition pruning), so memory is bounded by one chunk
+    whatever the file size. Chunks left empty by the date filter are skipped.
+    """
+    if is_parquet_dataset(path):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(path, format="parquet", partitioning=hive_partitioning())
+        expr = None
+        for col, op, value in date_filters(date_range) or []:
+            cond = ds.field(col) >= value if op == ">=" else ds.field(col) <= value
+            expr = cond if expr is None else expr & cond
+        batches = dataset.to_batches(columns=project_columns(columns), filter=expr, batch_size=chunksize)
+    else:
+        batches = _open_news_csv(path, columns)
+    for table in _rebatch(batches, chunksize):
+        df = _lean_frame(_arrow_to_pandas(table), date_range)
+        if len(df):
+            yield df
+
+
+def load_news_frame(path: str, columns: Optional[List[str]] = None, date_range: DateRange = None) -> pd.DataFrame:
+    """News from a CSV or Parquet dataset as a lean pandas frame, dates normalized.
+
+    'fecha' stays categorical (one parse per distinct date, integer codes
+    per row); rows without a valid date are dropped and the range applied
+    by selection, without defensive copies.
+    """
+    if is_parquet_dataset(path):
+        df = read_news_parquet(path, columns, date_range)
+    else:
+        df = read_news_csv(path, columns)
+    return _lean_frame(df, date_range)
+
+
+def _lean_frame(df: pd.DataFrame, date_range: DateRange) -> pd.DataFrame:
+    fecha = df["fecha"]
+    if not isinstance(fecha.dtype, pd.CategoricalDtype):
+        fecha = fecha.astype("category")
+    df["fecha"] = normalize_date_categories(fecha)
+    if df["fecha"].hasnans:
+        df = df[df["fecha"].notna()]
+    return filter_date_range(df, "fecha", date_range)
+
+
+def filter_date_range(df: pd.DataFrame, column: str, date_range: DateRange) -> pd.DataFrame:
+    """Keep rows whose normalized date falls inside the inclusive range."""
+    if not date_range:
+        return df
+    start, end = date_range
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Compare the few distinct dates, then select rows by category
+        dates = pd.Series(values.cat.categories, dtype=object)
+        keep = pd.Series(True, index=dates.index)
+        if start:
+            keep &= dates >= start
+        if end:
+            keep &= dates <= end
+        return df[values.isin(dates[keep])]
+    mask = pd.Series(True, index=df.index)
+    if start:
+        mask &= values >= start
+    if end:
+        mask &= values <= end
+    return df[mask]
+
+
+def prepare_news(df: pd.DataFrame, columns: Optional[List[str]] = None, date_range: DateRange = None) -> pd.DataFrame:
+    """Projection, date normalization and range filter for news already in memory (e.g. uploaded CSV text)."""
+    cols = project_columns(columns)
+    if cols is not None:
+        df = df[[c for c in cols if c in df.columns]]
+    df = df.assign(fecha=normalize_dates(df["fecha"].astype(str))).dropna(subset=["fecha"])
+    return filter_date_range(df, "fecha", date_range)
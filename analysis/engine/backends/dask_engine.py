@@ -1,17 +1,52 @@
 from typing import Any, Dict, List, Optional
 
+import dask
 import dask.dataframe as dd
 import numpy as np
+import pandas as pd
 from scipy import stats
 
 from ..base import AnalysisEngine
-from ...features.news_features import compute_daily_features
-from ...utils.date import to_date
+from ...features.feature_store import FeatureStore
+from ...features.news_features import empty_partials, finalize_daily_features, merge_partials, partial_daily_features
+from ...features.sentiment_cache import SentimentCache
+from ...features.near_duplicates import MinHashLSH, clusters_from_band_keys
+from ...stats.lead_lag import lead_lag_report
+from ...stats.significance import significance_report
+from ...utils.date import normalize_dates
+from ...data_sources.news_loader import (
+    DateRange,
+    date_filters,
+    filter_date_range,
+    hive_partitioning,
+    is_parquet_dataset,
+    project_columns,
+)
+
+
+def _parse_news_dates(pdf: pd.DataFrame, date_range: DateRange) -> pd.DataFrame:
+    pdf = pdf.assign(fecha=normalize_dates(pdf["fecha"])).dropna(subset=["fecha"])
+    return filter_date_range(pdf, "fecha", date_range)
+
+
+def _parse_colcap_dates(pdf: pd.DataFrame) -> pd.DataFrame:
+    return pdf.assign(date=normalize_dates(pdf["date"])).dropna(subset=["date", "close"])
 
 
 class DaskEngine(AnalysisEngine):
-    def __init__(self, npartitions: int | None = None, distributed: bool = False, scheduler_address: str | None = None) -> None:
+    def __init__(
+        self,
+        npartitions: int | None = None,
+        distributed: bool = False,
+        scheduler_address: str | None = None,
+        sentiment_cache: str | None = None,
+        feature_store: str | None = None,
+    ) -> None:
         self.npartitions = npartitions
+        # The cache file must be reachable from the workers (same host or shared volume)
+        self.sentiment_cache = SentimentCache(sentiment_cache) if sentiment_cache else None
+        # Read and written by the driver only
+        self.feature_store = FeatureStore(feature_store) if feature_store else None
         self.distributed = distributed
         self.scheduler_address = scheduler_address
 
@@ -22,31 +57,84 @@ class DaskEngine(AnalysisEngine):
             except Exception:
                 self.client = None
 
-    def load_news(self, csv_path: str) -> dd.DataFrame:
-        ddf = dd.read_csv(csv_path, assume_missing=True)
-        # Convert to pandas to parse dates, then back to dask
-        pdf = ddf.compute()
-        pdf["fecha"] = pdf["fecha"].astype(str).apply(to_date)
-        pdf = pdf.dropna(subset=["fecha"])
-        nparts = self.npartitions or max(1, len(pdf) // 1000)
-        return dd.from_pandas(pdf, npartitions=nparts)
+    def load_news(
+        self,
+        csv_path: str,
+        columns: Optional[List[str]] = None,
+        date_range: DateRange = None,
+    ) -> dd.DataFrame:
+        if is_parquet_dataset(csv_path):
+            ddf = dd.read_parquet(
+                csv_path,
+                columns=project_columns(columns),
+                filters=date_filters(date_range),
+                dataset={"partitioning": hive_partitioning()},
+            )
+        else:
+            ddf = dd.read_csv(csv_path, usecols=project_columns(columns), assume_missing=True)
+        if self.npartitions:
+            ddf = ddf.repartition(npartitions=self.npartitions)
+        # Dates are parsed per partition; nothing is materialized here
+        meta = ddf._meta.assign(fecha=pd.Series(dtype=object))
+        return ddf.map_partitions(_parse_news_dates, date_range, meta=meta)
+
+    def drop_near_duplicates(self, news_df: dd.DataFrame) -> dd.DataFrame:
+        # Signatures are computed per partition; only the small band-key table
+        # (row id + one int64 per band) is brought to the driver for clustering.
+        # The numbered rows are persisted so the filter below does not re-read
+        # and re-parse the news.
+        lsh = MinHashLSH()
+        band_cols = [f"b{i}" for i in range(lsh.bands)]
+        ddf = news_df.assign(_row=1)
+        ddf = self.persist(ddf.assign(_row=ddf["_row"].cumsum()))
+
+        def _keys(pdf: pd.DataFrame) -> pd.DataFrame:
+            keys = lsh.band_keys(pdf["texto"].fillna("").astype(str).tolist())
+            out = pd.DataFrame(keys.reshape(len(pdf), lsh.bands), columns=band_cols, index=pdf.index)
+            out["_row"] = pdf["_row"].to_numpy()
+            return out
+
+        meta = pd.DataFrame({c: pd.Series(dtype="int64") for c in band_cols + ["_row"]})
+        keys_df = ddf.map_partitions(_keys, meta=meta).compute()
+        labels = clusters_from_band_keys(keys_df[band_cols].to_numpy())
+        keep = keys_df["_row"].to_numpy()[labels == np.arange(len(labels))]
+        # Semi-join against the kept ids (as in Spark): a single-partition right
+        # side is broadcast to every partition instead of embedding the id list
+        # in each task
+        keep_df = dd.from_pandas(pd.DataFrame({"_row": keep.astype("int64")}), npartitions=1)
+        return dd.merge(ddf, keep_df, on="_row", how="inner").drop(columns=["_row"])
+
+    def _daily_partials(self, news_df: dd.DataFrame) -> dd.DataFrame:
+        # Sentiment is scored inside each partition and the per-date partial sums
+        # are combined with a distributed groupby-agg
+        partials = news_df.map_partitions(
+            partial_daily_features, cache=self.sentiment_cache, meta=empty_partials()
+        )
+        return partials.groupby("date").sum().reset_index()
 
     def compute_news_features(self, news_df: dd.DataFrame) -> dd.DataFrame:
-        # For sentiment, compute in Pandas then convert to Dask (simpler, keeps correctness)
-        pdf = news_df.compute()
-        pdf_feat = compute_daily_features(pdf)
-        nparts = self.npartitions or max(1, len(pdf_feat) // 50)
-        return dd.from_pandas(pdf_feat, npartitions=nparts)
+        # Features stay lazy
+        daily = self._daily_partials(news_df)
+        return daily.map_partitions(finalize_daily_features, meta=finalize_daily_features(empty_partials()))
+
+    def compute_news_partials(self, news_df: dd.DataFrame) -> pd.DataFrame:
+        return merge_partials(self._daily_partials(news_df).compute())
+
+    def from_pandas(self, pdf: pd.DataFrame) -> dd.DataFrame:
+        # Keep object dates, as the loaders do, so joins see matching key dtypes
+        with dask.config.set({"dataframe.convert-string": False}):
+            return dd.from_pandas(pdf, npartitions=self.npartitions or 1)
+
+    def persist(self, df: Any) -> Any:
+        return df.persist() if isinstance(df, dd.DataFrame) else df
 
     def load_colcap(self, csv_path: str) -> dd.DataFrame:
         ddf = dd.read_csv(csv_path, assume_missing=True)
-        # Convert to pandas to parse dates, then back to dask
-        pdf = ddf.compute()
-        pdf["date"] = pdf["date"].astype(str).apply(to_date)
-        pdf = pdf.dropna(subset=["date", "close"])
-        pdf = pdf.sort_values("date")
-        nparts = self.npartitions or max(1, len(pdf) // 1000)
-        return dd.from_pandas(pdf, npartitions=nparts)
+        if "date" not in ddf.columns or "close" not in ddf.columns:
+            raise ValueError("COLCAP CSV must contain 'date' and 'close' columns")
+        meta = ddf._meta.assign(date=pd.Series(dtype=object))
+        # Sorting is deferred to the final (small) joined table
+        return ddf.map_partitions(_parse_colcap_dates, meta=meta)
 
     def align_series(self, news_features_df: dd.DataFrame, colcap_df: dd.DataFrame) -> dd.DataFrame:
         joined = dd.merge(news_features_df, colcap_df, on="date", how="inner")
@@ -57,9 +145,34 @@ class DaskEngine(AnalysisEngine):
         joined_df: dd.DataFrame,
         methods: Optional[List[str]] = None,
         rolling_windows: Optional[List[int]] = None,
+        rolling_series: bool = False,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
     ) -> Dict[str, Any]:
-        # Compute to Pandas for stats
-        pdf = joined_df.compute()
+        # The only compute of the pipeline: one row per trading day
+        pdf = joined_df.compute().sort_values("date").reset_index(drop=True)
         from .pandas_engine import PandasEngine
 
-        return PandasEngine().compute_correlations(pdf, methods, rolling_windows)
+        return PandasEngine().compute_correlations(pdf, methods, rolling_windows, rolling_series, max_points, downsample)
+
+    def compute_lead_lag(self, news_features_df: dd.DataFrame, colcap_df: dd.DataFrame, max_lag: int = 10) -> Dict[str, Any]:
+        # Both inputs hold one row per day; one compute for the pair
+        features, colcap = dask.compute(news_features_df, colcap_df)
+        return lead_lag_report(features, colcap, max_lag)
+
+    def compute_significance(
+        self,
+        joined_df: dd.DataFrame,
+        methods: Optional[List[str]] = None,
+        n_resamples: int = 2000,
+        block_size: Optional[int] = None,
+        confidence: float = 0.95,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        pdf = joined_df.compute().sort_values("date").reset_index(drop=True)
+
+        def _map(fn, tasks):
+            # One delayed task per batch of resamples; runs on the cluster when a Client is active
+            return list(dask.compute(*[dask.delayed(fn)(t) for t in tasks]))
+
+        return significance_report(pdf, methods, n_resamples, block_size, confidence, seed, map_fn=_map)
@@ -1,41 +1,115 @@
+from collections import deque
+from functools import partial
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import numpy as np
 from multiprocessing import Pool, cpu_count
-from scipy import stats
 
-from ..base import AnalysisEngine
-from ...features.news_features import compute_daily_features
-from ...utils.date import to_date
+from ..base import NEWS_FEATURE_COLUMNS, AnalysisEngine
+from ...features.feature_store import FeatureStore
+from ...features.news_features import (
+    empty_partials,
+    finalize_daily_features,
+    get_analyzer,
+    merge_partials,
+    partial_daily_features,
+)
+from ...features.sentiment_cache import SentimentCache
+from ...stats.correlation import correlation_report
+from ...stats.lead_lag import lead_lag_report
+from ...stats.significance import pool_map, significance_report
+from ...features.near_duplicates import MinHashLSH, clusters_from_band_keys
+from ...data_sources.colcap_loader import load_colcap_csv
+from ...data_sources.news_loader import DateRange, iter_news_frames, load_news_frame
 
 
-def _parse_date(text: str) -> Optional[str]:
-    return to_date(text)
+def _band_keys(texts: List[str]) -> np.ndarray:
+    # Same seed in every process, so signatures are comparable across workers
+    return MinHashLSH().band_keys(texts)
+
+
+def _init_sentiment_worker() -> None:
+    # Load the VADER lexicon once per worker, not once per chunk
+    get_analyzer()
+
+
+# Chunks per process, so slow chunks (long texts) do not leave workers idle
+CHUNKS_PER_PROC = 4
+
+# Streaming mode: chunks in flight per process (one being scored, one queued),
+# which bounds memory to a few chunks however fast the file is read
+INFLIGHT_PER_PROC = 2
 
 
 class MultiprocessingEngine(AnalysisEngine):
-    def __init__(self, nprocs: int | None = None) -> None:
+    def __init__(
+        self,
+        nprocs: int | None = None,
+        sentiment_cache: str | None = None,
+        feature_store: str | None = None,
+        chunksize: int | None = None,
+    ) -> None:
         self.nprocs = nprocs or cpu_count()
+        self.sentiment_cache = SentimentCache(sentiment_cache) if sentiment_cache else None
+        self.feature_store = FeatureStore(feature_store) if feature_store else None
+        # Rows per chunk in streaming mode; None loads the whole file
+        self.chunksize = chunksize
 
-    def load_news(self, csv_path: str) -> pd.DataFrame:
-        df = pd.read_csv(csv_path)
+    def load_news(
+        self,
+        csv_path: str,
+        columns: Optional[List[str]] = None,
+        date_range: DateRange = None,
+    ) -> pd.DataFrame:
+        # Few distinct date strings: parsing them in-process beats shipping the column to a Pool
+        return load_news_frame(csv_path, columns, date_range)
+
+    def drop_near_duplicates(self, news_df: pd.DataFrame) -> pd.DataFrame:
+        texts = news_df["texto"].fillna("").astype(str).tolist()
+        if not texts:
+            return news_df
+        size = -(-len(texts) // self.nprocs)
+        chunks = [texts[i : i + size] for i in range(0, len(texts), size)]
         with Pool(self.nprocs) as pool:
-            parsed = pool.map(_parse_date, df["fecha"].astype(str).tolist())
-        df["fecha"] = parsed
-        df = df.dropna(subset=["fecha"]).copy()
-        return df
+            keys = np.vstack(pool.map(_band_keys, chunks))
+        labels = clusters_from_band_keys(keys)
+        return news_df[labels == np.arange(len(labels))]
 
     def compute_news_features(self, news_df: pd.DataFrame) -> pd.DataFrame:
-        # Sentiment computation is inside compute_daily_features
-        return compute_daily_features(news_df)
+        return finalize_daily_features(self.compute_news_partials(news_df))
+
+    def compute_news_partials(self, news_df: pd.DataFrame) -> pd.DataFrame:
+        # Workers score sentiment per chunk and return per-date partials only
+        cols = [c for c in ("url", "fecha", "texto", "longitud") if c in news_df.columns]
+        df = news_df[cols]
+        n_chunks = max(1, min(len(df), self.nprocs * CHUNKS_PER_PROC))
+        size = -(-len(df) // n_chunks) if len(df) else 1
+        chunks = [df.iloc[i : i + size] for i in range(0, len(df), size)]
+        with Pool(self.nprocs, initializer=_init_sentiment_worker) as pool:
+            score = partial(partial_daily_features, cache=self.sentiment_cache)
+            partials = list(pool.imap_unordered(score, chunks))
+        return merge_partials(partials)
+
+    def news_partials(self, news_path: str, date_range: DateRange = None) -> pd.DataFrame:
+        if not self.chunksize:
+            return super().news_partials(news_path, date_range)
+        # Pool.imap would drain the whole reader into its task queue; submit
+        # chunks one by one instead and fold results once the window is full
+        total = empty_partials()
+        score = partial(partial_daily_features, cache=self.sentiment_cache)
+        pending: deque = deque()
+        with Pool(self.nprocs, initializer=_init_sentiment_worker) as pool:
+            for chunk in iter_news_frames(news_path, self.chunksize, NEWS_FEATURE_COLUMNS, date_range):
+                if len(pending) >= self.nprocs * INFLIGHT_PER_PROC:
+                    total = merge_partials([total, pending.popleft().get()])
+                pending.append(pool.apply_async(score, (chunk,)))
+            while pending:
+                total = merge_partials([total, pending.popleft().get()])
+        return total
 
     def load_colcap(self, csv_path: str) -> pd.DataFrame:
-        col = pd.read_csv(csv_path)
-        col["date"] = col["date"].apply(to_date)
-        col = col.dropna(subset=["date", "close"]).copy()
-        col = col.sort_values("date")
-        return col
+        return load_colcap_csv(csv_path)
 
     def align_series(self, news_features_df: pd.DataFrame, colcap_df: pd.DataFrame) -> pd.DataFrame:
         joined = pd.merge(news_features_df, colcap_df, on="date", how="inner")
@@ -46,36 +120,31 @@ class MultiprocessingEngine(AnalysisEngine):
         joined_df: pd.DataFrame,
         methods: Optional[List[str]] = None,
         rolling_windows: Optional[List[int]] = None,
+        rolling_series: bool = False,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
+    ) -> Dict[str, Any]:
+        return correlation_report(
+            joined_df,
+            methods,
+            rolling_windows,
+            rolling_series=rolling_series,
+            max_points=max_points,
+            downsample=downsample,
+        )
+
+    def compute_lead_lag(self, news_features_df: pd.DataFrame, colcap_df: pd.DataFrame, max_lag: int = 10) -> Dict[str, Any]:
+        return lead_lag_report(news_features_df, colcap_df, max_lag)
+
+    def compute_significance(
+        self,
+        joined_df: pd.DataFrame,
+        methods: Optional[List[str]] = None,
+        n_resamples: int = 2000,
+        block_size: Optional[int] = None,
+        confidence: float = 0.95,
+        seed: int = 0,
     ) -> Dict[str, Any]:
-        methods = methods or ["pearson", "spearman"]
-        rolling_windows = rolling_windows or [7, 14, 30]
-
-        results: Dict[str, Any] = {}
-
-        feature_cols = [c for c in joined_df.columns if c in {"article_count", "avg_length", "sentiment_mean"}]
-        close = joined_df["close"].astype(float)
-
-        for m in methods:
-            m_res: Dict[str, float] = {}
-            for f in feature_cols:
-                series = joined_df[f].astype(float)
-                if m == "pearson":
-                    coef = np.corrcoef(series, close)[0, 1]
-                elif m == "spearman":
-                    coef, _ = stats.spearmanr(series, close, nan_policy="omit")
-                else:
-                    continue
-                m_res[f] = float(coef) if pd.notnull(coef) else np.nan
-            results[m] = m_res
-
-        rolling: Dict[str, Dict[int, Dict[str, float]]] = {}
-        df_roll = joined_df.copy()
-        for win in rolling_windows:
-            roll_res: Dict[str, float] = {}
-            for f in feature_cols:
-                corr_series = df_roll[f].rolling(win).corr(df_roll["close"])  # type: ignore
-                roll_res[f] = float(corr_series.iloc[-1]) if len(corr_series) else np.nan
-            rolling[str(win)] = roll_res
-        results["rolling"] = rolling
-
-        return results
+        return significance_report(
+            joined_df, methods, n_resamples, block_size, confidence, seed, map_fn=pool_map(self.nprocs)
+        )
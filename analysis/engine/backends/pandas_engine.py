@@ -1,34 +1,59 @@
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
-import numpy as np
-from scipy import stats
 
-from ..base import AnalysisEngine
-from ...features.news_features import compute_daily_features
-from ...utils.date import to_date
+from ..base import NEWS_FEATURE_COLUMNS, AnalysisEngine
+from ...features.feature_store import FeatureStore
+from ...features.news_features import compute_daily_features, empty_partials, merge_partials, partial_daily_features
+from ...features.sentiment_cache import SentimentCache
+from ...stats.correlation import correlation_report
+from ...stats.lead_lag import lead_lag_report
+from ...stats.significance import pool_map, significance_report
+from ...features.near_duplicates import drop_near_duplicates
+from ...data_sources.colcap_loader import load_colcap_csv
+from ...data_sources.news_loader import DateRange, iter_news_frames, load_news_frame
 
 
 class PandasEngine(AnalysisEngine):
-    def load_news(self, csv_path: str) -> pd.DataFrame:
-        df = pd.read_csv(csv_path)
-        # Normalize/parse dates
-        df["fecha"] = df["fecha"].apply(to_date)
-        # Filter rows with valid dates
-        df = df.dropna(subset=["fecha"]).copy()
-        return df
+    def __init__(
+        self,
+        sentiment_cache: str | None = None,
+        feature_store: str | None = None,
+        chunksize: int | None = None,
+    ) -> None:
+        self.sentiment_cache = SentimentCache(sentiment_cache) if sentiment_cache else None
+        self.feature_store = FeatureStore(feature_store) if feature_store else None
+        # Rows per chunk in streaming mode; None loads the whole file
+        self.chunksize = chunksize
+
+    def load_news(
+        self,
+        csv_path: str,
+        columns: Optional[List[str]] = None,
+        date_range: DateRange = None,
+    ) -> pd.DataFrame:
+        return load_news_frame(csv_path, columns, date_range)
+
+    def drop_near_duplicates(self, news_df: pd.DataFrame) -> pd.DataFrame:
+        return drop_near_duplicates(news_df)
 
     def compute_news_features(self, news_df: pd.DataFrame) -> pd.DataFrame:
-        return compute_daily_features(news_df)
+        return compute_daily_features(news_df, self.sentiment_cache)
+
+    def compute_news_partials(self, news_df: pd.DataFrame) -> pd.DataFrame:
+        return merge_partials(partial_daily_features(news_df, self.sentiment_cache))
+
+    def news_partials(self, news_path: str, date_range: DateRange = None) -> pd.DataFrame:
+        if not self.chunksize:
+            return super().news_partials(news_path, date_range)
+        # Only one chunk and the running per-date table are alive at a time
+        total = empty_partials()
+        for chunk in iter_news_frames(news_path, self.chunksize, NEWS_FEATURE_COLUMNS, date_range):
+            total = merge_partials([total, partial_daily_features(chunk, self.sentiment_cache)])
+        return total
 
     def load_colcap(self, csv_path: str) -> pd.DataFrame:
-        col = pd.read_csv(csv_path)
-        if "date" not in col.columns or "close" not in col.columns:
-            raise ValueError("COLCAP CSV must contain 'date' and 'close' columns")
-        col["date"] = col["date"].apply(to_date)
-        col = col.dropna(subset=["date", "close"]).copy()
-        col = col.sort_values("date")
-        return col
+        return load_colcap_csv(csv_path)
 
     def align_series(self, news_features_df: pd.DataFrame, colcap_df: pd.DataFrame) -> pd.DataFrame:
         # Join on date
@@ -46,40 +71,31 @@ class PandasEngine(AnalysisEngine):
         joined_df: pd.DataFrame,
         methods: Optional[List[str]] = None,
         rolling_windows: Optional[List[int]] = None,
+        rolling_series: bool = False,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
     ) -> Dict[str, Any]:
-        methods = methods or ["pearson", "spearman"]
-        rolling_windows = rolling_windows or [7, 14, 30]
-
-        results: Dict[str, Any] = {}
-
-        # Base correlations against close
-        feature_cols = [c for c in joined_df.columns if c in {"article_count", "avg_length", "sentiment_mean"}]
-        close = joined_df["close"].astype(float)
-
-        for m in methods:
-            m_res: Dict[str, float] = {}
-            for f in feature_cols:
-                series = joined_df[f].astype(float)
-                if m == "pearson":
-                    coef = np.corrcoef(series, close)[0, 1]
-                elif m == "spearman":
-                    coef, _ = stats.spearmanr(series, close, nan_policy="omit")
-                else:
-                    continue
-                m_res[f] = float(coef) if pd.notnull(coef) else np.nan
-            results[m] = m_res
+        return correlation_report(
+            joined_df,
+            methods,
+            rolling_windows,
+            rolling_series=rolling_series,
+            max_points=max_points,
+            downsample=downsample,
+        )
 
-        # Rolling correlations
-        rolling: Dict[str, Dict[int, Dict[str, float]]] = {}
-        df_roll = joined_df.copy()
-        for win in rolling_windows:
-            roll_res: Dict[str, float] = {}
-            for f in feature_cols:
-                # Pandas rolling corr
-                corr_series = df_roll[f].rolling(win).corr(df_roll["close"])  # type: ignore
-                # Last value as representative; can also return full series
-                roll_res[f] = float(corr_series.iloc[-1]) if len(corr_series) else np.nan
-            rolling[str(win)] = roll_res
-        results["rolling"] = rolling
+    def compute_lead_lag(self, news_features_df: pd.DataFrame, colcap_df: pd.DataFrame, max_lag: int = 10) -> Dict[str, Any]:
+        return lead_lag_report(news_features_df, colcap_df, max_lag)
 
-        return results
+    def compute_significance(
+        self,
+        joined_df: pd.DataFrame,
+        methods: Optional[List[str]] = None,
+        n_resamples: int = 2000,
+        block_size: Optional[int] = None,
+        confidence: float = 0.95,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        return significance_report(
+            joined_df, methods, n_resamples, block_size, confidence, seed, map_fn=pool_map()
+        )
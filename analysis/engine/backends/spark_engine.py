@@ -1,16 +1,97 @@
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+import pandas as pd
+
 try:
-    from pyspark.sql import SparkSession, functions as F
+    from pyspark.sql import DataFrame, SparkSession, Window, functions as F
 except Exception as e:
     raise e
 
 from ..base import AnalysisEngine
-from ...utils.date import to_date
+from ...utils.date import _MONTHS
+from ...features.feature_store import FeatureStore
+from ...features.news_features import merge_partials, score_sentiment
+from ...features.sentiment_cache import SentimentCache
+from ...features.near_duplicates import MinHashLSH, clusters_from_band_keys
+from ...stats.correlation import FEATURES, pvalues
+from ...stats.lead_lag import lead_lag_summary
+from ...stats.downsample import encode_rolling_series
+from ...stats.significance import significance_report
+from ...data_sources.news_loader import DateRange, NEWS_PARTITION_COLUMN, is_parquet_dataset, project_columns
+
+
+_ISO = r"^(\d{4})-(\d{2})-(\d{2})$"
+_DMY = r"^(\d{2})/(\d{2})/(\d{4})$"
+_SPANISH = r"^(\d{1,2})\s+de\s+([a-záéíóú]+)\s+de\s+(\d{4})$"
+
+
+def _parse_date_col(col):
+    """Spark SQL equivalent of utils.date.to_date: 'YYYY-MM-DD' string or null.
+
+    Year, month and day are extracted with regexes (Spanish month names through
+    a CASE over the month table) and the date is built from the first of the
+    month, so invalid days give null instead of depending on the datetime
+    parser policy or on ANSI mode.
+    """
+    v = F.lower(F.trim(col.cast("string")))
+    iso, dmy, es = v.rlike(_ISO), v.rlike(_DMY), v.rlike(_SPANISH)
+    # CASE chain rather than a map lookup: missing map keys raise under ANSI mode
+    name = F.translate(F.regexp_extract(v, _SPANISH, 2), "áéíóú", "aeiou")
+    spanish_month = F.lit(None).cast("int")
+    for month_name, number in _MONTHS.items():
+        spanish_month = F.when(name == month_name, F.lit(number)).otherwise(spanish_month)
+
+    year = (
+        F.when(iso, F.regexp_extract(v, _ISO, 1))
+        .when(dmy, F.regexp_extract(v, _DMY, 3))
+        .when(es, F.regexp_extract(v, _SPANISH, 3))
+        .cast("int")
+    )
+    month = (
+        F.when(iso, F.regexp_extract(v, _ISO, 2).cast("int"))
+        .when(dmy, F.regexp_extract(v, _DMY, 2).cast("int"))
+        .when(es, spanish_month)
+    )
+    day = (
+        F.when(iso, F.regexp_extract(v, _ISO, 3))
+        .when(dmy, F.regexp_extract(v, _DMY, 1))
+        .when(es, F.regexp_extract(v, _SPANISH, 1))
+        .cast("int")
+    )
+    first = F.when(year.between(1, 9999) & month.between(1, 12), F.make_date(year, month, F.lit(1)))
+    valid = day.between(1, F.dayofmonth(F.last_day(first)))
+    return F.when(valid, F.date_add(first, day - 1)).cast("string")
+
+
+def _nan_to_null(col_name: str):
+    c = F.col(col_name).cast("double")
+    return F.when(~F.isnan(c), c)
+
+
+def _avg_rank(col_name: str):
+    """Average rank (ties share the mean of their positions), as in scipy.stats.rankdata."""
+    order = Window.orderBy(col_name)
+    ties = Window.partitionBy(col_name)
+    return F.rank().over(order) + (F.count(F.lit(1)).over(ties) - 1) / 2.0
+
+
+def _as_float(value) -> float:
+    return float(value) if value is not None else np.nan
 
 
 class SparkEngine(AnalysisEngine):
-    def __init__(self, master: str | None = None, configs: dict | None = None) -> None:
+    def __init__(
+        self,
+        master: str | None = None,
+        configs: dict | None = None,
+        sentiment_cache: str | None = None,
+        feature_store: str | None = None,
+    ) -> None:
+        # The cache file must be reachable from the executors (local mode or shared volume)
+        self.sentiment_cache = SentimentCache(sentiment_cache) if sentiment_cache else None
+        # Read and written by the driver only
+        self.feature_store = FeatureStore(feature_store) if feature_store else None
         builder = SparkSession.builder.appName("AnalysisEngine")
         builder = builder.config("spark.sql.execution.arrow.pyspark.enabled", "true")
         if master:
@@ -20,24 +101,107 @@ class SparkEngine(AnalysisEngine):
                 builder = builder.config(k, v)
         self.spark = builder.getOrCreate()
 
-    def load_news(self, csv_path: str):
-        df = self.spark.read.csv(csv_path, header=True, inferSchema=True)
-        to_date_udf = F.udf(lambda s: to_date(s), "string")
-        df = df.withColumn("fecha", to_date_udf(F.col("fecha"))).dropna(subset=["fecha"])
+    def load_news(
+        self,
+        csv_path: str,
+        columns: Optional[List[str]] = None,
+        date_range: DateRange = None,
+    ):
+        cols = project_columns(columns)
+        if is_parquet_dataset(csv_path):
+            df = self.spark.read.parquet(csv_path)
+            # The partition key may be inferred as DateType; keep it as 'YYYY-MM-DD' string.
+            # Filters on the partition column are pushed down as partition pruning.
+            df = df.withColumn(NEWS_PARTITION_COLUMN, F.col(NEWS_PARTITION_COLUMN).cast("string"))
+            df = self._filter_date_range(df, NEWS_PARTITION_COLUMN, date_range)
+        else:
+            df = self.spark.read.csv(csv_path, header=True, inferSchema=True)
+        if cols is not None:
+            df = df.select(*cols)
+        df = df.withColumn("fecha", _parse_date_col(F.col("fecha"))).dropna(subset=["fecha"])
+        return self._filter_date_range(df, "fecha", date_range)
+
+    @staticmethod
+    def _filter_date_range(df, column: str, date_range: DateRange):
+        if not date_range:
+            return df
+        start, end = date_range
+        if start:
+            df = df.where(F.col(column) >= start)
+        if end:
+            df = df.where(F.col(column) <= end)
         return df
 
+    def drop_near_duplicates(self, news_df):
+        # Band keys are computed per partition with mapInPandas; only row ids and
+        # band keys are collected to cluster, then a semi-join keeps canonical rows.
+        lsh = MinHashLSH()
+        band_cols = [f"b{i}" for i in range(lsh.bands)]
+        df = news_df.withColumn("_row", F.monotonically_increasing_id()).persist()
+
+        def _keys(batches):
+            for pdf in batches:
+                keys = lsh.band_keys(pdf["texto"].fillna("").astype(str).tolist())
+                out = pd.DataFrame(keys.reshape(len(pdf), lsh.bands), columns=band_cols)
+                out["_row"] = pdf["_row"].to_numpy()
+                yield out
+
+        schema = ", ".join(f"{c} long" for c in band_cols + ["_row"])
+        keys_pdf = df.select("_row", "texto").mapInPandas(_keys, schema=schema).toPandas()
+        labels = clusters_from_band_keys(keys_pdf[band_cols].to_numpy())
+        keep = keys_pdf["_row"].to_numpy()[labels == np.arange(len(labels))]
+        keep_df = self.spark.createDataFrame(pd.DataFrame({"_row": keep.astype("int64")}))
+        return df.join(keep_df, on="_row", how="left_semi").drop("_row")
+
+    def _scored(self, news_df):
+        # Sentiment runs in an Arrow-backed pandas UDF on the executors (one VADER
+        # analyzer per Python worker)
+        cache = self.sentiment_cache
+
+        @F.pandas_udf("double")
+        def sentiment(texts: pd.Series) -> pd.Series:
+            return pd.Series(score_sentiment(texts.fillna("").astype(str).tolist(), cache), index=texts.index)
+
+        return news_df.withColumn("sentiment", sentiment(F.col("texto")))
+
     def compute_news_features(self, news_df):
-        # Sentiment: offload to Pandas for now due to complexity
-        pdf = news_df.toPandas()
-        from ...features.news_features import compute_daily_features
-        feat = compute_daily_features(pdf)
-        return self.spark.createDataFrame(feat)
+        # The per-date aggregation is a native groupBy
+        scored = self._scored(news_df)
+        longitud = F.col("longitud").cast("double")
+        return scored.groupBy(F.col("fecha").alias("date")).agg(
+            F.count("url").alias("article_count"),
+            F.avg(longitud).alias("avg_length"),
+            F.avg("sentiment").alias("sentiment_mean"),
+            F.var_samp(longitud).alias("length_var"),
+            F.var_samp("sentiment").alias("sentiment_var"),
+        )
+
+    def compute_news_partials(self, news_df) -> pd.DataFrame:
+        longitud = F.col("longitud").cast("double")
+        partials = self._scored(news_df).groupBy(F.col("fecha").alias("date")).agg(
+            F.count("url").alias("n_articles"),
+            F.count(F.lit(1)).alias("n"),
+            F.count(longitud).alias("n_length"),
+            F.coalesce(F.sum(longitud), F.lit(0.0)).alias("sum_length"),
+            F.coalesce(F.sum(longitud * longitud), F.lit(0.0)).alias("sumsq_length"),
+            F.sum("sentiment").alias("sum_sentiment"),
+            F.sum(F.col("sentiment") * F.col("sentiment")).alias("sumsq_sentiment"),
+        )
+        # One row per date comes back to the driver
+        return merge_partials(partials.toPandas())
+
+    def from_pandas(self, pdf: pd.DataFrame):
+        return self.spark.createDataFrame(pdf)
+
+    def persist(self, df):
+        return df.persist() if isinstance(df, DataFrame) else df
 
     def load_colcap(self, csv_path: str):
         df = self.spark.read.csv(csv_path, header=True, inferSchema=True)
-        to_date_udf = F.udf(lambda s: to_date(s), "string")
-        df = df.withColumn("date", to_date_udf(F.col("date"))).dropna(subset=["date", "close"]).orderBy("date")
-        return df
+        if "date" not in df.columns or "close" not in df.columns:
+            raise ValueError("COLCAP CSV must contain 'date' and 'close' columns")
+        # No global sort here: rolling windows order by date themselves
+        return df.withColumn("date", _parse_date_col(F.col("date"))).dropna(subset=["date", "close"])
 
     def align_series(self, news_features_df, colcap_df):
         joined = news_features_df.join(colcap_df, on="date", how="inner")
@@ -48,8 +212,120 @@ class SparkEngine(AnalysisEngine):
         joined_df,
         methods: Optional[List[str]] = None,
         rolling_windows: Optional[List[int]] = None,
+        rolling_series: bool = False,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
     ) -> Dict[str, Any]:
-        # Convert to Pandas for stats
-        pdf = joined_df.toPandas()
-        from .pandas_engine import PandasEngine
-        return PandasEngine().compute_correlations(pdf, methods, rolling_windows)
+        # Everything is computed by Spark; only one row of coefficients per query
+        # comes back to the driver.
+        methods = methods or ["pearson", "spearman"]
+        rolling_windows = rolling_windows or [7, 14, 30]
+
+        feature_cols = [c for c in FEATURES if c in joined_df.columns]
+        df = joined_df.select("date", *[_nan_to_null(c).alias(c) for c in feature_cols + ["close"]]).persist()
+
+        # Pairwise-complete row counts, for the p-values and the 'n' key
+        both = F.col("close").isNotNull()
+        counts_row = df.agg(*[F.count(F.when(F.col(f).isNotNull() & both, 1)).alias(f) for f in feature_cols]).first()
+        counts = np.array([counts_row[f] for f in feature_cols], dtype=int)
+
+        results: Dict[str, Any] = {}
+        pvals: Dict[str, Dict[str, float]] = {}
+        for m in methods:
+            m_res: Dict[str, float] = {}
+            if m == "pearson":
+                row = df.agg(*[F.corr(f, "close").alias(f) for f in feature_cols]).first()
+                m_res = {f: _as_float(row[f]) for f in feature_cols}
+            elif m == "spearman":
+                for f in feature_cols:
+                    pairs = df.select(f, "close").dropna()
+                    ranked = pairs.select(_avg_rank(f).alias("rf"), _avg_rank("close").alias("rc"))
+                    m_res[f] = _as_float(ranked.agg(F.corr("rf", "rc")).first()[0])
+            else:
+                continue
+            results[m] = m_res
+            p = pvalues(np.array([m_res[f] for f in feature_cols], dtype=float), counts)
+            pvals[m] = {f: float(v) for f, v in zip(feature_cols, p)}
+
+        # Rolling Pearson over the last `win` trading days, as a window aggregate;
+        # like pandas rolling(win), it is null unless the window is full.
+        order = Window.orderBy("date")
+        rolling_cols = []
+        for win in rolling_windows:
+            frame = order.rowsBetween(-(win - 1), 0)
+            for f in feature_cols:
+                full = F.count(f).over(frame) == win
+                rolling_cols.append(F.when(full, F.corr(f, "close").over(frame)).alias(f"{win}|{f}"))
+        rolled = df.select("date", *rolling_cols)
+        if rolling_series:
+            # One row per trading day; downsampling happens on the driver
+            pdf = rolled.orderBy("date").toPandas()
+            series = {
+                win: pdf[[f"{win}|{f}" for f in feature_cols]].to_numpy(dtype=float, na_value=np.nan)
+                for win in rolling_windows
+            }
+            results["rolling_series"] = encode_rolling_series(
+                pdf["date"].to_numpy(), series, feature_cols, max_points, downsample
+            )
+            last = [pdf.iloc[-1]] if len(pdf) else []
+        else:
+            last = rolled.orderBy(F.col("date").desc()).limit(1).collect()
+        rolling: Dict[str, Dict[str, float]] = {}
+        for win in rolling_windows:
+            rolling[str(win)] = {
+                f: _as_float(last[0][f"{win}|{f}"]) if last else np.nan for f in feature_cols
+            }
+        results["rolling"] = rolling
+        results["pvalues"] = pvals
+        results["n"] = {f: int(c) for f, c in zip(feature_cols, counts)}
+
+        df.unpersist()
+        return results
+
+    def compute_lead_lag(self, news_features_df, colcap_df, max_lag: int = 10) -> Dict[str, Any]:
+        # Every lag is a lag/lead window column of the same frame, so all
+        # (lag, feature) coefficients come from a single aggregate query.
+        feature_cols = [c for c in FEATURES if c in news_features_df.columns]
+        order = Window.orderBy("date")
+        closes = colcap_df.select("date", F.col("close").cast("double").alias("close"))
+        # Returns on the full COLCAP calendar, before days without news are joined
+        closes = closes.withColumn("returns", F.col("close") / F.lag("close", 1).over(order) - 1)
+        feats = news_features_df.select("date", *[_nan_to_null(f).alias(f) for f in feature_cols])
+        df = closes.join(feats, on="date", how="left")
+
+        lags = np.arange(-max_lag, max_lag + 1)
+        shifted = []
+        for k in lags:
+            for f in feature_cols:
+                col = F.col(f) if k == 0 else (F.lag(f, int(k)) if k > 0 else F.lead(f, int(-k))).over(order)
+                shifted.append(col.alias(f"{k}|{f}"))
+        aggs = []
+        for k in lags:
+            for f in feature_cols:
+                x = F.col(f"{k}|{f}")
+                aggs.append(F.corr(x, "returns").alias(f"r{k}|{f}"))
+                aggs.append(F.count(F.when(x.isNotNull() & F.col("returns").isNotNull(), 1)).alias(f"n{k}|{f}"))
+        row = df.select("returns", *shifted).agg(*aggs).first()
+
+        r = np.array([[_as_float(row[f"r{k}|{f}"]) for f in feature_cols] for k in lags]).reshape(len(lags), -1)
+        n = np.array([[row[f"n{k}|{f}"] for f in feature_cols] for k in lags], dtype=int).reshape(len(lags), -1)
+        r[n < 3] = np.nan
+        return lead_lag_summary(feature_cols, lags, r, n)
+
+    def compute_significance(
+        self,
+        joined_df,
+        methods: Optional[List[str]] = None,
+        n_resamples: int = 2000,
+        block_size: Optional[int] = None,
+        confidence: float = 0.95,
+        seed: int = 0,
+    ) -> Dict[str, Any]:
+        # The joined table has one row per trading day; resample batches run as Spark tasks
+        pdf = joined_df.orderBy("date").toPandas()
+        sc = self.spark.sparkContext
+
+        def _map(fn, tasks):
+            return sc.parallelize(tasks, len(tasks)).map(fn).collect()
+
+        return significance_report(pdf, methods, n_resamples, block_size, confidence, seed, map_fn=_map)
@@ -1,5 +1,15 @@
 from typing import Any, Dict, List, Optional
 
+import pandas as pd
+
+from ..data_sources.news_loader import DateRange, filter_date_range
+from ..features.news_features import finalize_daily_features
+
+
+# Columns needed by compute_news_features; pass as `columns` to load_news to
+# avoid reading 'titulo'/'dominio' when only daily features are computed.
+NEWS_FEATURE_COLUMNS = ["url", "fecha", "texto", "longitud"]
+
 
 class AnalysisEngine:
     """Backend-agnostic analysis engine interface.
@@ -8,21 +18,88 @@ class AnalysisEngine:
     their respective backends (Pandas, Dask, Spark, Multiprocessing).
     """
 
-    def load_news(self, csv_path: str) -> Any:
-        """Load ingested news CSV.
+    def load_news(
+        self,
+        csv_path: str,
+        columns: Optional[List[str]] = None,
+        date_range: DateRange = None,
+    ) -> Any:
+        """Load ingested news from a CSV or a date-partitioned Parquet dataset.
 
         Expected columns: ['url','dominio','titulo','fecha','texto','longitud'].
+        `columns` projects only the given columns ('fecha' is always kept) and
+        `date_range` is an inclusive ('YYYY-MM-DD', 'YYYY-MM-DD') range; either
+        end may be None. On Parquet datasets the range prunes partitions.
         Returns a backend-specific DataFrame.
         """
         raise NotImplementedError
 
+    def drop_near_duplicates(self, news_df: Any) -> Any:
+        """Drop near-duplicate articles (e.g. syndicated wire copies across domains).
+
+        Articles are clustered with MinHash + LSH banding on 'texto' (see
+        features.near_duplicates) and only the first of each cluster is kept.
+        Returns a backend-specific DataFrame with the same columns.
+        """
+        raise NotImplementedError
+
     def compute_news_features(self, news_df: Any) -> Any:
-        """Aggregate per-date features like article_count, avg_length, sentiment_mean.
+        """Aggregate per-date features: article_count, avg_length, sentiment_mean,
+        length_var and sentiment_var (sample variances).
 
         Returns a backend-specific DataFrame indexed or keyed by date (YYYY-MM-DD).
         """
         raise NotImplementedError
 
+    def compute_news_partials(self, news_df: Any) -> pd.DataFrame:
+        """Per-date partial aggregates (features.news_features.PARTIAL_COLUMNS).
+
+        Returned as a pandas DataFrame with one row per date, whatever the
+        backend: the table is small and additive, which is what the feature
+        store persists and folds appended rows into.
+        """
+        raise NotImplementedError
+
+    def from_pandas(self, pdf: pd.DataFrame) -> Any:
+        """Wrap a small pandas DataFrame (e.g. stored features) in the backend's DataFrame type."""
+        return pdf
+
+    def persist(self, df: Any) -> Any:
+        """Materialize a DataFrame read by several later steps (no-op for eager backends)."""
+        return df
+
+    def news_partials(self, news_path: str, date_range: DateRange = None) -> pd.DataFrame:
+        """Per-date partials of a news source (load_news + compute_news_partials).
+
+        Engines with a streaming mode (`chunksize` option) override this to
+        fold the partials chunk by chunk without materializing the news.
+        """
+        return self.compute_news_partials(self.load_news(news_path, columns=NEWS_FEATURE_COLUMNS, date_range=date_range))
+
+    def load_news_features(self, news_path: str, date_range: DateRange = None, dedupe: bool = False) -> Any:
+        """Load news and compute per-date features (load_news + compute_news_features).
+
+        With a feature store (`feature_store` engine option) the features are
+        read from it: an unchanged corpus needs no news reading at all and
+        appended rows are the only ones scored. `date_range` then filters the
+        stored dates. With `chunksize` the news are streamed through
+        `news_partials`. Near-duplicate removal looks at the whole corpus, so
+        `dedupe` always recomputes from the materialized news.
+        """
+        store = getattr(self, "feature_store", None)
+        if dedupe or (store is None and not getattr(self, "chunksize", None)):
+            news_df = self.load_news(news_path, columns=NEWS_FEATURE_COLUMNS, date_range=date_range)
+            if dedupe:
+                news_df = self.drop_near_duplicates(news_df)
+            return self.compute_news_features(news_df)
+
+        if store is None:
+            partials = self.news_partials(news_path, date_range)
+        else:
+            partials = store.load_partials(news_path, self.news_partials)
+        features = finalize_daily_features(partials)
+        return self.from_pandas(filter_date_range(features, "date", date_range).reset_index(drop=True))
+
     def load_colcap(self, csv_path: str) -> Any:
         """Load COLCAP time series from CSV with columns ['date','close']."""
         raise NotImplementedError
@@ -36,9 +113,54 @@ class AnalysisEngine:
         joined_df: Any,
         methods: Optional[List[str]] = None,
         rolling_windows: Optional[List[int]] = None,
+        rolling_series: bool = False,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
+    ) -> Dict[str, Any]:
+        """Compute correlations and rolling correlations of the features against 'close'.
+
+        Returns a dictionary with keys 'pearson' and 'spearman' ({feature: r}),
+        'rolling' ({str(window): {feature: r at the last date}}), 'pvalues'
+        ({method: {feature: p}}) and 'n' ({feature: complete rows}). The pandas
+        backends share the kernel in stats.correlation.
+
+        With `rolling_series`, 'rolling_series' holds the full dated rolling
+        series per window and feature in columnar form ({'date': [...],
+        'r': [...]}), reduced server-side to at most `max_points` points with
+        `downsample` ('lttb', 'minmax' or 'none').
+        """
+        raise NotImplementedError
+
+    def compute_lead_lag(self, news_features_df: Any, colcap_df: Any, max_lag: int = 10) -> Dict[str, Any]:
+        """Cross-correlate each daily feature with COLCAP close-to-close returns.
+
+        Lags run from -max_lag to max_lag trading days; lag k > 0 pairs the
+        feature on day t - k with the return on day t (news leading returns).
+        Returns {'target', 'lags', 'features': {feature: {'r', 'n', 'band',
+        'best_lag', 'best_r', 'best_band', 'significant'}}}. 'band' is the
+        per-lag 95% white-noise bound 1.96 / sqrt(n), descriptive only;
+        'significant' tests the best lag against 'best_band', the bound
+        Šidák-corrected for the 2 * max_lag + 1 lags searched (see stats.lead_lag).
+        """
+        raise NotImplementedError
+
+    def compute_significance(
+        self,
+        joined_df: Any,
+        methods: Optional[List[str]] = None,
+        n_resamples: int = 2000,
+        block_size: Optional[int] = None,
+        confidence: float = 0.95,
+        seed: int = 0,
     ) -> Dict[str, Any]:
-        """Compute correlations and rolling correlations.
+        """Resampling significance of the Pearson/Spearman correlations against 'close'.
 
-        Returns a dictionary with keys like 'pearson', 'spearman', 'rolling'.
+        Per method and feature: the observed 'r', a percentile confidence
+        interval ('ci_low', 'ci_high') from a moving-block bootstrap and a
+        block-permutation 'p_value'. Blocks of `block_size` days (default
+        n^(1/3)) keep the autocorrelation the analytic p-values ignore.
+        Resamples run in batches on the backend's workers; a fixed `seed`
+        gives the same numbers for any number of workers (see
+        stats.significance).
         """
         raise NotImplementedError
@@ -18,22 +18,39 @@ BackendName = Literal["pandas", "dask", "spark", "multiprocessing"]
 
 def get_engine(backend: BackendName = "pandas", **kwargs: Any) -> AnalysisEngine:
     if backend == "pandas":
-        return PandasEngine()
+        # kwargs: sentiment_cache, feature_store, chunksize
+        return PandasEngine(
+            sentiment_cache=kwargs.get("sentiment_cache"),
+            feature_store=kwargs.get("feature_store"),
+            chunksize=kwargs.get("chunksize"),
+        )
     if backend == "multiprocessing":
-        # kwargs: nprocs
-        return MultiprocessingEngine(nprocs=kwargs.get("nprocs"))
+        # kwargs: nprocs, sentiment_cache, feature_store, chunksize
+        return MultiprocessingEngine(
+            nprocs=kwargs.get("nprocs"),
+            sentiment_cache=kwargs.get("sentiment_cache"),
+            feature_store=kwargs.get("feature_store"),
+            chunksize=kwargs.get("chunksize"),
+        )
     if backend == "dask":
         if DaskEngine is None:
             raise ImportError("Dask is not available. Install dask[dataframe].")
-        # kwargs: npartitions, distributed, scheduler_address
+        # kwargs: npartitions, distributed, scheduler_address, sentiment_cache, feature_store
         return DaskEngine(
             npartitions=kwargs.get("npartitions"),
             distributed=kwargs.get("distributed", False),
             scheduler_address=kwargs.get("scheduler_address"),
+            sentiment_cache=kwargs.get("sentiment_cache"),
+            feature_store=kwargs.get("feature_store"),
         )
     if backend == "spark":
         if SparkEngine is None:
             raise ImportError("PySpark is not available. Install pyspark.")
-        # kwargs: master, configs
-        return SparkEngine(master=kwargs.get("master"), configs=kwargs.get("configs"))
+        # kwargs: master, configs, sentiment_cache, feature_store
+        return SparkEngine(
+            master=kwargs.get("master"),
+            configs=kwargs.get("configs"),
+            sentiment_cache=kwargs.get("sentiment_cache"),
+            feature_store=kwargs.get("feature_store"),
+        )
     raise ValueError(f"Unknown backend: {backend}")
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .news_features import FEATURES_VERSION, SCORER_VERSION, empty_partials, merge_partials
+
+# Anything that changes the stored partials must change this string
+CODE_VERSION = f"features-{FEATURES_VERSION}|{SCORER_VERSION}"
+
+_META_KEY = b"feature_store"
+_HASH_CHUNK = 1 << 20
+
+PartialsFn = Callable[[str], pd.DataFrame]
+
+
+def _hash_file(path: str, size: int, prefix_size: Optional[int] = None) -> Tuple[str, Optional[str]]:
+    """Digest of the first `size` bytes and, in the same pass, of the first `prefix_size` bytes.
+
+    Hashing stops at the size seen by os.stat, so rows appended while hashing
+    are left for the next load.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    prefix: Optional[str] = None
+    done = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(min(_HASH_CHUNK, size - done))
+            if prefix_size is not None and prefix is None and done + len(chunk) >= prefix_size:
+                cut = prefix_size - done
+                h.update(chunk[:cut])
+                prefix = h.copy().hexdigest()
+                h.update(chunk[cut:])
+            else:
+                h.update(chunk)
+            if not chunk:
+                break
+            done += len(chunk)
+    return h.hexdigest(), prefix
+
+
+def _dataset_files(root: str) -> Dict[str, list]:
+    """{relative path: [size, mtime_ns]} of the data files of a partitioned dataset."""
+    files: Dict[str, list] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith((".", "_")))
+        for name in filenames:
+            if name.startswith((".", "_")):
+                continue
+            full = os.path.join(dirpath, name)
+            st = os.stat(full)
+            files[os.path.relpath(full, root).replace(os.sep, "/")] = [st.st_size, st.st_mtime_ns]
+    return files
+
+
+class FeatureStore:
+    """Per-date partial aggregates of a news corpus, persisted as one Parquet file per source.
+
+    The file for a source (CSV, Parquet file or partitioned dataset) is named
+    after its absolute path and CODE_VERSION, and its Parquet metadata holds a
+    fingerprint of the source. `load_partials` returns the stored table when the source
+    is unchanged (size and mtime, no hashing), and when rows were only
+    appended it computes partials for the new rows alone: partials are
+    additive, so only the dates touched by the new rows change. Any other
+    change rebuilds the table. `last_status` tells which path was taken
+    ('hit', 'append' or 'rebuild').
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.last_status: Optional[str] = None
+
+    def path_for(self, source: str) -> str:
+        key = hashlib.blake2b(f"{os.path.abspath(source)}|{CODE_VERSION}".encode("utf-8"), digest_size=8)
+        return os.path.join(self.root, f"daily_{key.hexdigest()}.parquet")
+
+    def _read(self, source: str) -> Tuple[Optional[dict], Optional[pd.DataFrame]]:
+        path = self.path_for(source)
+        if not os.path.exists(path):
+            return None, None
+        try:
+            table = pq.read_table(path)
+            meta = json.loads(table.schema.metadata[_META_KEY])
+        except Exception:
+            # Unreadable or foreign file: rebuild it
+            return None, None
+        if meta.get("code_version") != CODE_VERSION:
+            return None, None
+        return meta, table.to_pandas()
+
+    def _write(self, source: str, meta: dict, partials: pd.DataFrame) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(source)
+        table = pa.Table.from_pandas(partials, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta)})
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".parquet.tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def load_partials(self, source: str, compute_partials: PartialsFn) -> pd.DataFrame:
+        """Merged per-date partials (PARTIAL_COLUMNS) for `source`, refreshed as needed.
+
+        `compute_partials(path)` computes partials for a source path of the same
+        kind; on an append it is called on a temporary CSV or dataset that
+        holds only the new rows or files.
+        """
+        meta, stored = self._read(source)
+        if os.path.isdir(source):
+            new_meta, partials = self._load_dataset(source, meta, stored, compute_partials)
+        else:
+            new_meta, partials = self._load_file(source, meta, stored, compute_partials)
+        if new_meta != meta:
+            self._write(source, new_meta, partials)
+        return partials
+
+    def _load_file(self, source, meta, stored, compute_partials) -> Tuple[dict, pd.DataFrame]:
+        st = os.stat(source)
+        base = {"code_version": CODE_VERSION, "source": os.path.abspath(source), "kind": "file"}
+        if meta is not None and meta.get("kind") == "file":
+            if st.st_size == meta["size"] and st.st_mtime_ns == meta["mtime_ns"]:
+                self.last_status = "hit"
+                return meta, stored
+            appendable = not source.endswith(".parquet") and meta.get("ends_with_newline") and st.st_size > meta["size"]
+            digest, prefix = _hash_file(source, st.st_size, meta["size"] if appendable else None)
+            if digest == meta["digest"]:
+                # Touched but identical
+                self.last_status = "hit"
+                return {**meta, "mtime_ns": st.st_mtime_ns, "size": st.st_size}, stored
+            if appendable and prefix == meta["digest"]:
+                self.last_status = "append"
+                added = self._csv_tail_partials(source, meta["size"], st.st_size, compute_partials)
+                partials = merge_partials([stored, added])
+                return self._file_meta(base, source, st, digest), partials
+        else:
+            digest, _ = _hash_file(source, st.st_size)
+        self.last_status = "rebuild"
+        partials = merge_partials(compute_partials(source))
+        new_meta = self._file_meta(base, source, st, digest)
+        if os.stat(source).st_size != st.st_size:
+            # Rows were appended while reading: the partials may cover them, so never treat them as a tail
+            new_meta.update(digest="", ends_with_newline=False)
+        return new_meta, partials
+
+    @staticmethod
+    def _file_meta(base: dict, source: str, st: os.stat_result, digest: str) -> dict:
+        with open(source, "rb") as f:
+            f.seek(max(st.st_size - 1, 0))
+            ends_with_newline = st.st_size > 0 and f.read(1) == b"\n"
+        return {**base, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest,
+                "ends_with_newline": ends_with_newline}
+
+    def _csv_tail_partials(self, source: str, offset: int, end: int, compute_partials: PartialsFn) -> pd.DataFrame:
+        os.makedirs(self.root, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(dir=self.root, prefix="append_")
+        try:
+            tail = os.path.join(tmpdir, "tail.csv")
+            with open(source, "rb") as src, open(tail, "wb") as out:
+                out.write(src.readline())  # header
+                src.seek(offset)
+                remaining = end - offset
+                while remaining > 0:
+                    chunk = src.read(min(_HASH_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    remaining -= len(chunk)
+            return compute_partials(tail)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _load_dataset(self, source, meta, stored, compute_partials) -> Tuple[dict, pd.DataFrame]:
+        files = _dataset_files(source)
+        new_meta = {"code_version": CODE_VERSION, "source": os.path.abspath(source), "kind": "dataset", "files": files}
+        if meta is not None and meta.get("kind") == "dataset":
+            old = meta["files"]
+            if files == old:
+                self.last_status = "hit"
+                return meta, stored
+            if all(files.get(rel) == state for rel, state in old.items()):
+                # Only new part files: link them into a scratch dataset with the same partition layout
+                self.last_status = "append"
+                added = [rel for rel in files if rel not in old]
+                tmpdir = tempfile.mkdtemp(dir=self.root, prefix="append_")
+                try:
+                    for rel in added:
+                        dst = os.path.join(tmpdir, *rel.split("/"))
+                        os.makedirs(os.path.dirname(dst), exist_ok=True)
+                        try:
+                            os.link(os.path.join(source, rel), dst)
+                        except OSError:
+                            shutil.copy2(os.path.join(source, rel), dst)
+                    partials = merge_partials([stored, compute_partials(tmpdir)])
+                finally:
+                    shutil.rmtree(tmpdir, ignore_errors=True)
+                return new_meta, partials
+        self.last_status = "rebuild"
+        partials = merge_partials(compute_partials(source)) if files else empty_partials()
+        return new_meta, partials
@@ -0,0 +1,127 @@
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class MinHashLSH:
+    """MinHash signatures with LSH banding for near-duplicate text detection.
+
+    Documents are shingled into k-word windows, each shingle is hashed with
+    CRC32 and `num_perm` multiply-shift hash functions give the MinHash
+    signature. The signature is split into `bands` bands; documents sharing any
+    band bucket are candidates, and candidates are grouped into clusters with
+    connected components, so no pairwise comparison is ever made.
+
+    With the defaults (128 permutations, 16 bands of 8 rows) the detection
+    threshold is around Jaccard 0.7 on 5-word shingles.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1) -> None:
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # 64-bit odd multipliers: the product wraps mod 2^64, which is what mixes the bits
+        self._a = rng.integers(0, 2**64, size=num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self._b = rng.integers(0, 2**64, size=num_perm, dtype=np.uint64, endpoint=False)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        k = self.shingle_size
+        if not words:
+            return np.empty(0, dtype=np.uint64)
+        if len(words) <= k:
+            grams = [" ".join(words)]
+        else:
+            grams = [" ".join(words[i : i + k]) for i in range(len(words) - k + 1)]
+        return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature (num_perm,) as uint64, or None for empty text."""
+        sh = self.shingles(text)
+        if sh.size == 0:
+            return None
+        # (a*h + b) mod 2^64, keep the high 32 bits (multiply-shift hashing)
+        hashed = (np.outer(sh, self._a) + self._b) >> np.uint64(32)
+        return hashed.min(axis=0)
+
+    def band_keys(self, texts: Iterable[str]) -> np.ndarray:
+        """Bucket key per (document, band) as an (n, bands) int64 array.
+
+        Empty texts get key -1 in every band and never match anything.
+        """
+        texts = list(texts)
+        keys = np.full((len(texts), self.bands), -1, dtype=np.int64)
+        for i, t in enumerate(texts):
+            sig = self.signature(t if isinstance(t, str) else "")
+            if sig is None:
+                continue
+            rows = sig.reshape(self.bands, self.rows)
+            # Polynomial combination of the band rows; uint64 overflow is intended
+            key = np.zeros(self.bands, dtype=np.uint64)
+            for r in range(self.rows):
+                key = key * np.uint64(1_000_003) + rows[:, r]
+            keys[i] = (key >> np.uint64(1)).astype(np.int64)
+        return keys
+
+
+def clusters_from_band_keys(keys: np.ndarray) -> np.ndarray:
+    """Connected components over shared band buckets.
+
+    Returns, for each document, the index of the first document of its cluster
+    (min-label propagation, fully vectorized per band).
+    """
+    n = keys.shape[0]
+    labels = np.arange(n, dtype=np.int64)
+    valid = keys[:, 0] >= 0 if n else np.zeros(0, dtype=bool)
+    idx = np.flatnonzero(valid)
+    if idx.size == 0:
+        return labels
+
+    changed = True
+    while changed:
+        changed = False
+        for b in range(keys.shape[1]):
+            _, inv = np.unique(keys[idx, b], return_inverse=True)
+            group_min = np.full(inv.max() + 1, n, dtype=np.int64)
+            np.minimum.at(group_min, inv, labels[idx])
+            new = np.minimum(labels[idx], group_min[inv])
+            if (new != labels[idx]).any():
+                labels[idx] = new
+                changed = True
+        # Pointer jumping so chains collapse to their root
+        labels = labels[labels]
+    return labels
+
+
+def near_duplicate_clusters(texts: Iterable[str], lsh: Optional[MinHashLSH] = None) -> np.ndarray:
+    """Cluster id (index of the first member) for every text."""
+    lsh = lsh or MinHashLSH()
+    return clusters_from_band_keys(lsh.band_keys(texts))
+
+
+def tag_near_duplicates(
+    news_df: pd.DataFrame,
+    text_col: str = "texto",
+    cluster_col: str = "dup_cluster",
+    lsh: Optional[MinHashLSH] = None,
+) -> pd.DataFrame:
+    """Add `cluster_col` with the positional id of each article's near-duplicate cluster."""
+    out = news_df.copy()
+    out[cluster_col] = near_duplicate_clusters(out[text_col].fillna("").astype(str).tolist(), lsh)
+    return out
+
+
+def drop_near_duplicates(
+    news_df: pd.DataFrame,
+    text_col: str = "texto",
+    lsh: Optional[MinHashLSH] = None,
+) -> pd.DataFrame:
+    """Keep only the first article of every near-duplicate cluster."""
+    labels = near_duplicate_clusters(news_df[text_col].fillna("").astype(str).tolist(), lsh)
+    return news_df[labels == np.arange(len(labels))]
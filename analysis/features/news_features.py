@@ -1,37 +1,167 @@
-from typing import Dict
+from importlib.metadata import PackageNotFoundError, version
+from typing import Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from .sentiment_cache import SentimentCache, text_key
 
-def compute_daily_features(news_df: pd.DataFrame) -> pd.DataFrame:
-    """Compute per-date features from ingested news.
 
-    Input columns: 'fecha', 'texto', 'longitud'.
-    Output columns: 'date', 'article_count', 'avg_length', 'sentiment_mean'.
+# Per-date partial aggregates (counts, sums and sums of squares): additive, so
+# chunks, workers, partitions and ingestion batches are merged by summing
+PARTIAL_COLUMNS = [
+    "date",
+    "n_articles",
+    "n",
+    "n_length",
+    "sum_length",
+    "sumsq_length",
+    "sum_sentiment",
+    "sumsq_sentiment",
+]
+FEATURE_COLUMNS = ["date", "article_count", "avg_length", "sentiment_mean", "length_var", "sentiment_var"]
+
+# Bump when the partials or the features derived from them change; stored
+# feature tables (features.feature_store) from other versions are ignored
+FEATURES_VERSION = 2
+
+_analyzer: Optional[SentimentIntensityAnalyzer] = None
+
+try:
+    # Part of the sentiment cache key: a new VADER release invalidates old scores
+    SCORER_VERSION = f"vader-{version('vaderSentiment')}-compound"
+except PackageNotFoundError:
+    SCORER_VERSION = "vader-compound"
+
+
+def get_analyzer() -> SentimentIntensityAnalyzer:
+    """Process-wide VADER analyzer, built on first use (loading the lexicon is not free)."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def score_sentiment(texts: Iterable[str], cache: Optional[SentimentCache] = None) -> np.ndarray:
+    """VADER compound score per text.
+
+    With a cache, only texts whose (text, SCORER_VERSION) hash is not stored
+    yet are scored, and their scores are written back in one batch.
+    """
+    analyzer = get_analyzer()
+    if cache is None:
+        return np.fromiter((analyzer.polarity_scores(t)["compound"] for t in texts), dtype=float)
+
+    texts = list(texts)
+    keys = [text_key(t, SCORER_VERSION) for t in texts]
+    scores = cache.get_many(keys)
+    missing = {}
+    for k, t in zip(keys, texts):
+        if k not in scores and k not in missing:
+            missing[k] = analyzer.polarity_scores(t)["compound"]
+    cache.put_many(missing.items())
+    scores.update(missing)
+    return np.fromiter((scores[k] for k in keys), dtype=float, count=len(keys))
+
+
+def empty_partials() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.Series(dtype=object),
+            "n_articles": pd.Series(dtype="int64"),
+            "n": pd.Series(dtype="int64"),
+            "n_length": pd.Series(dtype="int64"),
+            "sum_length": pd.Series(dtype=float),
+            "sumsq_length": pd.Series(dtype=float),
+            "sum_sentiment": pd.Series(dtype=float),
+            "sumsq_sentiment": pd.Series(dtype=float),
+        }
+    )
+
+
+def partial_daily_features(news_df: pd.DataFrame, cache: Optional[SentimentCache] = None) -> pd.DataFrame:
+    """Score sentiment and reduce a chunk of articles to per-date partial aggregates.
+
+    Input columns: 'fecha', 'texto', 'longitud', 'url'. Output columns are
+    PARTIAL_COLUMNS; rows for the same date coming from different chunks are
+    combined with `merge_partials`. `cache` is an optional SentimentCache.
     """
     if "fecha" not in news_df.columns:
         raise ValueError("Expected 'fecha' column in news_df")
 
-    df = news_df.copy()
-    df = df.dropna(subset=["fecha"]).copy()
-
-    # Sentiment per article (compound)
-    analyzer = SentimentIntensityAnalyzer()
-    sentiments = []
-    texts = df["texto"].fillna("").astype(str).tolist()
-    for t in texts:
-        s = analyzer.polarity_scores(t)["compound"]
-        sentiments.append(s)
-    df["sentiment"] = sentiments
-
-    # Aggregate per date
-    grp = df.groupby("fecha")
-    agg = grp.agg(
-        article_count=("url", "count"),
-        avg_length=("longitud", "mean"),
-        sentiment_mean=("sentiment", "mean"),
-    ).reset_index()
-
-    agg = agg.rename(columns={"fecha": "date"})
-    return agg
+    # Select only when needed: loaders already drop undated rows
+    df = news_df[news_df["fecha"].notna()] if news_df["fecha"].hasnans else news_df
+    if df.empty:
+        return empty_partials()
+
+    longitud = pd.to_numeric(df["longitud"], errors="coerce")
+    length = np.nan_to_num(longitud.to_numpy(dtype=float))
+    texto = df["texto"]
+    if texto.hasnans:
+        texto = texto.fillna("")
+    sentiment = score_sentiment(texto.astype(str).tolist(), cache)
+    parts = pd.DataFrame(
+        {
+            "date": df["fecha"].to_numpy(),
+            "n_articles": df["url"].notna().to_numpy(dtype="int64"),
+            "n": 1,
+            "n_length": longitud.notna().to_numpy(dtype="int64"),
+            "sum_length": length,
+            "sumsq_length": length * length,
+            "sum_sentiment": sentiment,
+            "sumsq_sentiment": sentiment * sentiment,
+        }
+    )
+    return parts.groupby("date", sort=False, as_index=False).sum()
+
+
+def merge_partials(partials: pd.DataFrame | List[pd.DataFrame]) -> pd.DataFrame:
+    """Combine partial aggregates (one frame or a list of frames) into one row per date.
+
+    The merge is a per-date sum, so it is associative and commutative: any
+    grouping of chunks, workers or batches folds into the same state.
+    """
+    if isinstance(partials, list):
+        partials = pd.concat(partials, ignore_index=True) if partials else empty_partials()
+    return partials.groupby("date", sort=True, as_index=False)[PARTIAL_COLUMNS[1:]].sum()
+
+
+# Sums of squared deviations below this fraction of the sum of squares are
+# cancellation noise (e.g. identical articles) and read as zero variance
+_VAR_REL_EPS = 1e-12
+
+
+def _sample_var(count: pd.Series, total: pd.Series, sumsq: pd.Series) -> pd.Series:
+    # (sum x^2 - (sum x)^2 / n) / (n - 1); NaN below two values
+    ssd = sumsq - total * total / count
+    ssd = ssd.where(ssd > _VAR_REL_EPS * sumsq, 0.0)
+    return ssd / (count - 1).where(count > 1)
+
+
+def finalize_daily_features(partials: pd.DataFrame) -> pd.DataFrame:
+    """Turn merged partials into the per-date feature table (FEATURE_COLUMNS).
+
+    'length_var' and 'sentiment_var' are per-date sample variances (ddof=1).
+    """
+    p = merge_partials(partials)
+    return pd.DataFrame(
+        {
+            "date": p["date"],
+            "article_count": p["n_articles"],
+            "avg_length": p["sum_length"] / p["n_length"].where(p["n_length"] > 0),
+            "sentiment_mean": p["sum_sentiment"] / p["n"],
+            "length_var": _sample_var(p["n_length"], p["sum_length"], p["sumsq_length"]),
+            "sentiment_var": _sample_var(p["n"], p["sum_sentiment"], p["sumsq_sentiment"]),
+        }
+    )
+
+
+def compute_daily_features(news_df: pd.DataFrame, cache: Optional[SentimentCache] = None) -> pd.DataFrame:
+    """Compute per-date features from ingested news.
+
+    Input columns: 'fecha', 'texto', 'longitud'.
+    Output columns: 'date', 'article_count', 'avg_length', 'sentiment_mean',
+    'length_var', 'sentiment_var'.
+    """
+    return finalize_daily_features(partial_daily_features(news_df, cache))
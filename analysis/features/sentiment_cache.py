@@ -0,0 +1,104 @@
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# SQLite host-parameter limit is 999 on older builds
+_CHUNK = 900
+
+
+def text_key(text: str, scorer_version: str) -> int:
+    """64-bit signed hash of (scorer version, text)."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(scorer_version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8", errors="surrogatepass"))
+    return int.from_bytes(h.digest(), "big", signed=True)
+
+
+class SentimentCache:
+    """Persistent sentiment scores keyed by a hash of the text and scorer version.
+
+    Backed by one SQLite file in WAL mode, so several processes (Pool workers,
+    Dask workers on the same host, the API) can read and write it at once;
+    each process opens its own connection, including after being unpickled.
+    The table is bounded to `max_entries` rows: when it grows past the bound,
+    the least recently used scores are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int = 2_000_000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path, "max_entries": self.max_entries}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"], state["max_entries"])
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # A connection must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                " h INTEGER PRIMARY KEY, score REAL NOT NULL, last_used REAL NOT NULL) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, keys: Iterable[int]) -> Dict[int, float]:
+        """Scores for the keys that are cached; their recency is refreshed."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[int, float] = {}
+        now = time.time()
+        conn = self.conn
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i : i + _CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT h, score FROM scores WHERE h IN ({marks})", chunk).fetchall()
+            found.update(rows)
+            if rows:
+                conn.execute(
+                    f"UPDATE scores SET last_used = ? WHERE h IN ({','.join('?' * len(rows))})",
+                    [now] + [h for h, _ in rows],
+                )
+        return found
+
+    def put_many(self, items: Iterable[Tuple[int, float]]) -> None:
+        """Insert or refresh scores, then evict the oldest rows past `max_entries`."""
+        now = time.time()
+        rows: List[Tuple[int, float, float]] = [(h, float(s), now) for h, s in items]
+        if not rows:
+            return
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO scores (h, score, last_used) VALUES (?, ?, ?)", rows)
+            excess = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM scores WHERE h IN (SELECT h FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,66 @@
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from ..utils.date import _parse, normalize_dates, to_date
+
+
+def _to_date_uncached(value) -> str | None:
+    # Per-row reference: same parsing rules without the memo
+    if not isinstance(value, str) or not value:
+        return None
+    return _parse.__wrapped__(value)
+
+
+def synthetic_dates(rows: int, distinct: int, seed: int = 0) -> pd.Series:
+    """`rows` date strings drawn from `distinct` days, mixing the three supported formats."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2015-01-01", periods=distinct, freq="D")
+    months = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+              "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+    pool = (
+        [d.strftime("%Y-%m-%d") for d in days]
+        + [d.strftime("%d/%m/%Y") for d in days]
+        + [f"{d.day} de {months[d.month - 1]} de {d.year}" for d in days]
+    )
+    return pd.Series(np.asarray(pool, dtype=object)[rng.integers(0, len(pool), size=rows)])
+
+
+def bench(name: str, fn: Callable[[pd.Series], pd.Series], values: pd.Series, repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        _parse.cache_clear()
+        t0 = time.perf_counter()
+        fn(values)
+        best = min(best, time.perf_counter() - t0)
+    return {"name": name, "best_sec": best, "rows_per_sec": len(values) / best if best > 0 else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de normalización de fechas")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=3000, help="Días distintos en la muestra")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    values = synthetic_dates(args.rows, args.distinct)
+    print(f"📅 {len(values)} filas, {values.nunique()} cadenas distintas\n")
+
+    results = [
+        bench("apply (sin memo)", lambda s: s.apply(_to_date_uncached), values, args.repeat),
+        bench("apply(to_date)", lambda s: s.apply(to_date), values, args.repeat),
+        bench("normalize_dates", normalize_dates, values, args.repeat),
+    ]
+    assert normalize_dates(values).tolist() == values.apply(_to_date_uncached).tolist()
+
+    base = results[0]["best_sec"]
+    for r in results:
+        print(f"⚙️ {r['name']:>16}: {r['best_sec']:.3f}s ({r['rows_per_sec'] / 1e6:.2f} M filas/s, "
+              f"{base / r['best_sec']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
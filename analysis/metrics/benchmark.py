@@ -1,46 +1,99 @@
 import argparse
 import json
 import os
-import time
+import threading
 from typing import List
 
 import psutil
 
 from ..engine.factory import get_engine
-
-
-def run_benchmark(backend: str, news_csv: str, colcap_csv: str, rolling: List[int]):
-    engine = get_engine(backend)  # type: ignore
-    t0 = time.perf_counter()
+from ..pipeline import AnalysisPipeline
+
+
+class PeakRSS:
+    """Highest RSS of this process plus its children (Pool workers), sampled in a background thread.
+
+    Sampling can miss a spike shorter than `interval`; the end of the
+    context always counts as a sample. Pages a forked worker still shares
+    with the parent are counted in both, so with a Pool this is an upper bound.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.peak = 0
+        self._proc = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self) -> int:
+        rss = self._proc.memory_info().rss
+        for child in self._proc.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass  # Worker exited between listing and reading
+        self.peak = max(self.peak, rss)
+        return rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> "PeakRSS":
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def run_benchmark(
+    backend: str,
+    news_csv: str,
+    colcap_csv: str,
+    rolling: List[int],
+    feature_store: str | None = None,
+    chunksize: int | None = None,
+):
+    engine = get_engine(backend, feature_store=feature_store, chunksize=chunksize)  # type: ignore
+    # Unfused stages keep loading and features apart; with the store or streaming they are one step
+    pipeline = AnalysisPipeline(
+        engine,
+        news_csv,
+        colcap_csv,
+        methods=["pearson", "spearman"],
+        rolling_windows=rolling,
+        fuse=bool(feature_store or chunksize),
+    )
     rss0 = psutil.Process().memory_info().rss
-
-    news_df = engine.load_news(news_csv)
-    t1 = time.perf_counter()
-    news_feat = engine.compute_news_features(news_df)
-    t2 = time.perf_counter()
-    colcap_df = engine.load_colcap(colcap_csv)
-    t3 = time.perf_counter()
-    joined = engine.align_series(news_feat, colcap_df)
-    t4 = time.perf_counter()
-    results = engine.compute_correlations(joined, methods=["pearson", "spearman"], rolling_windows=rolling)
-    t5 = time.perf_counter()
-
+    with PeakRSS() as peak:
+        results = pipeline.run()
     rss1 = psutil.Process().memory_info().rss
 
+    t = pipeline.timings
+    fused = "load_news" not in t
     metrics = {
         "backend": backend,
+        "feature_store": engine.feature_store.last_status if feature_store else None,
+        "chunksize": chunksize,
         "timings_sec": {
-            "load_news": round(t1 - t0, 4),
-            "features": round(t2 - t1, 4),
-            "load_colcap": round(t3 - t2, 4),
-            "align": round(t4 - t3, 4),
-            "correlate": round(t5 - t4, 4),
-            "total": round(t5 - t0, 4),
+            "load_news": round(t["news_features"] if fused else t["load_news"], 4),
+            "features": 0.0 if fused else round(t["news_features"], 4),
+            "load_colcap": round(t["load_colcap"], 4),
+            "align": round(t["align"], 4),
+            "correlate": round(t["correlate"], 4),
+            "total": round(t["total"], 4),
         },
         "memory_bytes": {
             "rss_start": rss0,
             "rss_end": rss1,
             "delta": rss1 - rss0,
+            # Process tree, so multiprocessing workers are included
+            "rss_peak": peak.peak,
+            "peak_delta": peak.peak - rss0,
         },
         "results": results,
     }
@@ -64,6 +117,8 @@ def main():
     parser.add_argument("--colcap-csv", type=str, required=True)
     parser.add_argument("--rolling", type=int, nargs="*", default=[7, 14, 30])
     parser.add_argument("--out", type=str, default=os.path.join(os.getcwd(), "benchmark_results.json"))
+    parser.add_argument("--feature-store", type=str, default=None, help="Directorio del almacén de features diarias")
+    parser.add_argument("--chunksize", type=int, default=None, help="Filas por bloque en modo streaming (pandas/multiprocessing)")
 
     # Parallelization flags
     parser.add_argument("--mp-procs", type=int, default=None)
@@ -86,7 +141,7 @@ def main():
             "dask_scheduler": args.dask_scheduler,
             "spark_master": args.spark_master,
         }
-        m = run_benchmark(backend, args.news_csv, args.colcap_csv, args.rolling)
+        m = run_benchmark(backend, args.news_csv, args.colcap_csv, args.rolling, args.feature_store, args.chunksize)
         m["engine_config"] = engine_cfg
         all_metrics.append(m)
 
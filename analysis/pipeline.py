@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .data_sources.colcap_loader import prepare_colcap
+from .data_sources.news_loader import DateRange, prepare_news
+from .engine.base import NEWS_FEATURE_COLUMNS, AnalysisEngine
+
+Source = str | pd.DataFrame
+
+
+def source_fingerprint(source: Source) -> str:
+    """Cheap identity of an input: path, size and mtime for files (and dataset part files),
+    a content hash for in-memory frames."""
+    if isinstance(source, pd.DataFrame):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(",".join(map(str, source.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(source, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+    path = os.path.abspath(source)
+    if os.path.isdir(path):
+        entries = []
+        for dirpath, _, filenames in os.walk(path):
+            for name in filenames:
+                st = os.stat(os.path.join(dirpath, name))
+                entries.append((os.path.relpath(os.path.join(dirpath, name), path), st.st_size, st.st_mtime_ns))
+        return json.dumps([path, sorted(entries)])
+    st = os.stat(path)
+    return json.dumps([path, st.st_size, st.st_mtime_ns])
+
+
+class StageCache:
+    """In-memory LRU of stage outputs keyed by stage fingerprint.
+
+    Share one instance between pipelines (e.g. module-level in the service) to
+    reuse outputs across runs; outputs are backend objects, so they are only
+    valid inside the process that produced them. Access is guarded by a lock,
+    since the service runs requests on a thread pool.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._items:
+                return False, None
+            self._items.move_to_end(key)
+            return True, self._items[key]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class Stage:
+    """One node of the pipeline DAG: `fn(*dep_outputs)` with the given parameters.
+
+    `params` only feed the fingerprint; they are already bound into `fn`.
+    `persist` marks outputs read by several stages, which lazy backends
+    materialize once (AnalysisEngine.persist). `cache=False` keeps the output
+    out of the StageCache; used for raw article frames, which are as large as
+    the corpus, while the daily stages after them are small.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deps: Sequence[str],
+        fn: Callable[..., Any],
+        params: Optional[Dict[str, Any]] = None,
+        persist: bool = False,
+        cache: bool = True,
+    ) -> None:
+        self.name = name
+        self.deps = tuple(deps)
+        self.fn = fn
+        self.params = params or {}
+        self.persist = persist
+        self.cache = cache
+
+
+class AnalysisPipeline:
+    """News vs COLCAP analysis as a small DAG of engine stages.
+
+    Stages: news features (load + features, fused into
+    `engine.load_news_features` unless `fuse=False`), colcap, joined,
+    correlations and, when requested, significance and lead_lag. `run`
+    evaluates only what the requested outputs need; each stage is keyed by a
+    fingerprint of its parameters and its inputs (file size/mtime or frame
+    hash, then the keys of its dependencies) and skipped when `cache` already
+    holds it (raw article frames are never cached). Per-stage wall times and cache status end up in `timings` and
+    `status`.
+    """
+
+    def __init__(
+        self,
+        engine: AnalysisEngine,
+        news: Source,
+        colcap: Source,
+        date_range: DateRange = None,
+        dedupe: bool = False,
+        methods: Optional[List[str]] = None,
+        rolling_windows: Optional[List[int]] = None,
+        rolling_series: bool = False,
+        max_points: Optional[int] = None,
+        downsample: str = "lttb",
+        max_lag: Optional[int] = None,
+        significance: Optional[Dict[str, Any]] = None,
+        fuse: bool = True,
+        cache: Optional[StageCache] = None,
+    ) -> None:
+        self.engine = engine
+        self.cache = cache if cache is not None else StageCache()
+        self.timings: Dict[str, float] = {}
+        self.status: Dict[str, str] = {}
+        self.stages: Dict[str, Stage] = {}
+        self._keys: Dict[str, str] = {}
+
+        methods = methods or ["pearson", "spearman"]
+        rolling_windows = rolling_windows or [7, 14, 30]
+        news_fp, colcap_fp = source_fingerprint(news), source_fingerprint(colcap)
+
+        if isinstance(news, pd.DataFrame):
+            frame = news
+            self._add("load_news", [], lambda: engine.from_pandas(prepare_news(frame, NEWS_FEATURE_COLUMNS, date_range)),
+                      {"source": news_fp, "date_range": date_range}, cache=False)
+            self._add_features(dedupe)
+        elif fuse:
+            self._add("news_features", [], lambda: engine.load_news_features(news, date_range, dedupe),
+                      {"source": news_fp, "date_range": date_range, "dedupe": dedupe}, persist=True)
+        else:
+            self._add("load_news", [], lambda: engine.load_news(news, NEWS_FEATURE_COLUMNS, date_range),
+                      {"source": news_fp, "date_range": date_range}, cache=False)
+            self._add_features(dedupe)
+
+        if isinstance(colcap, pd.DataFrame):
+            col_frame = colcap
+            self._add("load_colcap", [], lambda: engine.from_pandas(prepare_colcap(col_frame)),
+                      {"source": colcap_fp}, persist=True)
+        else:
+            self._add("load_colcap", [], lambda: engine.load_colcap(colcap), {"source": colcap_fp}, persist=True)
+
+        self._add("align", ["news_features", "load_colcap"], engine.align_series, persist=True)
+        self._add(
+            "correlate",
+            ["align"],
+            lambda joined: engine.compute_correlations(
+                joined, methods, rolling_windows, rolling_series, max_points, downsample
+            ),
+            {"methods": methods, "rolling": rolling_windows, "series": rolling_series,
+             "max_points": max_points, "downsample": downsample},
+        )
+        self.outputs = ["correlate"]
+        if significance is not None:
+            opts = dict(significance)
+            self._add("significance", ["align"],
+                      lambda joined: engine.compute_significance(joined, methods, **opts), {"methods": methods, **opts})
+            self.outputs.append("significance")
+        if max_lag is not None:
+            self._add("lead_lag", ["news_features", "load_colcap"],
+                      lambda feats, col: engine.compute_lead_lag(feats, col, max_lag), {"max_lag": max_lag})
+            self.outputs.append("lead_lag")
+
+    def _add_features(self, dedupe: bool) -> None:
+        engine = self.engine
+
+        def features(news_df: Any) -> Any:
+            if dedupe:
+                news_df = engine.drop_near_duplicates(news_df)
+            return engine.compute_news_features(news_df)
+
+        self._add("news_features", ["load_news"], features, {"dedupe": dedupe}, persist=True)
+
+    def _add(self, name: str, deps: Sequence[str], fn: Callable[..., Any], params: Optional[Dict[str, Any]] = None,
+             persist: bool = False, cache: bool = True) -> None:
+        self.stages[name] = Stage(name, deps, fn, params, persist, cache)
+
+    def key(self, name: str) -> str:
+        """Fingerprint of a stage: engine type, stage parameters and dependency keys."""
+        if name not in self._keys:
+            stage = self.stages[name]
+            payload = json.dumps(
+                [type(self.engine).__name__, name, stage.params, [self.key(d) for d in stage.deps]],
+                sort_keys=True,
+                default=str,
+            )
+            self._keys[name] = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+        return self._keys[name]
+
+    def output(self, name: str) -> Any:
+        """Value of a stage, computing (and caching) its missing dependencies first."""
+        key = self.key(name)
+        stage = self.stages[name]
+        if stage.cache:
+            hit, value = self.cache.get(key)
+            if hit:
+                self.status.setdefault(name, "cached")
+                return value
+        inputs = [self.output(d) for d in stage.deps]
+        t0 = time.perf_counter()
+        value = stage.fn(*inputs)
+        if stage.persist:
+            value = self.engine.persist(value)
+        self.timings[name] = time.perf_counter() - t0
+        self.status[name] = "run"
+        if stage.cache:
+            self.cache.put(key, value)
+        return value
+
+    def run(self) -> Dict[str, Any]:
+        """Results dict: the correlations, plus 'significance' / 'lead_lag' when configured."""
+        t0 = time.perf_counter()
+        results = dict(self.output("correlate"))
+        for name in self.outputs[1:]:
+            results[name] = self.output(name)
+        self.timings["total"] = time.perf_counter() - t0
+        return results
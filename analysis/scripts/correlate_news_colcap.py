@@ -4,6 +4,8 @@ import os
 from typing import List
 
 from ..engine.factory import get_engine
+from ..pipeline import AnalysisPipeline
+from ..stats.downsample import DOWNSAMPLE_METHODS
 
 
 def main():
@@ -25,8 +27,33 @@ def main():
         "--news-csv",
         type=str,
         default=os.path.join(os.path.dirname(__file__), "..", "..", "data", "output.csv"),
-        help="Ruta al CSV de noticias (salida de ingestion)",
+        help="Ruta al CSV de noticias o al dataset Parquet particionado (salida de ingestion)",
     )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Descartar noticias casi duplicadas (MinHash/LSH sobre el texto) antes de calcular features",
+    )
+    parser.add_argument(
+        "--sentiment-cache",
+        type=str,
+        default=None,
+        help="Archivo SQLite con puntajes de sentimiento ya calculados (solo se puntúan textos nuevos)",
+    )
+    parser.add_argument(
+        "--feature-store",
+        type=str,
+        default=None,
+        help="Directorio del almacén Parquet de features diarias (se reutilizan si las noticias no cambiaron)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Procesar las noticias por bloques de N filas (pandas/multiprocessing) con memoria acotada",
+    )
+    parser.add_argument("--date-from", type=str, default=None, help="Fecha inicial YYYY-MM-DD (inclusive)")
+    parser.add_argument("--date-to", type=str, default=None, help="Fecha final YYYY-MM-DD (inclusive)")
     parser.add_argument(
         "--colcap-csv",
         type=str,
@@ -40,6 +67,34 @@ def main():
         default=[7, 14, 30],
         help="Ventanas para correlación rodante",
     )
+    parser.add_argument(
+        "--rolling-series",
+        action="store_true",
+        help="Incluir la serie rodante completa (fecha, r) por ventana y feature, no solo el último valor",
+    )
+    parser.add_argument("--max-points", type=int, default=500, help="Máximo de puntos por serie rodante (0 = todos)")
+    parser.add_argument(
+        "--downsample",
+        type=str,
+        default="lttb",
+        choices=DOWNSAMPLE_METHODS,
+        help="Reducción de puntos de la serie rodante: LTTB, mín/máx por bloque o ninguna",
+    )
+    parser.add_argument(
+        "--lead-lag",
+        action="store_true",
+        help="Añadir correlación cruzada adelanto/rezago de cada feature contra los retornos de COLCAP",
+    )
+    parser.add_argument("--max-lag", type=int, default=10, help="Rezago máximo (días hábiles) para --lead-lag")
+    parser.add_argument(
+        "--significance",
+        action="store_true",
+        help="Añadir intervalos de confianza (bootstrap por bloques) y p-valores por permutación de bloques",
+    )
+    parser.add_argument("--n-resamples", type=int, default=2000, help="Remuestreos por prueba para --significance")
+    parser.add_argument("--block-size", type=int, default=None, help="Largo de bloque en días (por defecto n^(1/3))")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Nivel de confianza de los intervalos")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los remuestreos (resultados reproducibles)")
     parser.add_argument(
         "--out",
         type=str,
@@ -56,15 +111,38 @@ def main():
         distributed=args.dask_distributed,
         scheduler_address=args.dask_scheduler,
         master=args.spark_master,
+        sentiment_cache=args.sentiment_cache,
+        feature_store=args.feature_store,
+        chunksize=args.chunksize,
     )  # type: ignore
 
-    # Load data
-    news_df = engine.load_news(args.news_csv)
-    news_feat = engine.compute_news_features(news_df)
-    colcap_df = engine.load_colcap(args.colcap_csv)
-    joined = engine.align_series(news_feat, colcap_df)
-
-    results = engine.compute_correlations(joined, methods=["pearson", "spearman"], rolling_windows=args.rolling)
+    date_range = (args.date_from, args.date_to) if (args.date_from or args.date_to) else None
+    significance = None
+    if args.significance:
+        significance = {
+            "n_resamples": args.n_resamples,
+            "block_size": args.block_size,
+            "confidence": args.confidence,
+            "seed": args.seed,
+        }
+    pipeline = AnalysisPipeline(
+        engine,
+        args.news_csv,
+        args.colcap_csv,
+        date_range=date_range,
+        dedupe=args.dedupe,
+        methods=["pearson", "spearman"],
+        rolling_windows=args.rolling,
+        rolling_series=args.rolling_series,
+        max_points=args.max_points or None,
+        downsample=args.downsample,
+        max_lag=args.max_lag if args.lead_lag else None,
+        significance=significance,
+    )
+    results = pipeline.run()
+    if engine.feature_store is not None and not args.dedupe:
+        print(f"🗃️ Feature store: {engine.feature_store.last_status}")
+    print("⏱️ Etapas: " + ", ".join(f"{name} {secs:.2f}s" for name, secs in pipeline.timings.items()))
 
     with open(args.out, "w", encoding="utf-8") as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
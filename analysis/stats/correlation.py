@@ -0,0 +1,188 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .downsample import encode_rolling_series
+
+
+# Per-date features correlated against the target, in report order
+FEATURES = ["article_count", "avg_length", "sentiment_mean", "length_var", "sentiment_var"]
+
+# Variances below this fraction of the summed squares are treated as zero
+# (constant windows give NaN instead of amplified rounding noise)
+_REL_EPS = 1e-10
+
+
+def _complete_mask(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    return ~np.isnan(X) & ~np.isnan(y)[:, None]
+
+
+def _masked_mean(a: np.ndarray, mask: np.ndarray, axis: Optional[int] = None) -> np.ndarray:
+    """Mean of `a` over the entries where `mask`; 0 where there are none.
+
+    Used to center data, so empty columns (e.g. all-NaN features) just need
+    a finite value; unlike np.nanmean this raises no empty-slice warning.
+    """
+    cnt = np.asarray(mask.sum(axis=axis), dtype=float)
+    total = np.asarray(np.where(mask, a, 0.0).sum(axis=axis), dtype=float)
+    return np.divide(total, cnt, out=np.zeros_like(total), where=cnt > 0)
+
+
+def _masked_pearson(X: np.ndarray, Y: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Column-wise Pearson r of X[:, j] vs Y[:, j] over the rows where mask[:, j]."""
+    n = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.where(mask, X, 0.0).sum(axis=0) / n
+        my = np.where(mask, Y, 0.0).sum(axis=0) / n
+        dx = np.where(mask, X - mx, 0.0)
+        dy = np.where(mask, Y - my, 0.0)
+        sxx = np.einsum("ij,ij->j", dx, dx)
+        syy = np.einsum("ij,ij->j", dy, dy)
+        sxy = np.einsum("ij,ij->j", dx, dy)
+        r = sxy / np.sqrt(sxx * syy)
+    r[(n < 2) | (sxx == 0) | (syy == 0)] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+def pvalues(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Two-sided p-values for H0: rho = 0, from the t distribution with n - 2 dof.
+
+    Exact for Pearson under normality and the usual large-sample
+    approximation for Spearman (same as scipy's pearsonr / spearmanr).
+    """
+    r = np.asarray(r, dtype=float)
+    dof = np.asarray(n, dtype=float) - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    p = np.where(np.abs(r) == 1.0, 0.0, p)
+    return np.where((dof > 0) & ~np.isnan(r), p, np.nan)
+
+
+def pearson_matrix(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pearson r of every column of X against y, with pairwise-complete rows.
+
+    Returns (r, n) with one entry per column; n counts the rows used.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = _complete_mask(X, y)
+    return _masked_pearson(X, np.broadcast_to(y[:, None], X.shape), mask)
+
+
+def spearman_matrix(X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Spearman rho of every column of X against y (average ranks, NaN pairs omitted).
+
+    Without missing values all columns and the target are ranked once; a
+    column with gaps is re-ranked, with its own copy of y, on its complete rows.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = _complete_mask(X, y)
+    RX = np.full(X.shape, np.nan)
+    RY = np.full(X.shape, np.nan)
+    full = mask.all(axis=0)
+    if full.any():
+        RX[:, full] = stats.rankdata(X[:, full], axis=0)
+        RY[:, full] = stats.rankdata(y)[:, None]
+    for j in np.flatnonzero(~full):
+        rows = mask[:, j]
+        RX[rows, j] = stats.rankdata(X[rows, j])
+        RY[rows, j] = stats.rankdata(y[rows])
+    return _masked_pearson(RX, RY, mask)
+
+
+def rolling_pearson(X: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """Trailing-window Pearson r of every column of X against y, for all rows.
+
+    Computed from cumulative sums in O(n) per column. Like pandas
+    `rolling(window).corr`, row t is NaN unless the `window` rows ending at t
+    are all complete, and windows where either side is constant are NaN.
+    Returns an array shaped like X.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n, k = X.shape
+    out = np.full((n, k), np.nan)
+    if window < 2 or n < window:
+        return out
+
+    mask = _complete_mask(X, y)
+    # Centering first keeps the prefix sums small, so window differences stay accurate
+    with np.errstate(invalid="ignore"):
+        dx = np.where(mask, X - _masked_mean(X, mask, axis=0), 0.0)
+        dy = np.where(mask, (y - _masked_mean(y, ~np.isnan(y)))[:, None], 0.0)
+
+    def window_sums(a: np.ndarray) -> np.ndarray:
+        c = np.concatenate([np.zeros((1, k)), np.cumsum(a, axis=0)])
+        return c[window:] - c[:-window]
+
+    cnt = window_sums(mask.astype(float))
+    sx, sy = window_sums(dx), window_sums(dy)
+    sxx, syy, sxy = window_sums(dx * dx), window_sums(dy * dy), window_sums(dx * dy)
+
+    vx = sxx - sx * sx / window
+    vy = syy - sy * sy / window
+    cov = sxy - sx * sy / window
+    ok = (cnt == window) & (vx > _REL_EPS * sxx) & (vy > _REL_EPS * syy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.where(ok, cov / np.sqrt(vx * vy), np.nan)
+    out[window - 1 :] = np.clip(r, -1.0, 1.0)
+    return out
+
+
+def _as_dict(cols: List[str], values: np.ndarray, cast=float) -> Dict[str, Any]:
+    return {c: cast(v) for c, v in zip(cols, values)}
+
+
+def correlation_report(
+    joined_df: pd.DataFrame,
+    methods: Optional[List[str]] = None,
+    rolling_windows: Optional[List[int]] = None,
+    target: str = "close",
+    rolling_series: bool = False,
+    max_points: Optional[int] = None,
+    downsample: str = "lttb",
+) -> Dict[str, Any]:
+    """Correlations of the daily features against `target` for a joined table.
+
+    `joined_df` must be sorted by date. Returns 'pearson' and 'spearman'
+    ({feature: r}, for the requested methods), 'rolling' ({str(window):
+    {feature: last r}}), 'pvalues' ({method: {feature: p}}) and 'n'
+    ({feature: rows used}). With `rolling_series`, 'rolling_series' also
+    holds every dated rolling value, downsampled to `max_points` per series
+    (see stats.downsample.encode_rolling_series).
+    """
+    methods = methods or ["pearson", "spearman"]
+    rolling_windows = rolling_windows or [7, 14, 30]
+
+    feature_cols = [c for c in FEATURES if c in joined_df.columns]
+    X = joined_df[feature_cols].to_numpy(dtype=float)
+    y = joined_df[target].to_numpy(dtype=float)
+
+    kernels = {"pearson": pearson_matrix, "spearman": spearman_matrix}
+    results: Dict[str, Any] = {}
+    pvals: Dict[str, Dict[str, float]] = {}
+    counts = np.zeros(len(feature_cols), dtype=int)
+    for m in methods:
+        if m not in kernels:
+            continue
+        r, counts = kernels[m](X, y)
+        results[m] = _as_dict(feature_cols, r)
+        pvals[m] = _as_dict(feature_cols, pvalues(r, counts))
+
+    rolling: Dict[str, Dict[str, float]] = {}
+    series: Dict[int, np.ndarray] = {}
+    for win in rolling_windows:
+        series[win] = rolling_pearson(X, y, win)
+        last = series[win][-1] if len(X) else np.full(len(feature_cols), np.nan)
+        rolling[str(win)] = _as_dict(feature_cols, last)
+    results["rolling"] = rolling
+    if rolling_series:
+        dates = joined_df["date"].to_numpy()
+        results["rolling_series"] = encode_rolling_series(dates, series, feature_cols, max_points, downsample)
+    results["pvalues"] = pvals
+    results["n"] = _as_dict(feature_cols, counts if pvals else _complete_mask(X, y).sum(axis=0), int)
+    return results
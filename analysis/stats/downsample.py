@@ -0,0 +1,84 @@
+from typing import Dict, List
+
+import numpy as np
+
+
+DOWNSAMPLE_METHODS = ["lttb", "minmax", "none"]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the visual shape.
+
+    The first and last points are always kept; every interior bucket keeps
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n) if n_out >= n else np.linspace(0, n - 1, max(n_out, 0)).astype(int)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            cx, cy = x[hi : edges[i + 2]].mean(), y[hi : edges[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of `n_out // 2` equal buckets, in order."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = max(n_out // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    picks: List[int] = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            seg = y[lo:hi]
+            picks.extend(sorted({lo + int(np.argmin(seg)), lo + int(np.argmax(seg))}))
+    return np.asarray(picks, dtype=int)
+
+
+def downsample_series(dates: np.ndarray, values: np.ndarray, max_points: int | None, method: str = "lttb") -> Dict[str, list]:
+    """Columnar {'date': [...], 'r': [...]} for one series, NaN points dropped.
+
+    With `max_points` set and `method` other than 'none', at most that many
+    points are returned, chosen by LTTB or per-bucket min/max.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsample method '{method}', expected one of {DOWNSAMPLE_METHODS}")
+    values = np.asarray(values, dtype=float)
+    keep = np.flatnonzero(~np.isnan(values))
+    if max_points and method != "none" and len(keep) > max_points:
+        if method == "lttb":
+            keep = keep[lttb(keep.astype(float), values[keep], max_points)]
+        else:
+            keep = keep[minmax(values[keep], max_points)]
+    return {"date": [str(d) for d in np.asarray(dates)[keep]], "r": [float(v) for v in values[keep]]}
+
+
+def encode_rolling_series(
+    dates: np.ndarray,
+    series: Dict[int, np.ndarray],
+    feature_cols: List[str],
+    max_points: int | None = None,
+    method: str = "lttb",
+) -> Dict[str, object]:
+    """'rolling_series' result: {'method', 'max_points', 'windows': {str(win): {feature: {'date', 'r'}}}}.
+
+    `series` maps each window to its rolling r, shaped (dates, features).
+    """
+    windows = {
+        str(win): {f: downsample_series(dates, r[:, j], max_points, method) for j, f in enumerate(feature_cols)}
+        for win, r in series.items()
+    }
+    return {"method": method, "max_points": max_points, "windows": windows}
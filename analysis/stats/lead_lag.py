@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import fft, stats
+
+from .correlation import FEATURES, _masked_mean
+
+
+# Two-sided 95% normal quantile for the white-noise band 1.96 / sqrt(n)
+Z_95 = 1.959963984540054
+
+# Family-wise level of the best-lag test
+ALPHA = 0.05
+
+
+def sidak_z(n_tests: int, alpha: float = ALPHA) -> float:
+    """Two-sided normal quantile for the largest |r| of `n_tests` lags at family-wise level `alpha`.
+
+    Šidák correction: each lag is tested at 1 - (1 - alpha)^(1 / n_tests),
+    so picking the best of several lags on white noise is flagged with
+    probability alpha instead of about 1 - 0.95^n_tests.
+    """
+    per_test = 1.0 - (1.0 - alpha) ** (1.0 / max(n_tests, 1))
+    return float(stats.norm.isf(per_test / 2))
+
+
+def _lagged_products(a: np.ndarray, b: np.ndarray, max_lag: int, nfft: int) -> np.ndarray:
+    """sum_t a[t - k] * b[t] for k in -max_lag..max_lag, per column, via one FFT product."""
+    c = fft.irfft(np.conj(fft.rfft(a, nfft, axis=0)) * fft.rfft(b, nfft, axis=0), nfft, axis=0)
+    # Lag k sits at index k; negative lags wrap around to the end
+    return np.concatenate([c[nfft - max_lag :], c[: max_lag + 1]])
+
+
+def cross_correlation(X: np.ndarray, y: np.ndarray, max_lag: int) -> Dict[str, np.ndarray]:
+    """Pearson r of X[t - k, j] against y[t] for every column j and lag k in -max_lag..max_lag.
+
+    Positive k means the feature leads y by k rows. Each (lag, column) pair
+    uses only the rows where both values are present, exactly as correlating
+    a shifted copy with NaN pairs dropped, but all lags and columns come from
+    a handful of batched FFTs (O(n log n)) instead of shifting frames.
+    Returns 'lags' (2*max_lag + 1), and 'r' / 'n' shaped (lags, columns).
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)[:, None]
+    n, k = X.shape
+    lags = np.arange(-max_lag, max_lag + 1)
+    if n == 0 or k == 0:
+        return {"lags": lags, "r": np.full((len(lags), k), np.nan), "n": np.zeros((len(lags), k), dtype=int)}
+
+    mx, my = ~np.isnan(X), ~np.isnan(y)
+    with np.errstate(invalid="ignore"):
+        # Centering keeps the lagged sums well conditioned
+        x = np.where(mx, X - _masked_mean(X, mx, axis=0), 0.0)
+        yc = np.where(my, y - _masked_mean(y, my), 0.0)
+    mx, my = mx.astype(float), my.astype(float)
+
+    nfft = fft.next_fast_len(n + max_lag)
+    cnt = np.rint(_lagged_products(mx, my, max_lag, nfft))
+    sx = _lagged_products(x, my, max_lag, nfft)
+    sy = _lagged_products(mx, yc, max_lag, nfft)
+    sxx = _lagged_products(x * x, my, max_lag, nfft)
+    syy = _lagged_products(mx, yc * yc, max_lag, nfft)
+    sxy = _lagged_products(x, yc, max_lag, nfft)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vx = sxx - sx * sx / cnt
+        vy = syy - sy * sy / cnt
+        r = (sxy - sx * sy / cnt) / np.sqrt(vx * vy)
+    # Rounding can leave a tiny positive variance on constant overlaps
+    r[(cnt < 3) | (vx <= 1e-10 * sxx) | (vy <= 1e-10 * syy)] = np.nan
+    return {"lags": lags, "r": np.clip(r, -1.0, 1.0), "n": cnt.astype(int)}
+
+
+def returns_frame(news_features_df: pd.DataFrame, colcap_df: pd.DataFrame) -> pd.DataFrame:
+    """Close-to-close returns per trading day with that day's features (NaN on days without news).
+
+    Returns are taken on the full COLCAP calendar before joining, so a day
+    without news does not stretch the next return over two sessions.
+    """
+    col = colcap_df[["date", "close"]].sort_values("date").reset_index(drop=True)
+    col["returns"] = col["close"].astype(float).pct_change()
+    cols = ["date"] + [c for c in FEATURES if c in news_features_df.columns]
+    return col.merge(news_features_df[cols], on="date", how="left")
+
+
+def lead_lag_report(
+    news_features_df: pd.DataFrame,
+    colcap_df: pd.DataFrame,
+    max_lag: int = 10,
+    target: str = "returns",
+) -> Dict[str, Any]:
+    """Lead-lag cross-correlations of the daily features against COLCAP returns.
+
+    Lags are in trading days; lag k > 0 correlates the feature on day t - k
+    with the return on day t (news leading the market). For every feature
+    the result holds the r, n and 95% white-noise band (1.96 / sqrt(n)) per
+    lag, plus the lag with the largest |r| and whether it is significant
+    once corrected for the number of lags searched (see lead_lag_summary).
+    """
+    frame = returns_frame(news_features_df, colcap_df)
+    feature_cols = [c for c in FEATURES if c in frame.columns]
+    cc = cross_correlation(frame[feature_cols].to_numpy(dtype=float), frame[target].to_numpy(dtype=float), max_lag)
+    return lead_lag_summary(feature_cols, cc["lags"], cc["r"], cc["n"], target)
+
+
+def lead_lag_summary(
+    feature_cols: List[str],
+    lags: np.ndarray,
+    r: np.ndarray,
+    n: np.ndarray,
+    target: str = "returns",
+) -> Dict[str, Any]:
+    """Report dict from per-lag coefficients and counts shaped (lags, features).
+
+    'band' is the per-lag 95% band, descriptive only: the best of 2*max_lag + 1
+    lags would exceed it on pure noise most of the time. 'significant' compares
+    'best_r' with 'best_band', the Šidák-corrected band over all lags.
+    """
+    with np.errstate(divide="ignore"):
+        band = np.where(n > 0, Z_95 / np.sqrt(n), np.nan)
+        best_bands = np.where(n > 0, sidak_z(len(lags)) / np.sqrt(n), np.nan)
+    features: Dict[str, Any] = {}
+    for j, f in enumerate(feature_cols):
+        rj = r[:, j]
+        best: Optional[int] = int(np.nanargmax(np.abs(rj))) if not np.isnan(rj).all() else None
+        features[f] = {
+            "r": [float(v) for v in rj],
+            "n": [int(v) for v in n[:, j]],
+            "band": [float(v) for v in band[:, j]],
+            "best_lag": int(lags[best]) if best is not None else None,
+            "best_r": float(rj[best]) if best is not None else np.nan,
+            "best_band": float(best_bands[best, j]) if best is not None else np.nan,
+            "significant": bool(abs(rj[best]) > best_bands[best, j]) if best is not None else False,
+        }
+    return {"target": target, "lags": [int(k) for k in lags], "features": features}
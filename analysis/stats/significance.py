@@ -0,0 +1,191 @@
+import warnings
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .correlation import FEATURES, pearson_matrix, spearman_matrix
+
+
+# Resamples per task: bounds the (batch, rows, features) matrices and fixes the
+# seed stream per task, so results do not depend on the number of processes
+BATCH = 256
+
+# A pool is not worth starting for fewer tasks than this
+MIN_POOL_TASKS = 4
+
+Task = Tuple[str, np.random.SeedSequence, int]
+
+
+def default_block_size(n: int) -> int:
+    """Block length for daily series: n^(1/3), the usual moving-block bootstrap rate."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def _batched_pearson(X: np.ndarray, Y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Pearson r over axis 1 of (batch, rows, features) arrays, using rows where mask."""
+    n = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.where(mask, X, 0.0).sum(axis=1) / n
+        my = np.where(mask, Y, 0.0).sum(axis=1) / n
+        dx = np.where(mask, X - mx[:, None, :], 0.0)
+        dy = np.where(mask, Y - my[:, None, :], 0.0)
+        sxx = np.einsum("bij,bij->bj", dx, dx)
+        syy = np.einsum("bij,bij->bj", dy, dy)
+        r = np.einsum("bij,bij->bj", dx, dy) / np.sqrt(sxx * syy)
+    r[(n < 2) | (sxx == 0) | (syy == 0)] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def _batched_spearman(X: np.ndarray, Y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    RX = stats.rankdata(np.where(mask, X, np.nan), axis=1, nan_policy="omit")
+    RY = stats.rankdata(np.where(mask, Y, np.nan), axis=1, nan_policy="omit")
+    return _batched_pearson(RX, RY, mask)
+
+
+def block_bootstrap_indices(rng: np.random.Generator, size: int, n: int, block: int) -> np.ndarray:
+    """(size, n) row indices of moving-block bootstrap samples (blocks drawn with replacement)."""
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(size, n_blocks))
+    return (starts[:, :, None] + np.arange(block)).reshape(size, -1)[:, :n]
+
+
+def block_permutation_indices(rng: np.random.Generator, size: int, n: int, block: int) -> np.ndarray:
+    """(size, n) row indices that shuffle the order of consecutive blocks.
+
+    Autocorrelation inside each block survives, so the null distribution is
+    not as narrow as with a row-level shuffle of an autocorrelated series.
+    """
+    starts = np.arange(0, n, block)
+    lengths = np.diff(np.append(starts, n))
+    order = np.argsort(rng.random((size, len(starts))), axis=1)
+    out_lengths = lengths[order]
+    out_starts = np.cumsum(out_lengths, axis=1) - out_lengths
+    shift = np.repeat((starts[order] - out_starts).ravel(), out_lengths.ravel()).reshape(size, n)
+    return shift + np.arange(n)
+
+
+def run_batch(
+    X: np.ndarray,
+    y: np.ndarray,
+    methods: Sequence[str],
+    block: int,
+    task: Task,
+) -> Dict[str, np.ndarray]:
+    """Correlations of one batch of resamples: {method: (size, features)}.
+
+    'bootstrap' tasks resample (feature, target) rows together in blocks;
+    'permutation' tasks shuffle blocks of the target against fixed features.
+    """
+    kind, seed, size = task
+    rng = np.random.default_rng(seed)
+    n = len(y)
+    valid_x = ~np.isnan(X)
+    if kind == "bootstrap":
+        idx = block_bootstrap_indices(rng, size, n, block)
+        Xs, ys = X[idx], y[idx]
+        mask = valid_x[idx] & ~np.isnan(ys)[:, :, None]
+    else:
+        idx = block_permutation_indices(rng, size, n, block)
+        Xs, ys = np.broadcast_to(X, (size,) + X.shape), y[idx]
+        mask = valid_x[None] & ~np.isnan(ys)[:, :, None]
+    Ys = np.broadcast_to(ys[:, :, None], Xs.shape)
+
+    out: Dict[str, np.ndarray] = {}
+    for m in methods:
+        if m == "pearson":
+            out[m] = _batched_pearson(Xs, Ys, mask)
+        elif m == "spearman":
+            if kind == "permutation" and mask.all():
+                # Without gaps a permutation only reorders the target's ranks
+                RX = stats.rankdata(X, axis=0)
+                RY = stats.rankdata(y)[idx]
+                out[m] = _batched_pearson(np.broadcast_to(RX, Xs.shape), np.broadcast_to(RY[:, :, None], Xs.shape), mask)
+            else:
+                out[m] = _batched_spearman(Xs, Ys, mask)
+    return out
+
+
+def plan_tasks(n_resamples: int, seed: int) -> List[Task]:
+    """Bootstrap and permutation batches, each with its own child SeedSequence."""
+    sizes = [BATCH] * (n_resamples // BATCH) + ([n_resamples % BATCH] if n_resamples % BATCH else [])
+    children = np.random.SeedSequence(seed).spawn(2 * len(sizes))
+    kinds = ["bootstrap"] * len(sizes) + ["permutation"] * len(sizes)
+    return list(zip(kinds, children, sizes + sizes))
+
+
+def pool_map(procs: Optional[int] = None) -> Callable[[Callable, List[Task]], List[Any]]:
+    """Map over tasks with a multiprocessing Pool of `procs` processes (serial for small jobs)."""
+
+    def _map(fn: Callable, tasks: List[Task]) -> List[Any]:
+        nprocs = min(procs or cpu_count(), len(tasks))
+        if nprocs <= 1 or len(tasks) < MIN_POOL_TASKS:
+            return [fn(t) for t in tasks]
+        with Pool(nprocs) as pool:
+            return pool.map(fn, tasks)
+
+    return _map
+
+
+def significance_report(
+    joined_df: pd.DataFrame,
+    methods: Optional[List[str]] = None,
+    n_resamples: int = 2000,
+    block_size: Optional[int] = None,
+    confidence: float = 0.95,
+    seed: int = 0,
+    target: str = "close",
+    map_fn: Optional[Callable[[Callable, List[Task]], List[Any]]] = None,
+) -> Dict[str, Any]:
+    """Resampling significance of each feature/method correlation against `target`.
+
+    `joined_df` must be sorted by date. Confidence intervals are percentile
+    intervals of a moving-block bootstrap; p-values come from a block
+    permutation test (two-sided, (1 + #|r*| >= |r|) / (1 + valid resamples)).
+    Both keep the serial dependence within blocks of `block_size` days
+    (default n^(1/3)), unlike the analytic t-test p-values. Batches of
+    resamples run through `map_fn` (a process pool by default); a fixed
+    `seed` gives the same result whatever the number of workers.
+    """
+    methods = [m for m in (methods or ["pearson", "spearman"]) if m in ("pearson", "spearman")]
+    feature_cols = [c for c in FEATURES if c in joined_df.columns]
+    X = joined_df[feature_cols].to_numpy(dtype=float)
+    y = joined_df[target].to_numpy(dtype=float)
+    n = len(y)
+    block = block_size or default_block_size(n)
+
+    result: Dict[str, Any] = {
+        "n_resamples": n_resamples,
+        "block_size": block,
+        "confidence": confidence,
+        "seed": seed,
+    }
+    if n < 3 or not feature_cols or n_resamples <= 0:
+        for m in methods:
+            result[m] = {f: {"r": np.nan, "ci_low": np.nan, "ci_high": np.nan, "p_value": np.nan} for f in feature_cols}
+        return result
+
+    tasks = plan_tasks(n_resamples, seed)
+    batches = (map_fn or pool_map())(partial(run_batch, X, y, methods, min(block, n)), tasks)
+    observed = {"pearson": pearson_matrix(X, y)[0], "spearman": spearman_matrix(X, y)[0]}
+    tail = (1 - confidence) / 2
+
+    for m in methods:
+        boot = np.vstack([b[m] for t, b in zip(tasks, batches) if t[0] == "bootstrap"])
+        perm = np.vstack([b[m] for t, b in zip(tasks, batches) if t[0] == "permutation"])
+        r = observed[m]
+        with warnings.catch_warnings(), np.errstate(invalid="ignore"):
+            # All-NaN columns (constant feature) give NaN bounds
+            warnings.simplefilter("ignore", RuntimeWarning)
+            low, high = np.nanquantile(boot, [tail, 1 - tail], axis=0)
+            extreme = (np.abs(perm) >= np.abs(r) - 1e-12).sum(axis=0)
+        valid = (~np.isnan(perm)).sum(axis=0)
+        p = np.where(np.isnan(r) | (valid == 0), np.nan, (1 + extreme) / (1 + valid))
+        result[m] = {
+            f: {"r": float(r[j]), "ci_low": float(low[j]), "ci_high": float(high[j]), "p_value": float(p[j])}
+            for j, f in enumerate(feature_cols)
+        }
+    return result
@@ -1,7 +1,11 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 import re
 
+import numpy as np
+import pandas as pd
+
 
 _MONTHS = {
     "enero": 1,
@@ -18,46 +22,81 @@ _MONTHS = {
     "diciembre": 12,
 }
 
+_ISO_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_DMY_RE = re.compile(r"^(\d{2})/(\d{2})/(\d{4})$")
+_SPANISH_RE = re.compile(r"^(\d{1,2})\s+de\s+([a-záéíóú]+)\s+de\s+(\d{4})$")
+_ACCENTS = str.maketrans("áéíóú", "aeiou")
 
-def to_date(value: str) -> Optional[str]:
-    """Parse various date formats into 'YYYY-MM-DD' string.
+# Distinct date strings kept in the memo (a news corpus has a few thousand)
+CACHE_SIZE = 65536
 
-    Accepts formats like '2023-05-20', '20/05/2023', '20 de mayo de 2023'.
-    Returns None if parsing fails.
-    """
-    if not isinstance(value, str) or not value:
+
+def _ymd(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        datetime(year, month, day)
+    except ValueError:
         return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
 
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(value: str) -> Optional[str]:
     value = value.strip().lower()
 
     # ISO
-    try:
-        if re.match(r"^\d{4}-\d{2}-\d{2}$", value):
-            dt = datetime.strptime(value, "%Y-%m-%d")
-            return dt.strftime("%Y-%m-%d")
-    except Exception:
-        pass
+    m = _ISO_RE.match(value)
+    if m:
+        return _ymd(int(m.group(1)), int(m.group(2)), int(m.group(3)))
 
     # DD/MM/YYYY
-    try:
-        if re.match(r"^\d{2}/\d{2}/\d{4}$", value):
-            dt = datetime.strptime(value, "%d/%m/%Y")
-            return dt.strftime("%Y-%m-%d")
-    except Exception:
-        pass
+    m = _DMY_RE.match(value)
+    if m:
+        return _ymd(int(m.group(3)), int(m.group(2)), int(m.group(1)))
 
     # '20 de mayo de 2023'
-    m = re.match(r"^(\d{1,2})\s+de\s+([a-záéíóú]+)\s+de\s+(\d{4})$", value)
+    m = _SPANISH_RE.match(value)
     if m:
-        try:
-            day = int(m.group(1))
-            month_name = m.group(2).replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
-            month = _MONTHS.get(month_name)
-            year = int(m.group(3))
-            if month:
-                dt = datetime(year, month, day)
-                return dt.strftime("%Y-%m-%d")
-        except Exception:
-            pass
+        month = _MONTHS.get(m.group(2).translate(_ACCENTS))
+        if month:
+            return _ymd(int(m.group(3)), month, int(m.group(1)))
 
     return None
+
+
+def to_date(value: str) -> Optional[str]:
+    """Parse various date formats into 'YYYY-MM-DD' string.
+
+    Accepts formats like '2023-05-20', '20/05/2023', '20 de mayo de 2023'.
+    Returns None if parsing fails. Results are memoized per input string.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    return _parse(value)
+
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """Vectorized `to_date` over a Series.
+
+    The input is factorized so every distinct value is parsed once; the parsed
+    uniques are then mapped back to all rows with a single positional take.
+    Unparseable or missing values become None. Index and name are preserved.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parsed = np.array([to_date(u) for u in uniques] + [None], dtype=object)
+    # Missing values have code -1, which picks the trailing None
+    return pd.Series(parsed[codes], index=values.index, name=values.name, dtype=object)
+
+
+def normalize_date_categories(values: pd.Series) -> pd.Series:
+    """`normalize_dates` for a categorical Series, keeping it categorical.
+
+    Only the categories are parsed; rows keep their integer codes, remapped
+    onto the sorted normalized dates (an ordered categorical). Unparseable
+    values become missing.
+    """
+    parsed = normalize_dates(pd.Series(values.cat.categories, dtype=object))
+    new_codes, uniques = pd.factorize(parsed, sort=True, use_na_sentinel=True)
+    # Code -1 (missing) picks the trailing -1
+    codes = np.append(new_codes, -1)[values.cat.codes.to_numpy()]
+    categorical = pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object), ordered=True)
+    return pd.Series(categorical, index=values.index, name=values.name)
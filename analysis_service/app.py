@@ -7,6 +7,28 @@ import os
 import math
 
 from analysis.engine.factory import get_engine
+from analysis.pipeline import AnalysisPipeline, StageCache
+
+
+# Server-side directory for state files the API may create (sentiment cache,
+# feature store); requests can only name entries inside it
+STATE_DIR = os.path.abspath(
+    os.getenv("ANALYSIS_STATE_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "service_state"))
+)
+
+
+def resolve_state_path(name: str | None) -> str | None:
+    """Map a request-supplied name to a path under STATE_DIR.
+
+    Absolute paths and '..' components are rejected, so callers cannot make
+    the server create or write files elsewhere.
+    """
+    if not name:
+        return None
+    parts = name.replace("\\", "/").split("/")
+    if os.path.isabs(name) or os.path.splitdrive(name)[0] or any(p in ("", ".", "..") for p in parts):
+        raise ValueError(f"Invalid state name '{name}': use a relative name under ANALYSIS_STATE_DIR")
+    return os.path.join(STATE_DIR, *parts)
 
 
 def clean_results(obj):
@@ -33,6 +55,30 @@ class CorrelationRequest(BaseModel):
     news_csv: str = os.path.join(os.path.dirname(__file__), "..", "analysis", "..", "data", "output.csv")
     colcap_csv: str
     rolling: list[int] = [7, 14, 30]
+    # Full dated rolling series, downsampled server-side ('lttb', 'minmax' or 'none')
+    rolling_series: bool = False
+    max_points: int | None = 500
+    downsample: str = "lttb"
+    # Optional inclusive date range (YYYY-MM-DD); prunes partitions on Parquet datasets
+    date_from: str | None = None
+    date_to: str | None = None
+    # Drop near-duplicate (syndicated) articles before computing features
+    dedupe: bool = False
+    # SQLite file with cached sentiment scores, relative to ANALYSIS_STATE_DIR; only unseen texts are scored
+    sentiment_cache: str | None = None
+    # Directory of stored daily features, relative to ANALYSIS_STATE_DIR; reused while the news file is unchanged
+    feature_store: str | None = None
+    # Stream the news in chunks of this many rows (pandas/multiprocessing)
+    chunksize: int | None = None
+    # Cross-correlation of each feature against returns for lags -max_lag..max_lag
+    lead_lag: bool = False
+    max_lag: int = 10
+    # Block-bootstrap confidence intervals and block-permutation p-values
+    significance: bool = False
+    n_resamples: int = 2000
+    block_size: int | None = None
+    confidence: float = 0.95
+    seed: int = 0
     # Parallelization options
     mp_procs: int | None = None
     dask_nparts: int | None = None
@@ -44,12 +90,26 @@ class CorrelationRequest(BaseModel):
 class CorrelationInlineRequest(BaseModel):
     backend: str = "pandas"
     rolling: list[int] = [7, 14, 30]
+    # Full dated rolling series, downsampled server-side ('lttb', 'minmax' or 'none')
+    rolling_series: bool = False
+    max_points: int | None = 500
+    downsample: str = "lttb"
     # Parallelization options
     mp_procs: int | None = None
     dask_nparts: int | None = None
     dask_distributed: bool = False
     dask_scheduler: str | None = None
     spark_master: str | None = None
+    dedupe: bool = False
+    sentiment_cache: str | None = None
+    lead_lag: bool = False
+    max_lag: int = 10
+    # Block-bootstrap confidence intervals and block-permutation p-values
+    significance: bool = False
+    n_resamples: int = 2000
+    block_size: int | None = None
+    confidence: float = 0.95
+    seed: int = 0
     # CSV contents
     news_csv_text: str
     colcap_csv_text: str
@@ -57,6 +117,39 @@ class CorrelationInlineRequest(BaseModel):
 
 app = FastAPI(title="Análisis Noticias vs COLCAP")
 
+# Stage outputs shared across requests: a repeated request (same inputs and
+# parameters) only reruns the stages whose inputs changed. Lazy backends keep
+# handles bound to their own session, so only eager backends share it. The
+# cache is thread-safe and never holds raw article frames (see Stage.cache).
+_STAGE_CACHE = StageCache()
+_CACHED_BACKENDS = ("pandas", "multiprocessing")
+
+
+def build_pipeline(req, engine, news, colcap, date_range=None) -> AnalysisPipeline:
+    significance = None
+    if req.significance:
+        significance = {
+            "n_resamples": req.n_resamples,
+            "block_size": req.block_size,
+            "confidence": req.confidence,
+            "seed": req.seed,
+        }
+    return AnalysisPipeline(
+        engine,
+        news,
+        colcap,
+        date_range=date_range,
+        dedupe=req.dedupe,
+        methods=["pearson", "spearman"],
+        rolling_windows=req.rolling,
+        rolling_series=req.rolling_series,
+        max_points=req.max_points,
+        downsample=req.downsample,
+        max_lag=req.max_lag if req.lead_lag else None,
+        significance=significance,
+        cache=_STAGE_CACHE if req.backend in _CACHED_BACKENDS else None,
+    )
+
 
 @app.post("/correlate")
 def correlate(req: CorrelationRequest):
@@ -68,12 +161,12 @@ def correlate(req: CorrelationRequest):
             distributed=req.dask_distributed,
             scheduler_address=req.dask_scheduler,
             master=req.spark_master,
+            sentiment_cache=resolve_state_path(req.sentiment_cache),
+            feature_store=resolve_state_path(req.feature_store),
+            chunksize=req.chunksize,
         )  # type: ignore
-        news_df = engine.load_news(req.news_csv)
-        news_feat = engine.compute_news_features(news_df)
-        colcap_df = engine.load_colcap(req.colcap_csv)
-        joined = engine.align_series(news_feat, colcap_df)
-        results = engine.compute_correlations(joined, methods=["pearson", "spearman"], rolling_windows=req.rolling)
+        date_range = (req.date_from, req.date_to) if (req.date_from or req.date_to) else None
+        results = build_pipeline(req, engine, req.news_csv, req.colcap_csv, date_range).run()
         return {"status": "ok", "results": clean_results(results)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -94,46 +187,12 @@ def correlate_inline(req: CorrelationInlineRequest):
             distributed=req.dask_distributed,
             scheduler_address=req.dask_scheduler,
             master=req.spark_master,
+            sentiment_cache=resolve_state_path(req.sentiment_cache),
         )  # type: ignore
 
-        # Parse CSV text into DataFrames
         news_df = pd.read_csv(io.StringIO(req.news_csv_text))
-        news_df["fecha"] = news_df["fecha"].astype(str)
-        
-        # Convert to backend-specific DataFrame if needed
-        if req.backend == "dask":
-            import dask.dataframe as dd
-            nparts = req.dask_nparts or max(1, len(news_df) // 1000)
-            news_df = dd.from_pandas(news_df, npartitions=nparts)
-        elif req.backend == "spark":
-            # Use the engine's spark session
-            if hasattr(engine, 'spark'):
-                news_df = engine.spark.createDataFrame(news_df)
-            else:
-                from pyspark.sql import SparkSession
-                spark = SparkSession.builder.appName("AnalysisEngine").getOrCreate()
-                news_df = spark.createDataFrame(news_df)
-        
-        news_feat = engine.compute_news_features(news_df)
-
         colcap_df = pd.read_csv(io.StringIO(req.colcap_csv_text))
-        
-        # Convert to backend-specific DataFrame if needed
-        if req.backend == "dask":
-            import dask.dataframe as dd
-            nparts = req.dask_nparts or max(1, len(colcap_df) // 1000)
-            colcap_df = dd.from_pandas(colcap_df, npartitions=nparts)
-        elif req.backend == "spark":
-            # Use the engine's spark session
-            if hasattr(engine, 'spark'):
-                colcap_df = engine.spark.createDataFrame(colcap_df)
-            else:
-                from pyspark.sql import SparkSession
-                spark = SparkSession.builder.appName("AnalysisEngine").getOrCreate()
-                colcap_df = spark.createDataFrame(colcap_df)
-        
-        joined = engine.align_series(news_feat, colcap_df)
-        results = engine.compute_correlations(joined, methods=["pearson", "spearman"], rolling_windows=req.rolling)
+        results = build_pipeline(req, engine, news_df, colcap_df).run()
         return {"status": "ok", "results": clean_results(results)}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -14,6 +14,8 @@ st.caption(f"API: {API_URL}")
 st.sidebar.header("Configuración")
 backend = st.sidebar.selectbox("Backend", ["pandas", "multiprocessing", "dask", "spark"], index=0)
 rolling = st.sidebar.multiselect("Ventanas rolling", [7, 14, 30], default=[7, 14, 30])
+max_points = st.sidebar.number_input("Puntos por serie rolling", min_value=10, value=500)
+downsample = st.sidebar.selectbox("Reducción de puntos", ["lttb", "minmax", "none"], index=0)
 mp_procs = st.sidebar.number_input("Procesos (MP)", min_value=1, value=4)
 dask_nparts = st.sidebar.number_input("Particiones (Dask)", min_value=1, value=8)
 dask_distributed = st.sidebar.checkbox("Dask Distributed", value=False)
@@ -36,6 +38,9 @@ if run_btn:
         payload = {
             "backend": backend,
             "rolling": rolling,
+            "rolling_series": True,
+            "max_points": max_points,
+            "downsample": downsample,
             "mp_procs": mp_procs,
             "dask_nparts": dask_nparts,
             "dask_distributed": dask_distributed,
@@ -101,21 +106,25 @@ if run_btn:
                 st.subheader("Rolling (último valor por ventana)")
                 st.dataframe(rolling_df)
                 
-                # Gráfica de líneas para Rolling
-                if not rolling_df.empty:
+                # Serie rolling completa (ya reducida en el servidor), una gráfica por feature
+                windows = (data.get("rolling_series") or {}).get("windows", {})
+                features = sorted({f for series in windows.values() for f in series})
+                for feature in features:
                     fig_rolling = go.Figure()
-                    for col in rolling_df.columns:
-                        fig_rolling.add_trace(go.Scatter(
-                            x=rolling_df.index.astype(str),
-                            y=rolling_df[col],
-                            mode='lines+markers',
-                            name=col
+                    for win, series in windows.items():
+                        points = series.get(feature, {})
+                        fig_rolling.add_trace(go.Scattergl(
+                            x=points.get("date", []),
+                            y=points.get("r", []),
+                            mode='lines',
+                            name=f"{win} días"
                         ))
                     fig_rolling.update_layout(
-                        title="Correlaciones Rolling",
-                        xaxis_title="Ventana (días)",
+                        title=f"Correlación rolling en el tiempo: {feature}",
+                        xaxis_title="Fecha",
                         yaxis_title="Correlación",
-                        height=400
+                        height=400,
+                        yaxis=dict(range=[-1, 1])
                     )
                     st.plotly_chart(fig_rolling, use_container_width=True)
         except Exception as e:
@@ -0,0 +1,102 @@
+import argparse
+import gzip
+import time
+
+from warcio.archiveiterator import ArchiveIterator
+
+from ingestion.cleaner import clean_html
+
+
+def load_pages(filepath, limit):
+    """Lee hasta `limit` respuestas HTML del WARC a memoria (para medir solo la limpieza)."""
+    pages = []
+    with gzip.open(filepath, "rb") as stream:
+        for record in ArchiveIterator(stream):
+            if record.rec_type != "response":
+                continue
+            html = record.content_stream().read()
+            if html:
+                pages.append(html)
+            if len(pages) >= limit:
+                break
+    return pages
+
+
+# Casos borde en los que el modo fast debe coincidir con full
+PAGINAS_PARIDAD = {
+    "xhtml": (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" '
+        '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">\n'
+        '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Mercados en Colombia</title></head>'
+        "<body><p>Publicado el 2024-01-15. La economía colombiana, según analistas, crece lentamente "
+        "este año.</p></body></html>"
+    ).encode("utf-8"),
+    "vacia": b"",
+    "solo_espacios": b"  \n\t ",
+    # Fecha solo en la firma dentro de <article><header>, sin metadatos
+    "fecha_en_header": (
+        "<!DOCTYPE html><html><head><title>Alza del dólar</title></head><body>"
+        "<article><header><h1>Alza del dólar</h1><p>Por Redacción, 20/05/2023</p></header>"
+        "<p>El dólar subió frente al peso colombiano durante la jornada, según operadores del mercado "
+        "cambiario.</p><p>Los analistas atribuyen el movimiento a la caída del petróleo y a la "
+        "incertidumbre fiscal del país.</p></article><footer>Contacto</footer></body></html>"
+    ).encode("utf-8"),
+}
+
+
+def verificar_paridad():
+    """Compara (titulo, fecha, texto) de fast y full en PAGINAS_PARIDAD; devuelve los casos distintos."""
+    distintos = []
+    for nombre, html in PAGINAS_PARIDAD.items():
+        full = clean_html(html, mode="full")
+        fast = clean_html(html, mode="fast")
+        if full != fast:
+            distintos.append((nombre, full, fast))
+    return distintos
+
+
+def bench_mode(pages, mode):
+    timings = {}
+    ok = 0
+    t0 = time.perf_counter()
+    for html in pages:
+        try:
+            clean_html(html, mode=mode, timings=timings)
+            ok += 1
+        except Exception:
+            pass
+    total = time.perf_counter() - t0
+    return {"mode": mode, "pages": ok, "total_sec": total, "phases_sec": timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los modos full y fast de clean_html sobre un WARC real")
+    parser.add_argument("--file", type=str, default=None, help="Ruta a un archivo .warc.gz (sin él solo se verifica la paridad)")
+    parser.add_argument("--limit", type=int, default=500, help="Páginas a medir")
+    args = parser.parse_args()
+
+    distintos = verificar_paridad()
+    for nombre, full, fast in distintos:
+        print(f"⚠️ Paridad fast/full falla en '{nombre}': full={full!r} fast={fast!r}")
+    if not distintos:
+        print(f"✔ Paridad fast/full en {len(PAGINAS_PARIDAD)} casos borde (XHTML, vacío, fecha en header)")
+    if not args.file:
+        raise SystemExit(1 if distintos else 0)
+
+    pages = load_pages(args.file, args.limit)
+    print(f"📄 {len(pages)} páginas cargadas de {args.file}\n")
+
+    resultados = [bench_mode(pages, "full"), bench_mode(pages, "fast")]
+    for r in resultados:
+        por_pagina = r["total_sec"] / max(1, r["pages"]) * 1000
+        fases = ", ".join(f"{k}={v:.3f}s" for k, v in r["phases_sec"].items())
+        print(f"⚙️ {r['mode']:>4}: {r['total_sec']:.3f}s total ({por_pagina:.2f} ms/página) | {fases}")
+
+    full, fast = resultados
+    if fast["total_sec"] > 0:
+        print(f"\n✔ Aceleración fast vs full: {full['total_sec'] / fast['total_sec']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
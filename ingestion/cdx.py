@@ -0,0 +1,256 @@
+import gzip
+import io
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import tldextract
+
+from ingestion.download_cc import DEFAULT_BASE_URL, make_session
+from ingestion.warc_reader import build_row, iter_responses, make_writer
+
+# Huecos máximos entre registros para unirlos en una sola petición Range
+MAX_GAP = 64 * 1024
+# Tamaño máximo de una petición Range combinada
+MAX_SPAN = 16 * 1024 * 1024
+
+
+def _open_text(path):
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, "r", encoding="utf-8")
+
+
+def read_cdx_index(path):
+    """
+    Lee un índice de Common Crawl y genera entradas normalizadas.
+
+    Formatos soportados:
+        - CDXJ (`<surt> <timestamp> {json}`), opcionalmente .gz
+        - Índice columnar en Parquet (columnas url, content_mime_type, fetch_status,
+          warc_filename, warc_record_offset, warc_record_length)
+
+    Cada entrada es un dict con url, mime, status, filename, offset, length.
+    """
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        cols = ["url", "content_mime_type", "fetch_status", "warc_filename",
+                "warc_record_offset", "warc_record_length"]
+        df = pd.read_parquet(path, columns=cols)
+        for r in df.itertuples(index=False):
+            yield {
+                "url": r.url,
+                "mime": r.content_mime_type,
+                "status": str(r.fetch_status),
+                "filename": r.warc_filename,
+                "offset": int(r.warc_record_offset),
+                "length": int(r.warc_record_length),
+            }
+        return
+
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            brace = line.find("{")
+            if brace < 0:
+                continue
+            data = json.loads(line[brace:])
+            if "filename" not in data or "offset" not in data:
+                continue
+            yield {
+                "url": data.get("url", ""),
+                "mime": data.get("mime-detected") or data.get("mime", ""),
+                "status": str(data.get("status", "")),
+                "filename": data["filename"],
+                "offset": int(data["offset"]),
+                "length": int(data["length"]),
+            }
+
+
+def select_records(entries, domains=None, tlds=None, url_include=None, mimes=("text/html",), statuses=("200",)):
+    """Filtra las entradas del índice por dominio/sufijo, patrón de URL, MIME y estado HTTP."""
+    domains = set(d.lower() for d in domains) if domains else None
+    tlds = [t.lower().lstrip(".") for t in tlds] if tlds else None
+    patterns = [re.compile(p) for p in url_include] if url_include else None
+    mimes = set(mimes) if mimes else None
+    statuses = set(str(s) for s in statuses) if statuses else None
+
+    for e in entries:
+        if mimes is not None and e["mime"] not in mimes:
+            continue
+        if statuses is not None and e["status"] not in statuses:
+            continue
+        if domains is not None or tlds is not None:
+            ext = tldextract.extract(e["url"])
+            if domains is not None and ext.registered_domain.lower() not in domains:
+                continue
+            if tlds is not None and not any(ext.suffix == t or ext.suffix.endswith("." + t) for t in tlds):
+                continue
+        if patterns is not None and not any(p.search(e["url"]) for p in patterns):
+            continue
+        yield e
+
+
+def coalesce_ranges(entries, max_gap=MAX_GAP, max_span=MAX_SPAN):
+    """
+    Agrupa registros vecinos del mismo WARC en rangos de bytes combinados.
+
+    Returns:
+        Lista de (filename, inicio, fin_exclusivo, [entradas]) ordenada por archivo y offset.
+    """
+    by_file = {}
+    for e in entries:
+        by_file.setdefault(e["filename"], []).append(e)
+
+    batches = []
+    for filename in sorted(by_file):
+        items = sorted(by_file[filename], key=lambda e: e["offset"])
+        start = end = None
+        group = []
+        for e in items:
+            e_end = e["offset"] + e["length"]
+            if group and e["offset"] - end <= max_gap and e_end - start <= max_span:
+                end = max(end, e_end)
+                group.append(e)
+                continue
+            if group:
+                batches.append((filename, start, end, group))
+            start, end, group = e["offset"], e_end, [e]
+        if group:
+            batches.append((filename, start, end, group))
+    return batches
+
+
+class RangeNotSupported(IOError):
+    """El servidor ignoró el encabezado Range; reintentar no sirve."""
+
+
+def fetch_range(session, base_url, filename, start, end, timeout=60, retries=3, backoff=1.0):
+    """Descarga los bytes [start, end) de un WARC remoto con una petición HTTP Range."""
+    url = base_url.rstrip("/") + "/" + filename.lstrip("/")
+    for attempt in range(retries + 1):
+        try:
+            with session.get(url, headers={"Range": f"bytes={start}-{end - 1}"}, timeout=timeout,
+                             stream=True) as r:
+                r.raise_for_status()
+                # Un 200 es el WARC completo (varios GB): se corta antes de leer el cuerpo
+                if r.status_code != 206:
+                    raise RangeNotSupported(f"El servidor no admite peticiones Range para {url} "
+                                            f"(respondió {r.status_code})")
+                # Desde dónde empieza lo recibido: el servidor puede devolver más de lo pedido
+                m = re.match(r"bytes (\d+)-", r.headers.get("Content-Range", ""))
+                first = int(m.group(1)) if m else start
+                data = r.content[start - first:end - first]
+            if len(data) != end - start:
+                raise IOError(f"rango incompleto de {filename}: {len(data)}/{end - start} bytes")
+            return data
+        except (requests.RequestException, IOError) as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            permanent = isinstance(e, RangeNotSupported) or (
+                status is not None and 400 <= status < 500 and status not in (408, 429))
+            if attempt >= retries or permanent:
+                raise
+            wait = backoff * (2 ** attempt) * (1 + random.random() / 2)
+            print(f"⚠️ Error en {filename} [{start}-{end}) ({e}); reintento {attempt + 1}/{retries} en {wait:.1f}s")
+            time.sleep(wait)
+
+
+def iter_cdx_records(batches, base_url=DEFAULT_BASE_URL, workers=8, record_filter=None, timeout=60, stats=None):
+    """
+    Descarga los rangos combinados en paralelo y genera (url, html) por registro.
+
+    Cada registro es un miembro gzip independiente, así que se parsea con
+    ArchiveIterator sobre sus propios bytes. Como mucho hay 2 * workers rangos
+    en vuelo, y los resultados se entregan en el orden de `batches`.
+    """
+    session = make_session(workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        pending = iter(batches)
+
+        def submit_next():
+            batch = next(pending, None)
+            if batch is not None:
+                filename, start, end, group = batch
+                in_flight.append((pool.submit(fetch_range, session, base_url, filename, start, end, timeout),
+                                  start, group))
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight:
+            fut, start, group = in_flight.popleft()
+            t0 = time.perf_counter()
+            data = fut.result()
+            if stats is not None:
+                stats.add("fetch", time.perf_counter() - t0)
+            submit_next()
+            for e in group:
+                rel = e["offset"] - start
+                member = io.BytesIO(data[rel:rel + e["length"]])
+                for url, html, _ in iter_responses(member, record_filter, stats=stats):
+                    yield url, html
+
+
+def process_cdx(index_paths, base_url=DEFAULT_BASE_URL, limit=None, writer=None, output_format="csv",
+                cleaner_mode="full", record_filter=None, workers=8, max_gap=MAX_GAP,
+                domains=None, tlds=None, url_include=None, mimes=("text/html",), statuses=("200",),
+                stats=None):
+    """
+    Ingesta selectiva guiada por índices CDX: solo descarga los registros elegidos.
+
+    Args:
+        index_paths: Lista de archivos de índice locales (CDXJ, CDXJ.gz o Parquet)
+        base_url: Prefijo HTTP donde están los WARC referenciados por el índice
+        workers: Peticiones Range simultáneas
+        max_gap: Hueco máximo en bytes para combinar registros vecinos en una petición
+        domains / tlds / url_include / mimes / statuses: criterios de selección sobre el índice
+        stats: IngestionStats opcional (el tiempo esperando descargas va a la etapa fetch)
+        (resto de argumentos como en process_warc_file)
+
+    Returns:
+        Número de páginas guardadas.
+    """
+    entries = []
+    for path in index_paths:
+        entries.extend(select_records(read_cdx_index(path), domains=domains, tlds=tlds,
+                                      url_include=url_include, mimes=mimes, statuses=statuses))
+    batches = coalesce_ranges(entries, max_gap=max_gap)
+    total_bytes = sum(end - start for _, start, end, _ in batches)
+    print(f"🔎 {len(entries)} registros seleccionados en {len(batches)} peticiones Range "
+          f"({total_bytes / 1e6:.1f} MB)")
+
+    own_writer = writer is None
+    if own_writer:
+        writer = make_writer(output_format)
+
+    count = 0
+    try:
+        for url, html in iter_cdx_records(batches, base_url, workers, record_filter, stats=stats):
+            row = build_row(url, html, cleaner_mode, stats)
+            if row is None:
+                continue
+            t0 = time.perf_counter()
+            writer.write_row(row)
+            if stats is not None:
+                stats.add("write", time.perf_counter() - t0)
+            count += 1
+            if count % 100 == 0:
+                print(f"  ⚙️ Procesados {count} registros...")
+            if limit is not None and count >= limit:
+                break
+    finally:
+        if own_writer:
+            writer.close()
+
+    if stats is not None:
+        stats.files += len({filename for filename, _, _, _ in batches})
+        stats.rows += count
+    print(f"\n✔ Procesadas {count} páginas desde el índice y guardadas en {os.path.basename(writer.filepath)}\n")
+    return count
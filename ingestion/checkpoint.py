@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+
+def url_key(url):
+    """Hash compacto (64 bits con signo) de una URL para el índice de URLs vistas."""
+    digest = hashlib.blake2b(url.encode("utf-8", errors="ignore"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class CheckpointStore:
+    """
+    Checkpoints de ingesta y deduplicación de URLs en SQLite.
+
+    - `files`: estado por WARC (`partial`/`done`, por ruta local o URL), último
+      offset de registro con filas ya escritas en disco y filas guardadas.
+    - `seen_urls`: hash de 64 bits de cada URL emitida, con el archivo y offset
+      del registro que la reclamó.
+
+    Una URL se reclama con un INSERT atómico antes de escribir la fila, así que
+    varios procesos pueden compartir el mismo archivo SQLite sin emitir la misma
+    URL dos veces. Al reanudar un archivo se borran los reclamos posteriores al
+    último checkpoint: esas filas estaban en buffer y no llegaron a disco.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, status TEXT NOT NULL, offset INTEGER NOT NULL,"
+            " rows INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_urls ("
+            " h INTEGER PRIMARY KEY, path TEXT NOT NULL, offset INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_urls_path ON seen_urls (path, offset)")
+
+    @staticmethod
+    def _key(filepath):
+        # Los WARC remotos (--url) se identifican por su URL
+        if "://" in filepath:
+            return filepath
+        return os.path.abspath(filepath)
+
+    def file_state(self, filepath):
+        """Devuelve (status, offset, rows) o None si el archivo nunca se procesó."""
+        row = self.conn.execute(
+            "SELECT status, offset, rows FROM files WHERE path = ?", (self._key(filepath),)
+        ).fetchone()
+        return row
+
+    def is_done(self, filepath):
+        state = self.file_state(filepath)
+        return state is not None and state[0] == "done"
+
+    def resume(self, filepath):
+        """
+        Prepara la reanudación de un archivo.
+
+        Borra los reclamos de URL posteriores al último checkpoint y devuelve
+        (offset, rows) desde donde continuar; (0, 0) si es un archivo nuevo.
+        """
+        state = self.file_state(filepath)
+        if state is None:
+            return 0, 0
+        _, offset, rows = state
+        self.release_after(filepath, offset)
+        return offset, rows
+
+    def release_after(self, filepath, offset):
+        """Libera los reclamos de URL de registros posteriores a `offset` (leídos pero no escritos)."""
+        self.conn.execute(
+            "DELETE FROM seen_urls WHERE path = ? AND offset > ?", (self._key(filepath), offset)
+        )
+
+    def claim_url(self, url, filepath, offset):
+        """Reclama la URL. Devuelve False si ya fue emitida (en esta u otra ejecución)."""
+        cur = self.conn.execute(
+            "INSERT OR IGNORE INTO seen_urls (h, path, offset) VALUES (?, ?, ?)",
+            (url_key(url), self._key(filepath), offset),
+        )
+        return cur.rowcount == 1
+
+    def commit(self, filepath, offset, rows, done=False):
+        """Registra que todas las filas hasta el registro en `offset` están en disco."""
+        key = self._key(filepath)
+        self.conn.execute(
+            "INSERT INTO files (path, status, offset, rows, updated_at) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT(path) DO UPDATE SET status = excluded.status, offset = excluded.offset,"
+            " rows = excluded.rows, updated_at = excluded.updated_at",
+            (key, "done" if done else "partial", offset, rows, time.time()),
+        )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,30 +1,58 @@
 from bs4 import BeautifulSoup
 from readability import Document
+import lxml.etree
+import lxml.html
 import re
+import time
 
-def clean_html(html_bytes):
+PATRONES_FECHA = [
+    r"\b\d{4}-\d{2}-\d{2}\b",            # 2023-05-20
+    r"\b\d{2}/\d{2}/\d{4}\b",            # 20/05/2023
+    r"\b\d{1,2} de [A-Za-z]+ de \d{4}\b" # 20 de mayo de 2023
+]
+_PATRONES_FECHA_RE = [re.compile(p) for p in PATRONES_FECHA]
+
+
+def _add_timing(timings, fase, t0):
+    """Acumula en `timings[fase]` los segundos desde t0 y devuelve el instante actual."""
+    t1 = time.perf_counter()
+    if timings is not None:
+        timings[fase] = timings.get(fase, 0.0) + (t1 - t0)
+    return t1
+
+
+def clean_html(html_bytes, mode="full", timings=None):
+    """
+    Extrae (titulo, fecha, texto) de una página HTML.
+
+    Args:
+        html_bytes: Contenido HTML en bytes
+        mode: "full" (BeautifulSoup + Readability, comportamiento original) o
+            "fast" (un único parseo con lxml, ver clean_html_fast)
+        timings: Diccionario opcional donde se acumulan los segundos por fase
+    """
+    if mode == "fast":
+        return clean_html_fast(html_bytes, timings)
+
+    t = time.perf_counter()
     html = html_bytes.decode("utf-8", errors="ignore")
 
     # --- EXTRAER TÍTULO ---
     soup = BeautifulSoup(html, "lxml")
     titulo = soup.title.string.strip() if soup.title else ""
+    t = _add_timing(timings, "parse", t)
 
     # --- EXTRAER FECHA ---
     # Buscar fechas típicas en el texto
     fecha = ""
-    patrones_fecha = [
-        r"\b\d{4}-\d{2}-\d{2}\b",            # 2023-05-20
-        r"\b\d{2}/\d{2}/\d{4}\b",            # 20/05/2023
-        r"\b\d{1,2} de [A-Za-z]+ de \d{4}\b" # 20 de mayo de 2023
-    ]
-
     texto_bruto = soup.get_text(" ", strip=True)
 
-    for patron in patrones_fecha:
-        match = re.search(patron, texto_bruto)
+    for patron in _PATRONES_FECHA_RE:
+        match = patron.search(texto_bruto)
         if match:
             fecha = match.group(0)
             break
+    t = _add_timing(timings, "date", t)
 
     # --- EXTRAER CUERPO PRINCIPAL ---
     try:
@@ -34,5 +62,151 @@ def clean_html(html_bytes):
         texto_limpio = summary_soup.get_text(" ", strip=True)
     except:
         texto_limpio = texto_bruto  # fallback
+    _add_timing(timings, "body", t)
+
+    return titulo, fecha, texto_limpio
+
+
+# --- MODO RÁPIDO (un solo parseo con lxml) ---
+
+# Los bytes ya llegan normalizados a UTF-8; así lxml no adivina otra codificación
+_PARSER_UTF8 = lxml.html.HTMLParser(encoding="utf-8")
+
+# Metadatos estructurados con la fecha de publicación, en orden de preferencia
+_META_FECHA_XPATH = (
+    "//meta[@property='article:published_time']/@content"
+    " | //meta[@property='og:published_time']/@content"
+    " | //meta[@itemprop='datePublished']/@content"
+    " | //meta[@name='date' or @name='pubdate' or @name='publishdate']/@content"
+)
+_JSONLD_FECHA_RE = re.compile(r'"datePublished"\s*:\s*"([^"]+)"')
+_ISO_PREFIX_RE = re.compile(r"^\s*(\d{4}-\d{2}-\d{2})")
+
+# Etiquetas que nunca forman parte del cuerpo de la noticia
+# Etiquetas sin texto visible; se quitan antes de buscar la fecha en el texto
+_TAGS_INVISIBLES = ("script", "style", "noscript")
+# Etiquetas de navegación y maquetación; se quitan después, solo para el cuerpo
+# (la fecha de la firma suele estar en <article><header>)
+_TAGS_DESCARTE = ("nav", "header", "footer", "aside", "form", "iframe", "svg")
+
+# Máximo de caracteres de texto revisados al buscar una fecha sin metadatos
+MAX_ESCANEO_FECHA = 20000
+
+
+def _fecha_desde_metadatos(tree):
+    for valor in tree.xpath(_META_FECHA_XPATH):
+        m = _ISO_PREFIX_RE.match(valor)
+        if m:
+            return m.group(1)
+
+    for script in tree.xpath("//script[@type='application/ld+json']"):
+        m = _JSONLD_FECHA_RE.search(script.text or "")
+        if m:
+            iso = _ISO_PREFIX_RE.match(m.group(1))
+            if iso:
+                return iso.group(1)
+
+    for valor in tree.xpath("//time/@datetime"):
+        m = _ISO_PREFIX_RE.match(valor)
+        if m:
+            return m.group(1)
+
+    return ""
+
+
+def _texto(elem):
+    return " ".join(t.strip() for t in elem.itertext() if t.strip())
+
+
+def _texto_inicial(elem, limite):
+    """Como _texto, pero deja de recorrer el árbol al pasar `limite` caracteres."""
+    partes, total = [], 0
+    for t in elem.itertext():
+        t = t.strip()
+        if t:
+            partes.append(t)
+            total += len(t) + 1
+            if total >= limite:
+                break
+    return " ".join(partes)[:limite]
+
+
+def _mejor_contenedor(body):
+    """Elige el nodo con más texto en párrafos (heurística estilo Readability)."""
+    puntajes = {}
+    for p in body.iter("p"):
+        texto = p.text_content().strip()
+        if len(texto) < 25:
+            continue
+        puntaje = 1 + texto.count(",") + min(len(texto) / 100, 3)
+        padre = p.getparent()
+        if padre is None:
+            continue
+        puntajes[padre] = puntajes.get(padre, 0) + puntaje
+        abuelo = padre.getparent()
+        if abuelo is not None:
+            puntajes[abuelo] = puntajes.get(abuelo, 0) + puntaje / 2
+
+    if not puntajes:
+        return None
+    return max(puntajes, key=puntajes.get)
+
+
+def clean_html_fast(html_bytes, timings=None):
+    """
+    Variante de clean_html que parsea cada documento una sola vez con lxml.
+
+    - Título: <title>
+    - Fecha: primero metadatos estructurados (article:published_time, JSON-LD
+      datePublished, <time datetime>), normalizados a YYYY-MM-DD; solo si no
+      existen, busca los patrones de fecha en los primeros MAX_ESCANEO_FECHA
+      caracteres del texto visible (incluidos header y footer, como el modo full).
+    - Cuerpo: el contenedor con mayor puntaje de párrafos, sin scripts ni navegación.
+
+    Args:
+        html_bytes: Contenido HTML en bytes
+        timings: Diccionario opcional donde se acumulan los segundos por fase
+            ("parse", "title", "date", "body")
+    """
+    t = time.perf_counter()
+    # Igual que el modo full: UTF-8 ignorando bytes inválidos. Se parsean bytes
+    # (no str) para que lxml acepte la declaración <?xml encoding=...?> de XHTML
+    html = html_bytes.decode("utf-8", errors="ignore")
+    try:
+        if not html.strip():
+            raise lxml.etree.ParserError("Document is empty")
+        tree = lxml.html.document_fromstring(html.encode("utf-8"), parser=_PARSER_UTF8)
+    except lxml.etree.ParserError:
+        # Documento vacío o solo comentarios: mismo resultado vacío que el modo full
+        _add_timing(timings, "parse", t)
+        return "", "", ""
+    t = _add_timing(timings, "parse", t)
+
+    titulo = (tree.findtext(".//title") or "").strip()
+    t = _add_timing(timings, "title", t)
+
+    for elem in list(tree.iter(*_TAGS_INVISIBLES)):
+        elem.drop_tree()
+    body = tree.find("body")
+    if body is None:
+        body = tree
+
+    # Sin metadatos se busca en el texto visible antes de quitar cabeceras y
+    # pies, como hace el modo full sobre toda la página
+    fecha = _fecha_desde_metadatos(tree)
+    if not fecha:
+        texto_visible = _texto_inicial(body, MAX_ESCANEO_FECHA)
+        for patron in _PATRONES_FECHA_RE:
+            match = patron.search(texto_visible)
+            if match:
+                fecha = match.group(0)
+                break
+    t = _add_timing(timings, "date", t)
+
+    for elem in list(tree.iter(*_TAGS_DESCARTE)):
+        elem.drop_tree()
+    contenedor = _mejor_contenedor(body)
+    texto_limpio = _texto(contenedor if contenedor is not None else body)
+    _add_timing(timings, "body", t)
 
     return titulo, fecha, texto_limpio
@@ -1,47 +1,219 @@
 import argparse
+import hashlib
 import os
-import sys
+import random
+import re
+import threading
 import time
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
+DEFAULT_BASE_URL = "https://data.commoncrawl.org/"
+CHUNK_SIZE = 1024 * 1024
 
-def read_urls(path: str) -> List[str]:
+_print_lock = threading.Lock()
+
+
+def _log(msg: str) -> None:
+    with _print_lock:
+        print(msg, flush=True)
+
+
+def read_urls(path: str, base_url: str = DEFAULT_BASE_URL) -> List[str]:
+    """Lee URLs (o rutas relativas de Common Crawl, p.ej. de warc.paths) desde un archivo de texto."""
     with open(path, "r", encoding="utf-8") as f:
         urls = [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
-    return urls
+    return [u if re.match(r"^https?://", u) else base_url.rstrip("/") + "/" + u.lstrip("/") for u in urls]
+
+
+def read_checksums(path: str) -> Dict[str, str]:
+    """
+    Lee un archivo de checksums con líneas `<hex>  <nombre>` (formato sha256sum/md5sum).
+
+    Returns:
+        Diccionario nombre de archivo -> hash hexadecimal en minúsculas.
+    """
+    checksums = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.strip().split()
+            if len(parts) >= 2 and not parts[0].startswith("#"):
+                checksums[os.path.basename(parts[-1].lstrip("*"))] = parts[0].lower()
+    return checksums
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """Sesión HTTP con un pool de conexiones del tamaño del número de workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def file_digest(path: str, algorithm: str) -> str:
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _total_size(response: requests.Response, offset: int) -> Optional[int]:
+    content_range = response.headers.get("Content-Range", "")
+    m = re.match(r"bytes (?:\d+-\d+|\*)/(\d+)", content_range)
+    if m:
+        return int(m.group(1))
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        return int(length) + (offset if response.status_code == 206 else 0)
+    return None
+
+
+def _fetch_to_part(session: requests.Session, url: str, part_path: str, timeout: int) -> Tuple[int, Optional[int]]:
+    """Descarga (o reanuda) `url` en `part_path`. Devuelve (bytes recibidos, tamaño total esperado)."""
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with session.get(url, stream=True, timeout=timeout, headers=headers) as r:
+        if r.status_code == 416:
+            # El .part ya tiene todo el contenido
+            return 0, _total_size(r, offset) or offset
+        r.raise_for_status()
+
+        if offset and r.status_code != 206:
+            # El servidor ignoró el Range: se empieza de cero
+            offset = 0
+        total = _total_size(r, offset)
 
+        received = 0
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    received += len(chunk)
+    return received, total
+
+
+def download_url(
+    url: str,
+    out_dir: str,
+    timeout: int = 60,
+    session: Optional[requests.Session] = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    checksum: Optional[str] = None,
+) -> Tuple[str, int]:
+    """
+    Descarga un archivo de forma reanudable y verificada.
+
+    Los bytes se escriben en `<archivo>.part`; si la descarga se corta, el
+    siguiente intento (o la siguiente ejecución) continúa con una petición
+    HTTP Range. Solo tras comprobar el tamaño (Content-Length/Content-Range) y,
+    si se conoce, el checksum (sha256 o md5 según la longitud del hash), el
+    archivo se renombra a su nombre final.
 
-def download_url(url: str, out_dir: str, timeout: int = 60) -> str:
+    Returns:
+        (ruta final, bytes descargados en esta llamada)
+    """
     filename = os.path.basename(url)
     out_path = os.path.join(out_dir, filename)
+    part_path = out_path + ".part"
 
     if os.path.exists(out_path):
-        print(f"✔ Ya existe, omitiendo: {out_path}")
-        return out_path
+        _log(f"✔ Ya existe, omitiendo: {out_path}")
+        return out_path, 0
 
     os.makedirs(out_dir, exist_ok=True)
-    print(f"⬇ Descargando: {url}")
+    session = session or make_session(1)
+    downloaded = 0
 
-    with requests.get(url, stream=True, timeout=timeout) as r:
-        r.raise_for_status()
-        total = int(r.headers.get("Content-Length", 0))
-        downloaded = 0
-        t0 = time.perf_counter()
-        with open(out_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    if total:
-                        percent = downloaded * 100 // total
-                        sys.stdout.write(f"\r   Progreso: {percent}% ({downloaded}/{total} bytes)")
-                        sys.stdout.flush()
-        t1 = time.perf_counter()
-        print(f"\n✔ Guardado en {out_path} en {t1 - t0:.1f}s")
+    for attempt in range(retries + 1):
+        try:
+            if attempt == 0:
+                resumed = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                _log(f"⬇ Descargando: {url}" + (f" (reanudando desde {resumed} bytes)" if resumed else ""))
+            received, total = _fetch_to_part(session, url, part_path, timeout)
+            downloaded += received
+
+            size = os.path.getsize(part_path)
+            if total is not None and size != total:
+                if size > total:
+                    os.remove(part_path)
+                raise IOError(f"tamaño incompleto ({size}/{total} bytes)")
 
-    return out_path
+            if checksum:
+                algorithm = "md5" if len(checksum) == 32 else "sha256"
+                digest = file_digest(part_path, algorithm)
+                if digest != checksum.lower():
+                    os.remove(part_path)
+                    raise IOError(f"checksum {algorithm} no coincide")
+
+            os.replace(part_path, out_path)
+            _log(f"✔ Guardado en {out_path} ({size} bytes)")
+            return out_path, downloaded
+        except (requests.RequestException, IOError) as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            permanent = status is not None and 400 <= status < 500 and status not in (408, 429)
+            if attempt >= retries or permanent:
+                raise
+            wait = backoff * (2 ** attempt) * (1 + random.random() / 2)
+            _log(f"⚠️ Error en {filename} ({e}); reintento {attempt + 1}/{retries} en {wait:.1f}s")
+            time.sleep(wait)
+
+    return out_path, downloaded
+
+
+def download_all(
+    urls: List[str],
+    out_dir: str,
+    workers: int = 4,
+    timeout: int = 60,
+    retries: int = 3,
+    backoff: float = 1.0,
+    checksums: Optional[Dict[str, str]] = None,
+) -> Dict[str, object]:
+    """
+    Descarga varias URLs en paralelo con un número acotado de workers.
+
+    Returns:
+        Resumen con archivos descargados, fallidos, bytes, segundos y MB/s agregados.
+    """
+    checksums = checksums or {}
+    session = make_session(workers)
+    ok, failed = [], []
+    total_bytes = 0
+    t0 = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                download_url, u, out_dir, timeout, session, retries, backoff,
+                checksums.get(os.path.basename(u)),
+            ): u
+            for u in urls
+        }
+        for fut in as_completed(futures):
+            u = futures[fut]
+            try:
+                path, nbytes = fut.result()
+                ok.append(path)
+                total_bytes += nbytes
+            except Exception as e:
+                failed.append(u)
+                _log(f"❌ Error descargando {u}: {e}")
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "downloaded": ok,
+        "failed": failed,
+        "bytes": total_bytes,
+        "seconds": elapsed,
+        "mb_per_sec": (total_bytes / 1e6) / elapsed if elapsed > 0 else 0.0,
+    }
 
 
 def main():
@@ -50,10 +222,15 @@ def main():
     parser.add_argument("--out-dir", type=str, default=os.path.join(os.getcwd(), "warcs"), help="Directorio destino para guardar los WARC")
     parser.add_argument("--max", type=int, default=None, help="Máximo de archivos a descargar")
     parser.add_argument("--timeout", type=int, default=60, help="Tiempo de espera por petición en segundos")
+    parser.add_argument("--workers", type=int, default=4, help="Descargas simultáneas")
+    parser.add_argument("--retries", type=int, default=3, help="Reintentos por archivo (con backoff exponencial)")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Espera base en segundos entre reintentos")
+    parser.add_argument("--checksums", type=str, default=None, help="Archivo sha256sum/md5sum para verificar las descargas")
+    parser.add_argument("--base-url", type=str, default=DEFAULT_BASE_URL, help="Prefijo para rutas relativas (warc.paths)")
 
     args = parser.parse_args()
 
-    urls = read_urls(args.urls_file)
+    urls = read_urls(args.urls_file, args.base_url)
     if args.max:
         urls = urls[: args.max]
 
@@ -61,14 +238,18 @@ def main():
         print("⚠️ No se encontraron URLs en el archivo proporcionado")
         return
 
-    print(f"▶ Descargando {len(urls)} archivos en: {args.out_dir}")
-    for u in urls:
-        try:
-            download_url(u, args.out_dir, timeout=args.timeout)
-        except Exception as e:
-            print(f"❌ Error descargando {u}: {e}")
+    checksums = read_checksums(args.checksums) if args.checksums else None
+
+    print(f"▶ Descargando {len(urls)} archivos en: {args.out_dir} con {args.workers} workers")
+    summary = download_all(
+        urls, args.out_dir, workers=args.workers, timeout=args.timeout,
+        retries=args.retries, backoff=args.backoff, checksums=checksums,
+    )
 
-    print("\n✔ Descargas completadas")
+    print(
+        f"\n✔ Descargas completadas: {len(summary['downloaded'])} ok, {len(summary['failed'])} con error, "
+        f"{summary['bytes'] / 1e6:.1f} MB en {summary['seconds']:.1f}s ({summary['mb_per_sec']:.2f} MB/s)"
+    )
 
 
 if __name__ == "__main__":
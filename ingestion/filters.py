@@ -0,0 +1,143 @@
+import re
+from collections import Counter
+
+import tldextract
+
+# Tipos de contenido HTML aceptados por defecto
+DEFAULT_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# Palabras frecuentes por idioma para el sniff barato cuando la página no declara `lang`
+_STOPWORDS = {
+    "es": (b" de ", b" la ", b" que ", b" el ", b" en ", b" los ", b" las ", b" del ", b" por ", b" una "),
+    "en": (b" the ", b" and ", b" of ", b" to ", b" in ", b" is ", b" that ", b" for ", b" with ", b" was "),
+    "pt": (b" de ", b" que ", b" em ", b" um ", b" uma ", b" para ", b" com ", b" os ", b" no ", b" do "),
+}
+_LANG_ATTR_RE = re.compile(rb"<html[^>]*?\blang\s*=\s*[\"']?([a-zA-Z]{2})", re.IGNORECASE)
+_MIN_HITS_IDIOMA = 5
+
+
+class RecordFilter:
+    """
+    Filtro de registros WARC que decide con las cabeceras, antes de leer el cuerpo.
+
+    Reglas (cada una se omite si su parámetro es None):
+        content_types: tipos MIME aceptados (cabecera HTTP Content-Type)
+        statuses: códigos HTTP aceptados
+        max_bytes: tamaño máximo del registro (cabecera WARC Content-Length)
+        tlds: sufijos aceptados, p.ej. ["co"] acepta .co, .com.co, .gov.co...
+        domains: dominios registrados aceptados, p.ej. ["eltiempo.com"]
+        url_include / url_exclude: expresiones regulares sobre la ruta de la URL
+        languages: idiomas aceptados; se usa Content-Language y, si falta, se leen
+            los primeros `sniff_bytes` del cuerpo (atributo lang o palabras frecuentes)
+
+    `rejected` cuenta cuántos registros descartó cada regla y `accepted` los que pasaron.
+    """
+
+    def __init__(self, content_types=DEFAULT_CONTENT_TYPES, statuses=(200,), max_bytes=5 * 1024 * 1024,
+                 tlds=None, domains=None, url_include=None, url_exclude=None, languages=None,
+                 sniff_bytes=4096):
+        self.content_types = set(content_types) if content_types else None
+        self.statuses = set(int(s) for s in statuses) if statuses else None
+        self.max_bytes = max_bytes
+        self.tlds = [t.lower().lstrip(".") for t in tlds] if tlds else None
+        self.domains = set(d.lower() for d in domains) if domains else None
+        self.url_include = [re.compile(p) for p in url_include] if url_include else None
+        self.url_exclude = [re.compile(p) for p in url_exclude] if url_exclude else None
+        self.languages = set(l.lower() for l in languages) if languages else None
+        self.sniff_bytes = sniff_bytes
+        self.rejected = Counter()
+        self.accepted = 0
+
+    @property
+    def needs_sniff(self):
+        return self.languages is not None
+
+    def _reject(self, rule):
+        self.rejected[rule] += 1
+        return False
+
+    @staticmethod
+    def _as_int(value):
+        """Entero de una cabecera, o None si está vacía o no es numérica."""
+        try:
+            return int(str(value).strip())
+        except (TypeError, ValueError):
+            return None
+
+    def check_headers(self, record, url):
+        """Aplica las reglas de cabecera. Devuelve False (y cuenta la regla) si se descarta."""
+        http = record.http_headers
+
+        if self.statuses is not None:
+            status = self._as_int(http.get_statuscode()) if http else None
+            if status is None or status not in self.statuses:
+                return self._reject("status")
+
+        if self.content_types is not None:
+            ctype = (http.get_header("Content-Type") if http else None) or ""
+            if ctype.split(";")[0].strip().lower() not in self.content_types:
+                return self._reject("content_type")
+
+        if self.max_bytes is not None:
+            length = record.rec_headers.get_header("Content-Length")
+            if length is not None:
+                # Un Content-Length malformado no permite acotar la lectura: se descarta
+                size = self._as_int(length)
+                if size is None or size > self.max_bytes:
+                    return self._reject("max_bytes")
+
+        if self.tlds is not None or self.domains is not None:
+            ext = tldextract.extract(url)
+            if self.tlds is not None:
+                suffix = ext.suffix.lower()
+                if not any(suffix == t or suffix.endswith("." + t) for t in self.tlds):
+                    return self._reject("tld")
+            if self.domains is not None and ext.registered_domain.lower() not in self.domains:
+                return self._reject("domain")
+
+        if self.url_include is not None or self.url_exclude is not None:
+            path = re.sub(r"^[a-z]+://[^/]*", "", url, flags=re.IGNORECASE) or "/"
+            if self.url_include is not None and not any(p.search(path) for p in self.url_include):
+                return self._reject("url_include")
+            if self.url_exclude is not None and any(p.search(path) for p in self.url_exclude):
+                return self._reject("url_exclude")
+
+        if self.languages is not None and http is not None:
+            content_language = http.get_header("Content-Language")
+            if content_language:
+                langs = {l.strip().lower()[:2] for l in content_language.split(",")}
+                if not langs & self.languages:
+                    return self._reject("language")
+
+        return True
+
+    def check_language(self, record, head):
+        """Sniff de idioma sobre los primeros bytes del cuerpo (solo si `languages` está activo)."""
+        if self.languages is None:
+            return True
+        http = record.http_headers
+        if http is not None and http.get_header("Content-Language"):
+            return True  # ya decidido en check_headers
+
+        m = _LANG_ATTR_RE.search(head)
+        if m:
+            if m.group(1).lower().decode() not in self.languages:
+                return self._reject("language")
+            return True
+
+        texto = head.lower()
+        hits = {lang: sum(texto.count(w) for w in words) for lang, words in _STOPWORDS.items()}
+        best = max(hits, key=hits.get)
+        if hits[best] >= _MIN_HITS_IDIOMA and best not in self.languages and hits[best] > max(
+            hits.get(l, 0) for l in self.languages
+        ):
+            return self._reject("language")
+        return True
+
+    def stats(self):
+        return {"accepted": self.accepted, "rejected": dict(self.rejected)}
+
+    def summary(self):
+        total = sum(self.rejected.values())
+        detalle = ", ".join(f"{k}={v}" for k, v in sorted(self.rejected.items())) or "ninguno"
+        return f"🧹 Filtro: {self.accepted} aceptados, {total} descartados ({detalle})"
@@ -1,13 +1,70 @@
 import argparse
 import os
 from multiprocessing import Pool, cpu_count
-from ingestion.warc_reader import process_warc_file
+from ingestion.warc_reader import process_warc_file, make_writer, default_output_path, HEADER
+from ingestion.cdx import process_cdx, MAX_GAP
+from ingestion.checkpoint import CheckpointStore
+from ingestion.download_cc import DEFAULT_BASE_URL
+from ingestion.filters import RecordFilter, DEFAULT_CONTENT_TYPES
+from ingestion.metrics import IngestionStats
+from ingestion.pipeline import process_warc_file_parallel
+from ingestion.stream import process_warc_url
+from ingestion.writer import find_shards, shard_dir_for, write_manifest, merge_shards, recover_merge
 
 def process_single_file(args):
-    filepath, limit = args
+    (filepath, limit, output_format, cleaner_mode, batch_size, flush_interval,
+     record_filter, checkpoint_path, collect_metrics) = args
     print(f"\n📥 Procesando archivo en paralelo: {filepath}")
-    process_warc_file(filepath, limit)
-    return filepath
+    # Cada worker abre su propia conexión al checkpoint compartido
+    checkpoint = CheckpointStore(checkpoint_path) if checkpoint_path else None
+    if checkpoint is not None and checkpoint.is_done(filepath):
+        print(f"✔ Ya procesado según el checkpoint, omitiendo: {filepath}")
+        checkpoint.close()
+        return None, None
+    # Cada worker escribe en su propio shard con un único manejador con buffer
+    shard_id = f"{os.getpid()}-{os.path.basename(filepath).replace('.warc.gz', '')}"
+    # Métricas propias del worker; el proceso principal las agrega con merge()
+    stats = IngestionStats() if collect_metrics else None
+    try:
+        with make_writer(output_format, shard_id=shard_id,
+                         batch_size=batch_size, flush_interval=flush_interval) as writer:
+            process_warc_file(filepath, limit, writer=writer, cleaner_mode=cleaner_mode,
+                              record_filter=record_filter, checkpoint=checkpoint, stats=stats)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    if stats is not None:
+        stats.add_filter(record_filter)
+    return writer.info(), stats
+
+def build_filter(args):
+    """Crea el RecordFilter a partir de los argumentos (None si no se pidió filtrado)."""
+    if not args.filter:
+        return None
+    return RecordFilter(
+        content_types=args.content_types,
+        statuses=args.status,
+        max_bytes=args.max_bytes or None,
+        tlds=args.tlds,
+        domains=args.domains,
+        url_include=args.url_include,
+        url_exclude=args.url_exclude,
+        languages=args.languages,
+    )
+
+def write_metrics(stats, args, record_filter=None):
+    """Cierra el reloj de las métricas y escribe los reportes pedidos."""
+    if stats is None:
+        return
+    stats.add_filter(record_filter)
+    stats.stop()
+    print(stats.summary())
+    if args.metrics_out:
+        stats.write_json(args.metrics_out)
+        print(f"📊 Reporte de métricas: {args.metrics_out}")
+    if args.prometheus_out:
+        stats.write_prometheus(args.prometheus_out)
+        print(f"📊 Métricas Prometheus: {args.prometheus_out}")
 
 def main():
     parser = argparse.ArgumentParser(
@@ -16,21 +73,118 @@ def main():
     )
     parser.add_argument("--file", type=str, help="Ruta a un archivo .warc.gz específico")
     parser.add_argument("--dir", type=str, help="Ruta a directorio con archivos .warc.gz")
+    parser.add_argument("--url", type=str, nargs="+",
+                       help="URL(s) de .warc.gz a procesar en streaming mientras se descargan")
+    parser.add_argument("--tee-dir", type=str, default=None,
+                       help="Con --url: guardar también una copia del WARC en este directorio")
+    parser.add_argument("--cdx", type=str, nargs="+",
+                       help="Índice(s) CDXJ/Parquet locales: descarga solo los registros seleccionados por rango de bytes")
+    parser.add_argument("--cdx-base-url", type=str, default=DEFAULT_BASE_URL,
+                       help="Con --cdx: prefijo HTTP de los WARC referenciados por el índice")
+    parser.add_argument("--cdx-workers", type=int, default=8,
+                       help="Con --cdx: peticiones Range simultáneas")
+    parser.add_argument("--cdx-max-gap", type=int, default=MAX_GAP,
+                       help="Con --cdx: hueco máximo en bytes para combinar registros vecinos en una petición")
     parser.add_argument("--limit", type=int, default=50, 
                        help="Páginas por archivo (0 = ilimitado, útil para procesamiento masivo)")
+    parser.add_argument("--format", type=str, default="csv", choices=["csv", "parquet"],
+                       help="Formato de salida: CSV plano o Parquet particionado por fecha")
+    parser.add_argument("--cleaner", type=str, default="full", choices=["full", "fast"],
+                       help="Extracción HTML: full (BeautifulSoup + Readability) o fast (un solo parseo lxml)")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Con --file o --url: procesos limpiadores del pipeline intra-archivo (1 = serial)")
+    parser.add_argument("--filter", action="store_true",
+                       help="Descartar registros por cabeceras antes de leer el cuerpo")
+    parser.add_argument("--content-types", type=str, nargs="*", default=list(DEFAULT_CONTENT_TYPES),
+                       help="Con --filter: tipos MIME aceptados")
+    parser.add_argument("--status", type=int, nargs="*", default=[200],
+                       help="Con --filter: códigos HTTP aceptados")
+    parser.add_argument("--max-bytes", type=int, default=5 * 1024 * 1024,
+                       help="Con --filter: tamaño máximo del registro (0 = sin límite)")
+    parser.add_argument("--tlds", type=str, nargs="*", default=None,
+                       help="Con --filter o --cdx: sufijos aceptados, p.ej. co")
+    parser.add_argument("--domains", type=str, nargs="*", default=None,
+                       help="Con --filter o --cdx: dominios aceptados, p.ej. eltiempo.com semana.com")
+    parser.add_argument("--url-include", type=str, nargs="*", default=None,
+                       help="Con --filter o --cdx: regex que debe cumplir la URL")
+    parser.add_argument("--url-exclude", type=str, nargs="*", default=None,
+                       help="Con --filter: regex de rutas a descartar")
+    parser.add_argument("--languages", type=str, nargs="*", default=None,
+                       help="Con --filter: idiomas aceptados, p.ej. es")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                       help="Archivo SQLite de checkpoints: omite WARC terminados, reanuda los parciales "
+                            "(con --url, mediante peticiones Range) y evita emitir URLs repetidas. "
+                            "No disponible con --cdx")
+    parser.add_argument("--batch-size", type=int, default=500,
+                       help="Filas acumuladas en memoria antes de escribir a disco")
+    parser.add_argument("--flush-interval", type=float, default=5.0,
+                       help="Segundos máximos entre escrituras a disco")
+    parser.add_argument("--no-merge", action="store_true",
+                       help="No combinar los shards en output.csv; solo dejar el manifiesto")
+    parser.add_argument("--metrics-out", type=str, default=None,
+                       help="Archivo JSON con tiempos por etapa, throughput, rechazos y latencia p50/p95")
+    parser.add_argument("--prometheus-out", type=str, default=None,
+                       help="Archivo de texto con las mismas métricas en formato Prometheus")
 
     args = parser.parse_args()
+    if args.checkpoint and args.cdx:
+        parser.error("--checkpoint no se puede usar con --cdx: los registros se piden por rangos sueltos "
+                     "y no hay un offset por archivo desde el cual reanudar")
 
     # Convertir limit=0 a None para procesamiento ilimitado
     limit = None if args.limit == 0 else args.limit
-    
+    record_filter = build_filter(args)
+    stats = IngestionStats() if args.metrics_out or args.prometheus_out else None
+
     if args.file:
         print(f"📥 Procesando archivo: {args.file}")
         print(f"⚙️ Límite: {'ILIMITADO (procesará todo el archivo)' if limit is None else f'{limit} páginas'}")
-        process_warc_file(args.file, limit=limit)
+        checkpoint = CheckpointStore(args.checkpoint) if args.checkpoint else None
+        try:
+            with make_writer(args.format, batch_size=args.batch_size,
+                             flush_interval=args.flush_interval) as writer:
+                if args.workers > 1:
+                    print(f"⚙️ Pipeline paralelo con {args.workers} workers")
+                    process_warc_file_parallel(args.file, limit=limit, writer=writer, cleaner_mode=args.cleaner,
+                                               workers=args.workers, record_filter=record_filter,
+                                               checkpoint=checkpoint, stats=stats)
+                else:
+                    process_warc_file(args.file, limit=limit, writer=writer, cleaner_mode=args.cleaner,
+                                      record_filter=record_filter, checkpoint=checkpoint, stats=stats)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        write_metrics(stats, args, record_filter)
+        return
+
+    if args.url:
+        print(f"⚙️ Límite: {'ILIMITADO' if limit is None else f'{limit} páginas'} por archivo")
+        checkpoint = CheckpointStore(args.checkpoint) if args.checkpoint else None
+        try:
+            with make_writer(args.format, batch_size=args.batch_size,
+                             flush_interval=args.flush_interval) as writer:
+                for url in args.url:
+                    process_warc_url(url, limit=limit, writer=writer, cleaner_mode=args.cleaner,
+                                     record_filter=record_filter, workers=args.workers, tee_dir=args.tee_dir,
+                                     checkpoint=checkpoint, stats=stats)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        write_metrics(stats, args, record_filter)
+        return
+
+    if args.cdx:
+        # La selección por dominio/URL/MIME/estado se hace sobre el índice, antes de descargar
+        with make_writer(args.format, batch_size=args.batch_size,
+                         flush_interval=args.flush_interval) as writer:
+            process_cdx(args.cdx, base_url=args.cdx_base_url, limit=limit, writer=writer,
+                        cleaner_mode=args.cleaner, record_filter=record_filter,
+                        workers=args.cdx_workers, max_gap=args.cdx_max_gap,
+                        domains=args.domains, tlds=args.tlds, url_include=args.url_include,
+                        mimes=args.content_types, statuses=args.status, stats=stats)
+        write_metrics(stats, args, record_filter)
         return
 
-    
     if args.dir:
         # Validate directory exists
         if not os.path.isdir(args.dir):
@@ -49,12 +203,43 @@ def main():
         print(f"⚙️ Ejecutando procesamiento paralelo con {cpu_count()} núcleos...\n")
 
         with Pool(cpu_count()) as pool:
-            pool.map(process_single_file, [(f, limit) for f in warc_files])
+            results = pool.map(
+                process_single_file,
+                [(f, limit, args.format, args.cleaner, args.batch_size, args.flush_interval,
+                  record_filter, args.checkpoint, stats is not None)
+                 for f in warc_files],
+            )
+        if stats is not None:
+            for _, worker_stats in results:
+                if worker_stats is not None:
+                    stats.merge(worker_stats)
+        shards = [info for info, _ in results if info is not None]
+
+        if args.format == "parquet":
+            total = sum(s["rows"] for s in shards)
+            print(f"🗂️ {total} filas escritas en {shards[0]['path'] if shards else 'data/output_parquet'}")
+            write_metrics(stats, args)
+            print("\n✔ Procesamiento paralelo completado.")
+            return
+
+        output_path = default_output_path()
+        manifest_path = os.path.join(shard_dir_for(output_path), "manifest.json")
+        recover_merge(manifest_path, output_path)
+        # Los shards de esta ejecución vienen con sus filas contadas; solo se leen
+        # los huérfanos de una ejecución interrumpida
+        shards = find_shards(output_path, known=shards)
+        manifest = write_manifest(manifest_path, shards, HEADER)
+        print(f"🗂️ Manifiesto con {len(shards)} shards ({manifest['total_rows']} filas): {manifest_path}")
+
+        if not args.no_merge:
+            added = merge_shards(manifest_path, output_path)
+            print(f"🔗 {added} filas combinadas en {output_path}")
 
+        write_metrics(stats, args)
         print("\n✔ Procesamiento paralelo completado.")
         return
 
-    print("⚠️ Debes pasar --file o --dir")
+    print("⚠️ Debes pasar --file, --dir, --url o --cdx")
 
 if __name__ == "__main__":
     main()
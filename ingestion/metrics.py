@@ -0,0 +1,176 @@
+import json
+import os
+import time
+from array import array
+from collections import Counter
+
+from ingestion.writer import _atomic_write_text
+
+# Etapas medidas, en el orden en que aparecen en el reporte
+STAGES = ["fetch", "decompress", "warc_parse", "clean", "domain", "write", "checkpoint"]
+
+
+class TimedStream:
+    """Envuelve un stream y acumula en `stats` el tiempo pasado en read() (E/S + descompresión gzip)."""
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    def read(self, *args):
+        t0 = time.perf_counter()
+        data = self._stream.read(*args)
+        self._stats.add("decompress", time.perf_counter() - t0)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class IngestionStats:
+    """
+    Métricas de una ingesta: segundos por etapa, registros, bytes, rechazos del
+    filtro y latencia de limpieza por página.
+
+    Las etapas son:
+        - fetch: espera de las peticiones Range (solo en modo --cdx)
+        - decompress: read() sobre el stream del WARC (E/S y descompresión gzip; con
+          checkpoints el archivo se lee en crudo y la descompresión cae en warc_parse)
+        - warc_parse: resto del tiempo en ArchiveIterator (cabeceras, filtro, lectura del cuerpo)
+        - clean: clean_html (con el detalle por fase en `clean_phases`)
+        - domain: tldextract
+        - write: write_row del escritor (incluye los volcados a disco)
+        - checkpoint: reclamos de URL y commits en SQLite
+
+    Las instancias se pueden sumar con merge(), así que cada worker del Pool
+    devuelve la suya y el proceso principal las agrega.
+    """
+
+    def __init__(self):
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.clean_phases = {}
+        self.files = 0
+        self.records = 0
+        self.rows = 0
+        self.bytes = 0
+        self.accepted = 0
+        self.rejected = Counter()
+        self.clean_latencies = array("d")
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_filter(self, record_filter):
+        """Suma los contadores de un RecordFilter (aceptados y rechazos por regla)."""
+        if record_filter is None:
+            return
+        self.accepted += record_filter.accepted
+        self.rejected.update(record_filter.rejected)
+
+    def merge(self, other):
+        for stage, seconds in other.stages.items():
+            self.add(stage, seconds)
+        for fase, seconds in other.clean_phases.items():
+            self.clean_phases[fase] = self.clean_phases.get(fase, 0.0) + seconds
+        self.files += other.files
+        self.records += other.records
+        self.rows += other.rows
+        self.bytes += other.bytes
+        self.accepted += other.accepted
+        self.rejected.update(other.rejected)
+        self.clean_latencies.extend(other.clean_latencies)
+        return self
+
+    def stop(self):
+        """Fija el tiempo total de pared (en el proceso principal, tras agregar los workers)."""
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def percentile(self, q):
+        if not self.clean_latencies:
+            return 0.0
+        values = sorted(self.clean_latencies)
+        idx = min(len(values) - 1, max(0, int(round(q / 100 * (len(values) - 1)))))
+        return values[idx]
+
+    def to_dict(self):
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        return {
+            "elapsed_seconds": elapsed,
+            "files": self.files,
+            "records": self.records,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "records_per_sec": self.records / elapsed if elapsed > 0 else 0.0,
+            "rows_per_sec": self.rows / elapsed if elapsed > 0 else 0.0,
+            "mb_per_sec": (self.bytes / 1e6) / elapsed if elapsed > 0 else 0.0,
+            "stage_seconds": dict(self.stages),
+            "clean_phase_seconds": dict(self.clean_phases),
+            "filter": {"accepted": self.accepted, "rejected": dict(self.rejected)},
+            "clean_latency_ms": {
+                "count": len(self.clean_latencies),
+                "p50": self.percentile(50) * 1000,
+                "p95": self.percentile(95) * 1000,
+                "max": max(self.clean_latencies, default=0.0) * 1000,
+            },
+        }
+
+    def summary(self):
+        d = self.to_dict()
+        etapas = ", ".join(f"{k}={v:.2f}s" for k, v in d["stage_seconds"].items() if v)
+        lat = d["clean_latency_ms"]
+        return (f"📊 {d['records']} registros, {d['rows']} filas en {d['elapsed_seconds']:.1f}s "
+                f"({d['records_per_sec']:.1f} reg/s, {d['mb_per_sec']:.2f} MB/s) | {etapas} | "
+                f"limpieza p50={lat['p50']:.1f}ms p95={lat['p95']:.1f}ms")
+
+    def to_prometheus(self, prefix="ingestion"):
+        """Formato de texto de Prometheus (para el textfile collector de node_exporter)."""
+        d = self.to_dict()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Segundos acumulados por etapa",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{k}"}} {v:.6f}' for k, v in d["stage_seconds"].items()]
+        for name, value, help_text in [
+            ("files_total", d["files"], "Archivos WARC procesados"),
+            ("records_total", d["records"], "Registros response leídos"),
+            ("rows_total", d["rows"], "Filas escritas"),
+            ("bytes_total", d["bytes"], "Bytes de HTML leídos"),
+            ("filter_accepted_total", self.accepted, "Registros aceptados por el filtro"),
+        ]:
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} counter",
+                      f"{prefix}_{name} {value}"]
+        lines += [f"# HELP {prefix}_filter_rejected_total Registros descartados por regla",
+                  f"# TYPE {prefix}_filter_rejected_total counter"]
+        lines += [f'{prefix}_filter_rejected_total{{rule="{k}"}} {v}' for k, v in sorted(self.rejected.items())]
+        for name, value, help_text in [
+            ("elapsed_seconds", d["elapsed_seconds"], "Duración de la ingesta"),
+            ("records_per_second", d["records_per_sec"], "Registros por segundo"),
+            ("bytes_per_second", self.bytes / d["elapsed_seconds"] if d["elapsed_seconds"] > 0 else 0.0,
+             "Bytes por segundo"),
+        ]:
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} gauge",
+                      f"{prefix}_{name} {value:.6f}"]
+        lines += [f"# HELP {prefix}_clean_latency_seconds Latencia de limpieza por página",
+                  f"# TYPE {prefix}_clean_latency_seconds summary"]
+        for q in (0.5, 0.95):
+            lines.append(f'{prefix}_clean_latency_seconds{{quantile="{q}"}} {self.percentile(q * 100):.6f}')
+        lines.append(f"{prefix}_clean_latency_seconds_sum {sum(self.clean_latencies):.6f}")
+        lines.append(f"{prefix}_clean_latency_seconds_count {len(self.clean_latencies)}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        _ensure_parent(path)
+        _atomic_write_text(path, json.dumps(self.to_dict(), indent=2, ensure_ascii=False))
+
+    def write_prometheus(self, path):
+        _ensure_parent(path)
+        _atomic_write_text(path, self.to_prometheus())
+
+
+def _ensure_parent(path):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
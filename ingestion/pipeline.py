@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from contextlib import nullcontext
+from multiprocessing import Process, Queue, cpu_count
+
+from ingestion.metrics import IngestionStats
+from ingestion.warc_reader import build_row, iter_responses, make_writer, open_warc
+
+# Registros por mensaje entre etapas (reduce el costo de serializar por cola)
+BATCH_RECORDS = 16
+
+
+def _cleaner_worker(task_q, result_q, cleaner_mode, collect_stats=False):
+    """
+    Etapa de limpieza: recibe lotes [(seq, url, html, offset)] y devuelve [(seq, (url, offset, fila|None))].
+
+    Con collect_stats, antes del centinela final envía su IngestionStats con los
+    tiempos de limpieza para que la etapa escritora los agregue.
+    """
+    stats = IngestionStats() if collect_stats else None
+    try:
+        while True:
+            batch = task_q.get()
+            if batch is None:
+                return
+            result_q.put([(seq, (url, offset, build_row(url, html, cleaner_mode, stats)))
+                          for seq, url, html, offset in batch])
+    finally:
+        if stats is not None:
+            result_q.put(stats)
+        result_q.put(None)
+
+
+def _send_batch(task_q, slots, stop, batch):
+    """Envía un lote cuando hay un turno libre en la ventana; False si se pidió parar."""
+    while not slots.acquire(timeout=0.1):
+        if stop.is_set():
+            return False
+    task_q.put(batch)  # bloquea si la cola está llena (backpressure)
+    return True
+
+
+def _reader(filepath, task_q, n_workers, stop, errors, record_filter, start_offset, raw, stream, stats, slots):
+    """
+    Etapa lectora: descomprime el WARC y envía lotes numerados a los limpiadores.
+
+    Cada lote ocupa un turno de `slots` hasta que la etapa escritora lo consume
+    en orden, así el lector no se adelanta más de la ventana aunque un lote
+    lento retenga los resultados posteriores.
+    """
+    try:
+        seq = 0
+        batch = []
+        source = nullcontext(stream) if stream is not None else open_warc(filepath, start_offset, raw=raw)
+        with source as warc_stream:
+            for url, html, offset in iter_responses(warc_stream, record_filter, base_offset=start_offset,
+                                                    stats=stats):
+                if stop.is_set():
+                    break
+                batch.append((seq, url, html, offset))
+                seq += 1
+                if len(batch) >= BATCH_RECORDS:
+                    if not _send_batch(task_q, slots, stop, batch):
+                        break
+                    batch = []
+        if batch and not stop.is_set():
+            _send_batch(task_q, slots, stop, batch)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        for _ in range(n_workers):
+            task_q.put(None)
+
+
+def process_warc_file_parallel(filepath, limit=None, writer=None, output_format="csv",
+                               cleaner_mode="full", workers=None, queue_size=None, record_filter=None,
+                               checkpoint=None, stream=None, stats=None):
+    """
+    Procesa un único WARC con un pipeline productor/consumidor.
+
+    Un hilo lector descomprime e itera los registros, un grupo de procesos
+    ejecuta clean_html y el hilo principal escribe. Las etapas se conectan con
+    colas acotadas, así que el lector se detiene cuando los limpiadores no dan
+    abasto. Las filas se reordenan por número de registro antes de escribirse,
+    por lo que la salida (y el efecto de `limit`) es idéntica a process_warc_file;
+    el lector no se adelanta más de `queue_size` lotes a la escritura, así que
+    el reordenamiento también queda acotado.
+
+    Args:
+        filepath: Ruta al archivo .warc.gz
+        limit: Número máximo de páginas a guardar (None = ilimitado)
+        writer: Escritor con método write_row; si es None se crea con make_writer
+        output_format: "csv" o "parquet" (solo si writer es None)
+        cleaner_mode: Modo de clean_html ("full" o "fast")
+        workers: Procesos limpiadores (por defecto cpu_count() - 1)
+        queue_size: Lotes máximos en cada cola y lotes leídos sin escribir
+            (por defecto 2 * workers)
+        record_filter: RecordFilter opcional; se aplica en la etapa lectora
+        checkpoint: CheckpointStore opcional; la etapa escritora reclama URLs y
+            registra el offset durable igual que process_warc_file
+        stream: Stream ya abierto (p.ej. respuesta HTTP) a leer en lugar de `filepath`;
+            con checkpoint, igual que en process_warc_file
+        stats: IngestionStats opcional; el lector y el escritor lo actualizan
+            directamente y cada limpiador envía el suyo al terminar
+
+    Returns:
+        Número de páginas guardadas.
+    """
+    workers = workers or max(1, cpu_count() - 1)
+    queue_size = queue_size or 2 * workers
+
+    start_offset, prev_rows = 0, 0
+    if checkpoint is not None:
+        if checkpoint.is_done(filepath):
+            print(f"✔ Ya procesado según el checkpoint, omitiendo: {filepath}")
+            return 0
+        start_offset, prev_rows = checkpoint.resume(filepath)
+        if start_offset:
+            print(f"↻ Reanudando {os.path.basename(filepath)} desde el offset {start_offset}")
+
+    own_writer = writer is None
+    if own_writer:
+        writer = make_writer(output_format)
+
+    task_q = Queue(maxsize=queue_size)
+    result_q = Queue(maxsize=queue_size)
+    # Lotes leídos y aún no escritos (en colas, limpiándose o esperando turno en
+    # `pending`): acota la memoria cuando un lote lento frena el reordenamiento
+    slots = threading.Semaphore(queue_size)
+    stop = threading.Event()
+    errors = []
+
+    procs = [Process(target=_cleaner_worker, args=(task_q, result_q, cleaner_mode, stats is not None),
+                     daemon=True)
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    reader = threading.Thread(target=_reader, args=(filepath, task_q, workers, stop, errors, record_filter,
+                                                    start_offset, checkpoint is not None, stream, stats,
+                                                    slots),
+                              daemon=True)
+    reader.start()
+
+    count = 0
+    next_seq = 0
+    pending = {}
+    finished = 0
+    last_offset = start_offset
+    duplicates = 0
+    worker_stats = []
+    try:
+        # Etapa escritora: se sigue drenando resultados aun después de alcanzar
+        # el límite para que los limpiadores puedan terminar.
+        while finished < workers:
+            results = result_q.get()
+            if results is None:
+                finished += 1
+                continue
+            if isinstance(results, IngestionStats):
+                worker_stats.append(results)
+                continue
+            if stop.is_set():
+                continue
+            # Lotes completos por su primer número de registro
+            pending[results[0][0]] = results
+            while next_seq in pending and not stop.is_set():
+                batch = pending.pop(next_seq)
+                next_seq += len(batch)
+                slots.release()
+                for _, (url, offset, row) in batch:
+                    if row is None:
+                        continue
+                    t0 = time.perf_counter()
+                    if checkpoint is not None and not checkpoint.claim_url(url, filepath, offset):
+                        duplicates += 1
+                        continue
+                    t1 = time.perf_counter()
+                    rows_before = writer.rows_written
+                    writer.write_row(row)
+                    count += 1
+                    last_offset = offset
+                    t2 = time.perf_counter()
+                    if checkpoint is not None and writer.rows_written != rows_before:
+                        checkpoint.commit(filepath, offset, prev_rows + count)
+                    if stats is not None:
+                        stats.add("write", t2 - t1)
+                        stats.add("checkpoint", (t1 - t0) + (time.perf_counter() - t2))
+                    if count % 100 == 0:
+                        print(f"  ⚙️ Procesados {count} registros...")
+                    if limit is not None and count >= limit:
+                        stop.set()
+                        pending.clear()
+                        break
+    except BaseException:
+        for p in procs:
+            p.terminate()
+        raise
+    finally:
+        stop.set()
+        for p in procs:
+            p.join()
+        if own_writer:
+            writer.close()
+
+    reader.join()
+    if errors:
+        raise errors[0]
+    failed = [p.exitcode for p in procs if p.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"{len(failed)} procesos limpiadores terminaron con error")
+
+    if checkpoint is not None:
+        truncated = limit is not None and count >= limit
+        writer.flush()
+        checkpoint.commit(filepath, last_offset, prev_rows + count, done=not truncated)
+        if truncated:
+            checkpoint.release_after(filepath, last_offset)
+        if duplicates:
+            print(f"🔁 {duplicates} URLs ya vistas omitidas")
+
+    if stats is not None:
+        # Se agrega al final, cuando el hilo lector ya no modifica `stats`
+        for ws in worker_stats:
+            stats.merge(ws)
+        stats.files += 1
+        stats.rows += count
+    if record_filter is not None:
+        print(record_filter.summary())
+    print(f"\n✔ Procesadas {count} páginas con {workers} workers y guardadas en {os.path.basename(writer.filepath)}\n")
+    return count
@@ -0,0 +1,193 @@
+import os
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from ingestion.download_cc import make_session
+from ingestion.pipeline import process_warc_file_parallel
+from ingestion.warc_reader import process_warc_file
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class PrefetchReader:
+    """
+    Lector que descarga en un hilo de fondo mientras el consumidor parsea.
+
+    Un hilo lee bloques de `source` (p.ej. response.raw) hacia una cola acotada
+    y, si se indica, los escribe también en `tee`; el hilo principal consume
+    con read(). Así la red y la descompresión/limpieza avanzan en paralelo y la
+    memoria queda acotada a `max_chunks` bloques.
+    """
+
+    def __init__(self, source, tee=None, chunk_size=CHUNK_SIZE, max_chunks=16):
+        self.source = source
+        self.tee = tee
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self._queue = queue.Queue(maxsize=max_chunks)
+        # Bloques recibidos sin leer; _pos es la posición de lectura en el primero.
+        # read() corta vistas de los bloques en lugar de recortar un buffer
+        # acumulado (warcio lee de a 16 KB), así cada byte se copia una vez
+        self._chunks = deque()
+        self._pos = 0
+        self._available = 0
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _fill(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self.source.read(self.chunk_size)
+                if not chunk:
+                    break
+                if self.tee is not None:
+                    self.tee.write(chunk)
+                self.bytes_read += len(chunk)
+                self._queue.put(chunk)
+            self._queue.put(b"")
+        except Exception as e:
+            self._queue.put(e)
+
+    def _next_chunk(self):
+        item = self._queue.get()
+        if isinstance(item, Exception):
+            raise item
+        if not item:
+            self._eof = True
+        return item
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or self._available < size):
+            chunk = self._next_chunk()
+            if chunk:
+                self._chunks.append(chunk)
+                self._available += len(chunk)
+        if size < 0 or size > self._available:
+            size = self._available
+
+        parts = []
+        pending = size
+        while pending:
+            chunk = self._chunks[0]
+            take = min(pending, len(chunk) - self._pos)
+            if self._pos == 0 and take == len(chunk):
+                parts.append(chunk)
+            else:
+                parts.append(memoryview(chunk)[self._pos:self._pos + take])
+            self._pos += take
+            pending -= take
+            if self._pos == len(chunk):
+                self._chunks.popleft()
+                self._pos = 0
+        self._available -= size
+        if len(parts) == 1:
+            return bytes(parts[0])  # sin copia si es un bloque entero
+        return b"".join(parts)
+
+    def drain(self):
+        """Consume el resto del stream (para completar la copia en disco)."""
+        while not self._eof:
+            self._next_chunk()
+        self._chunks.clear()
+        self._pos = 0
+        self._available = 0
+
+    def close(self):
+        self._stop.set()
+        # Vaciar la cola para desbloquear al hilo si estaba esperando espacio
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._thread.join()
+
+
+@contextmanager
+def open_url_stream(url, tee_dir=None, session=None, timeout=60, offset=0):
+    """
+    Abre el cuerpo de una URL .warc.gz como stream comprimido para ArchiveIterator.
+
+    Si `tee_dir` está definido, los bytes recibidos se copian a
+    `<tee_dir>/<archivo>.part`; al salir se completa la descarga, se verifica
+    el tamaño contra Content-Length y se renombra al nombre final.
+
+    Con `offset` > 0 se pide el resto del archivo con una petición Range (para
+    reanudar desde un checkpoint); en ese caso no se guarda copia.
+    """
+    session = session or make_session(1)
+    headers = {"Range": f"bytes={offset}-"} if offset else None
+    with session.get(url, stream=True, timeout=timeout, headers=headers) as r:
+        r.raise_for_status()
+        if offset and r.status_code != 206:
+            raise IOError(f"El servidor no admite peticiones Range; no se puede reanudar {url} desde {offset}")
+        r.raw.decode_content = False  # warcio descomprime los miembros gzip
+
+        tee = None
+        if tee_dir and offset:
+            print(f"⚠️ Reanudando desde el offset {offset}: no se guarda copia de {url}")
+        elif tee_dir:
+            os.makedirs(tee_dir, exist_ok=True)
+            out_path = os.path.join(tee_dir, os.path.basename(url))
+            part_path = out_path + ".part"
+            tee = open(part_path, "wb")
+
+        reader = PrefetchReader(r.raw, tee=tee)
+        completed = False
+        try:
+            yield reader
+            completed = True
+        finally:
+            if tee is not None and completed:
+                reader.drain()
+            reader.close()
+            if tee is not None:
+                tee.close()
+                expected = r.headers.get("Content-Length")
+                size = os.path.getsize(part_path)
+                if completed and (expected is None or int(expected) == size):
+                    os.replace(part_path, out_path)
+                    print(f"💾 Copia guardada en {out_path} ({size} bytes)")
+                elif completed:
+                    print(f"⚠️ Copia incompleta ({size}/{expected} bytes), se conserva {part_path}")
+
+
+def process_warc_url(url, limit=None, writer=None, output_format="csv", cleaner_mode="full",
+                     record_filter=None, workers=1, tee_dir=None, timeout=60, checkpoint=None, stats=None):
+    """
+    Descarga y procesa un WARC remoto al mismo tiempo, sin esperar a tenerlo en disco.
+
+    Args:
+        url: URL del .warc.gz
+        workers: >1 usa el pipeline paralelo de limpieza
+        tee_dir: Directorio opcional donde guardar también una copia del WARC
+        checkpoint: CheckpointStore opcional con la URL como clave: omite las URL
+            terminadas y reanuda las parciales con una petición Range desde el
+            último registro escrito
+        (resto de argumentos como en process_warc_file)
+
+    Returns:
+        Número de páginas guardadas.
+    """
+    offset = 0
+    if checkpoint is not None:
+        if checkpoint.is_done(url):
+            print(f"✔ Ya procesado según el checkpoint, omitiendo: {url}")
+            return 0
+        state = checkpoint.file_state(url)
+        offset = state[1] if state is not None else 0
+
+    print(f"🌐 Procesando en streaming: {url}")
+    with open_url_stream(url, tee_dir=tee_dir, timeout=timeout, offset=offset) as stream:
+        if workers > 1:
+            return process_warc_file_parallel(url, limit=limit, writer=writer, output_format=output_format,
+                                              cleaner_mode=cleaner_mode, workers=workers,
+                                              record_filter=record_filter, checkpoint=checkpoint,
+                                              stream=stream, stats=stats)
+        return process_warc_file(url, limit=limit, writer=writer, output_format=output_format,
+                                 cleaner_mode=cleaner_mode, record_filter=record_filter, checkpoint=checkpoint,
+                                 stream=stream, stats=stats)
@@ -1,67 +1,246 @@
 from warcio.archiveiterator import ArchiveIterator # Librería para leer archivos WARC
-from ingestion.writer import save_row_to_csv
+from ingestion.writer import BufferedCSVWriter, ShardedCSVWriter, ParquetPartitionWriter
 from ingestion.cleaner import clean_html
 import gzip # me permite abrir archivos comprimidos con gzip
 import tldextract # me permite extraer dominios de URLs
 import os
+import time
+from contextlib import nullcontext
+from ingestion.metrics import TimedStream
 
-def process_warc_file(filepath, limit=None):
+HEADER = ["url", "dominio", "titulo", "fecha", "texto", "longitud"]
+
+
+def default_output_path():
+    output_path = os.path.join(os.path.dirname(__file__), "..", "data", "output.csv")
+    return os.path.abspath(output_path)
+
+
+def default_parquet_path():
+    output_path = os.path.join(os.path.dirname(__file__), "..", "data", "output_parquet")
+    return os.path.abspath(output_path)
+
+
+def make_writer(output_format="csv", shard_id=None, batch_size=500, flush_interval=5.0):
+    """
+    Crea el escritor de salida según el formato.
+
+    Args:
+        output_format: "csv" (data/output.csv) o "parquet" (data/output_parquet/fecha=.../)
+        shard_id: Identificador del worker. En CSV implica escribir un shard propio
+            que luego se combina con merge_shards; en Parquet se usa en el nombre de archivo.
+    """
+    if output_format == "parquet":
+        return ParquetPartitionWriter(default_parquet_path(), HEADER, shard_id=shard_id or "0",
+                                      batch_size=batch_size, flush_interval=flush_interval)
+    if output_format != "csv":
+        raise ValueError(f"Formato de salida desconocido: {output_format}")
+    if shard_id is not None:
+        return ShardedCSVWriter(default_output_path(), HEADER, shard_id,
+                                batch_size=batch_size, flush_interval=flush_interval)
+    return BufferedCSVWriter(default_output_path(), HEADER,
+                             batch_size=batch_size, flush_interval=flush_interval)
+
+
+def open_warc(filepath, offset=0, raw=False):
+    """
+    Abre un WARC para iterarlo.
+
+    Con raw=True se abre el archivo sin descomprimir y warcio descomprime cada
+    miembro gzip; así los offsets de registro son posiciones reales del archivo
+    y se puede reanudar con seek(offset) (formato por-registro de Common Crawl).
+    """
+    if not raw:
+        return gzip.open(filepath, "rb")
+    stream = open(filepath, "rb")
+    stream.seek(offset)
+    return stream
+
+
+def iter_responses(stream, record_filter=None, base_offset=0, stats=None):
+    """
+    Genera (url, html, offset) por cada registro `response` con URL y cuerpo no vacíos.
+
+    `offset` es la posición del registro en el stream más `base_offset`.
+    Si se pasa un RecordFilter, los registros descartados por sus reglas de
+    cabecera se saltan sin leer el cuerpo. Con `stats` (IngestionStats) se
+    mide el tiempo de lectura/descompresión y el de parseo WARC por separado.
+    """
+    if stats is not None:
+        stream = TimedStream(stream, stats)
+        t0, dec0 = time.perf_counter(), stats.stages["decompress"]
+
+    iterator = ArchiveIterator(stream)
+    for record in iterator:
+
+        if record.rec_type != "response":
+            continue
+
+        url = record.rec_headers.get_header("WARC-Target-URI")
+
+        if record_filter is not None:
+            if not url or not record_filter.check_headers(record, url):
+                continue
+            body = record.content_stream()
+            head = body.read(record_filter.sniff_bytes) if record_filter.needs_sniff else b""
+            if not record_filter.check_language(record, head):
+                continue
+            record_filter.accepted += 1
+            html = head + body.read()
+        else:
+            html = record.content_stream().read()
+
+        if not html or not url:
+            continue
+
+        if stats is not None:
+            stats.records += 1
+            stats.bytes += len(html)
+            stats.add("warc_parse", time.perf_counter() - t0 - (stats.stages["decompress"] - dec0))
+
+        yield url, html, base_offset + iterator.get_record_offset()
+
+        if stats is not None:
+            t0, dec0 = time.perf_counter(), stats.stages["decompress"]
+
+    if stats is not None:
+        stats.add("warc_parse", time.perf_counter() - t0 - (stats.stages["decompress"] - dec0))
+
+
+def build_row(url, html, cleaner_mode="full", stats=None):
+    """Limpia el HTML y construye la fila de salida. Devuelve None si la limpieza falla."""
+    # --- limpiar contenido y extraer metadatos ---
+    t0 = time.perf_counter()
+    try:
+        titulo, fecha, texto = clean_html(html, mode=cleaner_mode,
+                                          timings=stats.clean_phases if stats is not None else None)
+    except:
+        return None
+    finally:
+        if stats is not None:
+            t1 = time.perf_counter()
+            stats.add("clean", t1 - t0)
+            stats.clean_latencies.append(t1 - t0)
+
+    t0 = time.perf_counter()
+    dominio = tldextract.extract(url).registered_domain
+    if stats is not None:
+        stats.add("domain", time.perf_counter() - t0)
+    longitud = len(texto)
+
+    # Construir fila
+    return {
+        "url": url,
+        "dominio": dominio,
+        "titulo": titulo,
+        "fecha": fecha,
+        "texto": texto,
+        "longitud": longitud
+    }
+
+
+def process_warc_file(filepath, limit=None, writer=None, output_format="csv", cleaner_mode="full",
+                      record_filter=None, checkpoint=None, stream=None, stats=None):
     """
     Procesa archivos WARC comprimidos (.warc.gz) de Common Crawl.
-    
+
     Args:
         filepath: Ruta al archivo .warc.gz
         limit: Número máximo de páginas a procesar (None = ilimitado para datos masivos)
+        writer: Escritor con método write_row (p.ej. ShardedCSVWriter). Si es None
+            se crea uno con make_writer(output_format).
+        output_format: "csv" o "parquet" (solo se usa si writer es None)
+        cleaner_mode: "full" (BeautifulSoup + Readability) o "fast" (un solo parseo con lxml)
+        record_filter: RecordFilter opcional aplicado a las cabeceras antes de leer el cuerpo
+        checkpoint: CheckpointStore opcional. Omite archivos ya terminados, reanuda
+            desde el último registro escrito y nunca emite una URL ya vista.
+        stream: Stream ya abierto (p.ej. el cuerpo de una respuesta HTTP). Si se
+            pasa, se lee en lugar de abrir `filepath`, que solo se usa como nombre.
+            Con checkpoint debe estar sin descomprimir y empezar en el offset
+            guardado para `filepath` (como lo abre process_warc_url).
+        stats: IngestionStats opcional donde se acumulan tiempos por etapa y contadores
+
+    Returns:
+        Número de páginas guardadas.
     """
     count = 0
-    output_path = os.path.join(os.path.dirname(__file__), "..", "data", "output.csv")
-    output_path = os.path.abspath(output_path)
+    start_offset, prev_rows = 0, 0
+    if checkpoint is not None:
+        if checkpoint.is_done(filepath):
+            print(f"✔ Ya procesado según el checkpoint, omitiendo: {filepath}")
+            return 0
+        start_offset, prev_rows = checkpoint.resume(filepath)
+        if start_offset:
+            print(f"↻ Reanudando {os.path.basename(filepath)} desde el offset {start_offset}")
 
+    own_writer = writer is None
+    if own_writer:
+        writer = make_writer(output_format)
 
-    header = ["url", "dominio", "titulo", "fecha", "texto", "longitud"]
+    last_offset = start_offset
+    duplicates = 0
+    truncated = False
+    try:
+        source = nullcontext(stream) if stream is not None else open_warc(filepath, start_offset, raw=checkpoint is not None)
+        with source as warc_stream:
+            for url, html, offset in iter_responses(warc_stream, record_filter, base_offset=start_offset,
+                                                    stats=stats):
+                row = build_row(url, html, cleaner_mode, stats)
+                if row is None:
+                    continue
 
-    with gzip.open(filepath, "rb") as stream:
-        for record in ArchiveIterator(stream):
+                # Se reclama solo tras limpiar con éxito (como el pipeline paralelo):
+                # una copia fallida no debe bloquear las copias válidas posteriores
+                if checkpoint is not None:
+                    t0 = time.perf_counter()
+                    claimed = checkpoint.claim_url(url, filepath, offset)
+                    if stats is not None:
+                        stats.add("checkpoint", time.perf_counter() - t0)
+                    if not claimed:
+                        duplicates += 1
+                        continue
 
-            if record.rec_type != "response":
-                continue
+                # Guardar en CSV (por lotes)
+                t0 = time.perf_counter()
+                rows_before = writer.rows_written
+                writer.write_row(row)
+                if stats is not None:
+                    stats.add("write", time.perf_counter() - t0)
 
-            url = record.rec_headers.get_header("WARC-Target-URI")
-            html = record.content_stream().read()
+                count += 1
+                last_offset = offset
 
-            if not html or not url:
-                continue
+                # Si el escritor volcó a disco, todo hasta este registro es durable
+                if checkpoint is not None and writer.rows_written != rows_before:
+                    t0 = time.perf_counter()
+                    checkpoint.commit(filepath, offset, prev_rows + count)
+                    if stats is not None:
+                        stats.add("checkpoint", time.perf_counter() - t0)
 
-            # --- limpiar contenido y extraer metadatos ---
-            try:
-                titulo, fecha, texto = clean_html(html)
-            except:
-                continue
+                # Mostrar progreso cada 100 registros
+                if count % 100 == 0:
+                    print(f"  ⚙️ Procesados {count} registros...")
+
+                # Detener si se alcanza el límite
+                if limit is not None and count >= limit:
+                    truncated = True
+                    break
+    finally:
+        if own_writer:
+            writer.close()
+
+    if checkpoint is not None:
+        writer.flush()
+        checkpoint.commit(filepath, last_offset, prev_rows + count, done=not truncated)
+        if truncated:
+            checkpoint.release_after(filepath, last_offset)
+        if duplicates:
+            print(f"🔁 {duplicates} URLs ya vistas omitidas")
 
-            dominio = tldextract.extract(url).registered_domain
-            longitud = len(texto)
-
-            # Construir fila
-            row = {
-                "url": url,
-                "dominio": dominio,
-                "titulo": titulo,
-                "fecha": fecha,
-                "texto": texto,
-                "longitud": longitud
-            }
-
-            # Guardar en CSV
-            save_row_to_csv(output_path, row, header)
-
-            count += 1
-            
-            # Mostrar progreso cada 100 registros
-            if count % 100 == 0:
-                print(f"  ⚙️ Procesados {count} registros...")
-            
-            # Detener si se alcanza el límite
-            if limit is not None and count >= limit:
-                break
-
-    print(f"\n✔ Procesadas {count} páginas y guardadas en output.csv\n")
\ No newline at end of file
+    if stats is not None:
+        stats.files += 1
+        stats.rows += count
+    if record_filter is not None:
+        print(record_filter.summary())
+    print(f"\n✔ Procesadas {count} páginas y guardadas en {os.path.basename(writer.filepath)}\n")
+    return count
@@ -1,5 +1,19 @@
 import csv
+import io
+import json
 import os
+import shutil
+import time
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None  # opcional: solo necesario para la salida en Parquet
+
+from analysis.utils.date import to_date
+
 
 def save_row_to_csv(filepath, row, header=None):
     # Ensure parent directory exists
@@ -17,3 +31,309 @@ def save_row_to_csv(filepath, row, header=None):
             writer.writeheader()
 
         writer.writerow(row)
+
+
+class BufferedCSVWriter:
+    """
+    Escritor CSV con buffer que mantiene un único manejador abierto.
+
+    Acumula filas en memoria y las escribe por lotes cuando se alcanza
+    `batch_size` filas o han pasado `flush_interval` segundos desde el último
+    volcado. Cada lote se serializa completo y se escribe con una sola llamada
+    seguida de fsync, de modo que un lote nunca queda a medias en disco.
+
+    Args:
+        filepath: Ruta del CSV de salida
+        header: Lista de columnas
+        batch_size: Filas por lote antes de volcar a disco
+        flush_interval: Segundos máximos entre volcados (None = solo por tamaño)
+    """
+
+    def __init__(self, filepath, header, batch_size=500, flush_interval=5.0):
+        self.filepath = filepath
+        self.header = list(header)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+        parent = os.path.dirname(filepath)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        self._fh = open(filepath, "a", newline="", encoding="utf-8")
+        # El encabezado se escribe solo si el archivo está vacío
+        self._needs_header = self._fh.tell() == 0
+
+    def write_row(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer and not self._needs_header:
+            return
+
+        chunk = io.StringIO()
+        writer = csv.DictWriter(chunk, fieldnames=self.header)
+        if self._needs_header:
+            writer.writeheader()
+        writer.writerows(self._buffer)
+
+        self._fh.write(chunk.getvalue())
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+        self._needs_header = False
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._fh.closed:
+            return
+        self.flush()
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def shard_dir_for(output_path):
+    """Directorio donde se guardan los shards asociados a `output_path`."""
+    return os.path.join(os.path.dirname(output_path), "shards")
+
+
+class ShardedCSVWriter(BufferedCSVWriter):
+    """
+    Escritor de un shard CSV propio para un worker.
+
+    Cada worker escribe en `shards/<base>.<shard_id>.csv` junto al CSV final,
+    así que no hay dos procesos compartiendo archivo. El shard incluye su propio
+    encabezado y se combina después con `merge_shards`.
+    """
+
+    def __init__(self, output_path, header, shard_id, batch_size=500, flush_interval=5.0):
+        base = os.path.splitext(os.path.basename(output_path))[0]
+        path = os.path.join(shard_dir_for(output_path), f"{base}.{shard_id}.csv")
+        super().__init__(path, header, batch_size=batch_size, flush_interval=flush_interval)
+        self.shard_id = shard_id
+        # Un shard con el mismo nombre (pid reutilizado) ya tiene filas propias
+        self.existing_rows = 0 if self._needs_header else _count_csv_rows(path)
+
+    def info(self):
+        return {"shard_id": self.shard_id, "path": self.filepath, "rows": self.existing_rows + self.rows_written}
+
+
+def _count_csv_rows(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def find_shards(output_path, known=()):
+    """
+    Lista todos los shards presentes en el directorio de shards de `output_path`.
+
+    `known` son los `info()` que devolvieron los workers de esta ejecución; sus
+    filas ya se conocen. Solo los demás archivos, shards huérfanos de
+    ejecuciones interrumpidas (cuyas filas ya están registradas en un
+    checkpoint), se leen para contar sus filas, y también se combinan.
+    """
+    shards = [dict(s) for s in known]
+    shard_dir = shard_dir_for(output_path)
+    if not os.path.isdir(shard_dir):
+        return shards
+    seen = {os.path.abspath(s["path"]) for s in shards}
+    base = os.path.splitext(os.path.basename(output_path))[0]
+    for name in sorted(os.listdir(shard_dir)):
+        if not (name.startswith(base + ".") and name.endswith(".csv")):
+            continue
+        path = os.path.join(shard_dir, name)
+        if os.path.abspath(path) in seen:
+            continue
+        shard_id = name[len(base) + 1:-len(".csv")]
+        shards.append({"shard_id": shard_id, "path": path, "rows": _count_csv_rows(path)})
+    return shards
+
+
+def _atomic_write_text(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_manifest(manifest_path, shards, header):
+    """Escribe (de forma atómica) el manifiesto JSON que indexa los shards."""
+    manifest = {
+        "header": list(header),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "total_rows": sum(s["rows"] for s in shards),
+        "shards": list(shards),
+    }
+    _save_manifest(manifest_path, manifest)
+    return manifest
+
+
+def _save_manifest(manifest_path, manifest):
+    _atomic_write_text(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+def _remove_shards(manifest_path, manifest):
+    for shard in manifest["shards"]:
+        if os.path.isfile(shard["path"]):
+            os.remove(shard["path"])
+    os.remove(manifest_path)
+
+
+def recover_merge(manifest_path, output_path):
+    """
+    Deja en estado consistente una combinación interrumpida antes de indexar de nuevo.
+
+    - Si el manifiesto está marcado como combinado, solo faltaba borrar sus
+      shards: se borran junto con el manifiesto.
+    - Si tiene `output_size` sin marca, la combinación se cortó a mitad: se
+      trunca `output_path` a ese tamaño y los shards quedan como huérfanos para
+      combinarse de nuevo.
+    """
+    if not os.path.isfile(manifest_path):
+        return
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("merged"):
+        _remove_shards(manifest_path, manifest)
+        print(f"🧹 Limpieza pendiente de una combinación anterior completada ({len(manifest['shards'])} shards)")
+    elif "output_size" in manifest and os.path.isfile(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(manifest["output_size"])
+            os.fsync(f.fileno())
+        print(f"↩️ Combinación interrumpida: {output_path} restaurado a {manifest['output_size']} bytes")
+
+
+def merge_shards(manifest_path, output_path):
+    """
+    Combina los shards listados en el manifiesto dentro de `output_path`.
+
+    Las filas de cada shard (sin su encabezado) se añaden al final del CSV
+    actual, sin reescribirlo. Antes se guarda en el manifiesto el tamaño previo
+    (`output_size`), con el que recover_merge deshace una combinación
+    interrumpida; al terminar se marca `merged` y se eliminan los shards y el
+    manifiesto.
+
+    Returns:
+        Número de filas añadidas a `output_path`.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    parent = os.path.dirname(output_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    manifest["output_size"] = os.path.getsize(output_path) if os.path.isfile(output_path) else 0
+    _save_manifest(manifest_path, manifest)
+
+    added = 0
+    with open(output_path, "ab") as out:
+        if manifest["output_size"] == 0:
+            out.write((",".join(manifest["header"]) + "\r\n").encode("utf-8"))
+        for shard in manifest["shards"]:
+            if not os.path.isfile(shard["path"]):
+                continue
+            with open(shard["path"], "rb") as src:
+                src.readline()  # encabezado del shard
+                shutil.copyfileobj(src, out)
+            added += shard["rows"]
+        out.flush()
+        os.fsync(out.fileno())
+
+    manifest["merged"] = True
+    _save_manifest(manifest_path, manifest)
+    _remove_shards(manifest_path, manifest)
+    return added
+
+
+# Nombre que usa Hive/Arrow para la partición de valores nulos
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+class ParquetPartitionWriter:
+    """
+    Escritor columnar en Parquet particionado por fecha normalizada.
+
+    Genera un dataset con estilo Hive: `<root>/fecha=YYYY-MM-DD/part-<shard>-<run>-<n>.parquet`.
+    La columna `fecha` se normaliza con `to_date` y pasa a ser la clave de
+    partición (las filas sin fecha reconocible van a `fecha=__HIVE_DEFAULT_PARTITION__`),
+    de modo que los lectores pueden podar particiones por rango de fechas y
+    leer solo las columnas que necesitan.
+
+    Tiene la misma interfaz que BufferedCSVWriter (write_row, flush, close).
+    Cada archivo se escribe primero como temporal y se publica con os.replace.
+    `<run>` es un token aleatorio por escritor: shard_id y el contador se repiten
+    entre ejecuciones, y sin él una segunda corrida sobre el mismo dataset
+    reemplazaría los archivos de la anterior (el CSV, en cambio, agrega filas).
+    """
+
+    def __init__(self, root, header, shard_id="0", batch_size=500, flush_interval=5.0):
+        if pa is None:
+            raise ImportError("pyarrow no está disponible. Instala pyarrow para usar --format parquet.")
+        self.filepath = root
+        self.header = [c for c in header if c != "fecha"]
+        self.shard_id = shard_id
+        self.run_id = uuid.uuid4().hex[:12]
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.files_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        os.makedirs(root, exist_ok=True)
+
+    def write_row(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+
+        partitions = {}
+        for row in self._buffer:
+            fecha = to_date(row.get("fecha") or "") or NULL_PARTITION
+            partitions.setdefault(fecha, []).append(row)
+
+        for fecha, rows in partitions.items():
+            part_dir = os.path.join(self.filepath, f"fecha={fecha}")
+            os.makedirs(part_dir, exist_ok=True)
+            table = pa.Table.from_pydict({c: [r.get(c) for r in rows] for c in self.header})
+            name = f"part-{self.shard_id}-{self.run_id}-{self.files_written:05d}.parquet"
+            tmp_path = os.path.join(part_dir, "." + name + ".tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, os.path.join(part_dir, name))
+            self.files_written += 1
+
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+    def info(self):
+        return {"shard_id": self.shard_id, "path": self.filepath, "rows": self.rows_written}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()